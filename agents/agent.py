@@ -1,16 +1,17 @@
 # Include libraries 
 from langgraph.config import get_store
 from langgraph.store.memory import InMemoryStore
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import AIMessage
+from agents.clients import get_chat_model
+from langchain_core.messages import AIMessage, message_chunk_to_message
 from typing_extensions import List
 from typing import Literal
-from langgraph.graph import START, StateGraph, MessagesState, END
+from langgraph.graph import START, StateGraph, END
 from langgraph.prebuilt import tools_condition, ToolNode
 from langchain_core.messages.human import HumanMessage
 from langchain_core.messages.ai import AIMessage
 from langchain_core.messages.base import BaseMessage
 from agents.core_utils import ClientMemory
+from agents.history import AgentState, compact_history, with_summary
 from tool_registry import tools
 
 # Access the last AI message
@@ -77,23 +78,29 @@ def get_client_info(company_cik: str) -> str:
     return str(client_info.value) if client_info else "Unknown client"
 
 # Chatbot Node (uses basic dict state)
-def chatbot(state: dict) -> dict:
-    message = llm_with_tools.invoke(state["messages"])
-    return {"messages": [message]}
-
-llm = ChatOpenAI(model="gpt-4o")
+# Async and streamed: stream_mode="messages" clients get each token as soon as it is generated
+async def chatbot(state: dict) -> dict:
+    message = None
+    # compact_history has already bounded the history; the rolling summary goes first
+    async for chunk in llm_with_tools.astream(with_summary(state)):
+        message = chunk if message is None else message + chunk
+    return {"messages": [message_chunk_to_message(message)]}
+
+llm = get_chat_model("gpt-4o")
 llm_with_tools = llm.bind_tools(tools)
 
 store = InMemoryStore() 
 
 # Define and complile graph  
 # Build graph
-builder = StateGraph(MessagesState)
+builder = StateGraph(AgentState)
+builder.add_node("compact_history", compact_history)
 builder.add_node("chatbot", chatbot)
 builder.add_node("tools", ToolNode(tools))
 builder.add_node("manage_memory_connector_node", manage_memory_connector_node)
 builder.add_node("update_memory_node", update_memory_node)
-builder.add_edge(START, "chatbot")
+builder.add_edge(START, "compact_history")
+builder.add_edge("compact_history", "chatbot")
 builder.add_conditional_edges(
     "chatbot",
     # If the latest message (result) from assistant is a tool call -> tools_condition routes to tools
@@ -104,7 +111,7 @@ builder.add_conditional_edges(
         END: "manage_memory_connector_node" # ← acts like a dummy before ending
     } 
 )
-builder.add_edge("tools", "chatbot")
+builder.add_edge("tools", "compact_history")
 builder.add_conditional_edges("manage_memory_connector_node", should_update_or_save_memory) 
 builder.add_edge("update_memory_node", END) 
 
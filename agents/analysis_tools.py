@@ -1,6 +1,7 @@
 from agents.data_wrappers import gather_peer_data
-from agents.core_utils import format_peer_comparison_prompt
-from langchain_openai import ChatOpenAI
+from agents.core_utils import format_peer_comparison_prompt, emit_stream_event, stream_llm_text
+from agents.ratio_engine import build_line_item_frame, compute_ratios, format_ratio_table
+from agents.clients import get_chat_model
 from edgar import *
 
 def run_peer_comparison(tickers: List[str]) -> str:
@@ -9,13 +10,15 @@ def run_peer_comparison(tickers: List[str]) -> str:
 
     This function performs the following steps:
     1. Retrieves financial and market data for each ticker using underlying tools.
-    2. Structures the data into a unified prompt format.
+    2. Computes margins, leverage, coverage and growth ratios for all peers (see compute_financial_ratios)
+       and structures them with the data into a unified prompt format.
     3. Passes the prompt to an LLM to generate a qualitative comparison based on:
        - Revenue
        - Cost Structure
        - Profitability
        - Leverage
        - Stock Price and Valuation
+       The comparison is streamed to the client token by token while it is generated.
 
     Parameters:
         tickers (List[str]): A list of company ticker symbols to compare.
@@ -24,11 +27,30 @@ def run_peer_comparison(tickers: List[str]) -> str:
         str: A natural language comparison generated by the LLM.
     """
 
+    emit_stream_event({"source": "run_peer_comparison", "status": f"Gathering data for {', '.join(tickers)}"})
     data = gather_peer_data(tickers)
     prompt = format_peer_comparison_prompt(data)
-    llm = ChatOpenAI(model="gpt-4o")
-    response = llm.invoke(prompt)  # plug in your LLM interface
-    return response
+    llm = get_chat_model("gpt-4o")
+    # Streamed, so the comparison shows up while it is being written
+    return stream_llm_text(llm, prompt, "run_peer_comparison")
 
+def compute_financial_ratios(tickers: List[str]) -> str:
+    """
+    Computes standard financial ratios for one or more companies from their latest 10-K statements,
+    for every fiscal year available: gross, operating and net margin, R&D / revenue, debt / equity,
+    liabilities / equity, current ratio, interest coverage, and year-over-year revenue, operating
+    income and net income growth.
+
+    Use this instead of deriving ratios from raw statements; the numbers are computed exactly.
 
+    Args:
+        tickers (List[str]): Stock ticker symbols (e.g., ["MU", "NVDA", "AMD"]).
 
+    Returns:
+        str: A markdown table with one row per (ticker, fiscal year), plus a note for
+        tickers whose statements could not be retrieved.
+    """
+    data = gather_peer_data(tickers, sources=["income_statement", "balance_sheet"])
+    table = format_ratio_table(compute_ratios(build_line_item_frame(data)))
+    errors = [f"{ticker}: {ticker_data['error']}" for ticker, ticker_data in data.items() if "error" in ticker_data]
+    return table + ("\n\nUnavailable: " + "; ".join(errors) if errors else "")
@@ -0,0 +1,139 @@
+import os, pickle, re, tempfile, threading, time, uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+import pandas as pd
+from agents.config import (
+    artifact_max_entries, artifact_max_memory_bytes, artifact_spill_dir, artifact_spill_ttl_seconds,
+    artifact_preview_rows, artifact_preview_chars
+)
+
+# Handles are generated here, but come back from the LLM: only this shape is ever looked up on disk
+_HANDLE = re.compile(r"^art-[a-z0-9_]+-[0-9a-f]{12}$")
+
+@dataclass
+class Artifact:
+    handle: str
+    value: Any  # pd.DataFrame or str
+    source: str  # the tool that produced it
+    meta: Dict[str, Any] = field(default_factory=dict)  # e.g. the tool call arguments
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def size_bytes(self) -> int:
+        if isinstance(self.value, pd.DataFrame):
+            return int(self.value.memory_usage(deep=True).sum())
+        return len(str(self.value).encode("utf-8"))
+
+def preview_artifact(artifact: Artifact) -> str:
+    """
+    What the LLM sees instead of the artifact: its handle, origin, shape and the first rows or
+    characters.
+    """
+    args = ", ".join(f"{key}={value!r}" for key, value in artifact.meta.items())
+    header = f"[artifact {artifact.handle}] from {artifact.source}({args})"
+    value = artifact.value
+    if isinstance(value, pd.DataFrame):
+        return (f"{header}: table of {len(value)} rows x {len(value.columns)} columns.\n"
+                f"Columns: {', '.join(map(str, value.columns))}\n"
+                f"First {min(artifact_preview_rows, len(value))} rows:\n"
+                f"{value.head(artifact_preview_rows).to_string(max_colwidth=60)}\n"
+                f"Use slice_artifact / read_artifact with handle '{artifact.handle}' for more.")
+    text = str(value)
+    more = f"\n… ({len(text) - artifact_preview_chars} more characters)" if len(text) > artifact_preview_chars else ""
+    return (f"{header}: text of {len(text)} characters.\n{text[:artifact_preview_chars]}{more}\n"
+            f"Use read_artifact with handle '{artifact.handle}' for more.")
+
+class ArtifactStore:
+    """
+    Keeps large tool results (tables and long texts) out of the message history.
+
+    Artifacts live in an in-process LRU bounded by count and size. Evicted artifacts are
+    pickled to `spill_dir` (if set) and loaded back on access, so a handle stays valid for
+    `artifact_spill_ttl_seconds`, also across restarts of the process.
+    """
+    def __init__(self, max_entries: int = artifact_max_entries, max_bytes: int = artifact_max_memory_bytes,
+                 spill_dir: Optional[str] = artifact_spill_dir):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir or None
+        self.stats = {"stored": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "spilled": 0}
+        self._items: "OrderedDict[str, Artifact]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, handle: str) -> str:
+        return os.path.join(self.spill_dir, f"{handle}.pkl")
+
+    def _spill(self, artifact: Artifact) -> None:
+        if not self.spill_dir:
+            return
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.spill_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(artifact.handle))
+            self.stats["spilled"] += 1
+        except OSError as e:
+            print(f"⚠️ Warning: Could not spill artifact {artifact.handle}: {e}")
+
+    def _expire_spilled(self) -> None:
+        cutoff = time.time() - artifact_spill_ttl_seconds
+        try:
+            for entry in os.scandir(self.spill_dir):
+                if entry.name.endswith(".pkl") and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+        except OSError:
+            pass
+
+    def _remember(self, artifact: Artifact) -> None:
+        # Called with the lock held
+        evicted = []
+        self._items[artifact.handle] = artifact
+        self._bytes += artifact.size_bytes
+        while len(self._items) > 1 and (len(self._items) > self.max_entries or self._bytes > self.max_bytes):
+            _handle, old = self._items.popitem(last=False)
+            self._bytes -= old.size_bytes
+            evicted.append(old)
+        for old in evicted:
+            self._spill(old)
+        if evicted and self.spill_dir:
+            self._expire_spilled()
+
+    def put(self, value: Any, source: str, meta: Optional[Dict[str, Any]] = None) -> Artifact:
+        slug = re.sub(r"[^a-z0-9_]", "_", source.lower())
+        artifact = Artifact(f"art-{slug}-{uuid.uuid4().hex[:12]}", value, source, dict(meta or {}))
+        with self._lock:
+            self._remember(artifact)
+            self.stats["stored"] += 1
+        return artifact
+
+    def get(self, handle: str) -> Artifact:
+        """
+        Returns the artifact stored under `handle`. Raises KeyError if it is unknown or expired.
+        """
+        handle = handle.strip().strip("'\"[]")
+        with self._lock:
+            artifact = self._items.get(handle)
+            if artifact is not None:
+                self._items.move_to_end(handle)
+                self.stats["memory_hits"] += 1
+                return artifact
+            if self.spill_dir and _HANDLE.match(handle):
+                try:
+                    with open(self._path(handle), "rb") as f:
+                        artifact = pickle.load(f)
+                except (OSError, pickle.UnpicklingError, EOFError):
+                    artifact = None
+            if artifact is None:
+                self.stats["misses"] += 1
+                raise KeyError(f"Unknown or expired artifact handle: {handle}")
+            self.stats["disk_hits"] += 1
+            self._remember(artifact)
+            return artifact
+
+_artifact_store = ArtifactStore()
+
+def get_artifact_store() -> ArtifactStore:
+    return _artifact_store
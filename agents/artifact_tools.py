@@ -0,0 +1,132 @@
+import functools, inspect
+from typing import Any, Callable, Dict, List, Optional
+import pandas as pd
+from agents.artifact_store import get_artifact_store, preview_artifact
+from agents.ratio_engine import build_line_item_frame, compute_ratios, format_ratio_table
+from agents.config import artifact_min_chars, artifact_max_output_chars
+
+# get_financial_statement statement_type -> key expected by build_line_item_frame
+_RATIO_STATEMENT_KEYS = {"income": "income_statement", "balance_sheet": "balance_sheet"}
+
+def _result_size(value: Any) -> int:
+    if isinstance(value, pd.DataFrame):
+        return len(value.to_csv())
+    return len(value) if isinstance(value, str) else 0
+
+def _store_if_large(value: Any, source: str, meta: Dict[str, Any]) -> Any:
+    if _result_size(value) <= artifact_min_chars:
+        return value
+    return preview_artifact(get_artifact_store().put(value, source, meta))
+
+def store_large_results(tool: Callable) -> Callable:
+    """
+    Wraps a tool so that a DataFrame or text result larger than artifact_min_chars is saved in
+    the artifact store; the LLM gets a short preview with the artifact handle instead. The
+    wrapper keeps the tool's name, signature and docstring, so its tool schema is unchanged.
+    """
+    signature = inspect.signature(tool)
+
+    @functools.wraps(tool)
+    def wrapper(*args, **kwargs):
+        result = tool(*args, **kwargs)
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return _store_if_large(result, tool.__name__, dict(bound.arguments))
+
+    wrapper.__doc__ = (tool.__doc__ or "").rstrip() + (
+        "\n\n    Large results are stored as an artifact: you get a preview and a handle to pass to "
+        "slice_artifact, read_artifact or compute_ratios_from_artifacts.\n"
+    )
+    return wrapper
+
+def read_artifact(handle: str, offset: int = 0, length: int = artifact_max_output_chars) -> str:
+    """
+    Reads part of a stored artifact as text (tables are rendered as CSV).
+
+    Args:
+        handle (str): The artifact handle from a tool result (e.g. "art-get_latest_filings-1a2b3c4d5e6f").
+        offset (int): Character offset to start reading at. Defaults to 0.
+        length (int): Number of characters to read (at most the configured output size).
+
+    Returns:
+        str: The requested characters, with the total length so the next page can be requested.
+    """
+    try:
+        artifact = get_artifact_store().get(handle)
+    except KeyError as e:
+        return e.args[0]
+    text = artifact.value.to_csv(index=False) if isinstance(artifact.value, pd.DataFrame) else str(artifact.value)
+    length = max(0, min(length, artifact_max_output_chars))
+    end = min(len(text), offset + length)
+    return f"[artifact {artifact.handle}: characters {offset}-{end} of {len(text)}]\n{text[offset:end]}"
+
+def slice_artifact(handle: str, rows: Optional[List[str]] = None, columns: Optional[List[str]] = None,
+                   max_rows: int = 50) -> str:
+    """
+    Selects line items and periods from a stored table (e.g. a financial statement from
+    get_financial_statement) without re-fetching it.
+
+    Args:
+        handle (str): The artifact handle of a table.
+        rows (Optional[List[str]]): Line items to keep, matched case-insensitively as substrings of
+            the row label (e.g. ["Revenue", "Net Income"]). All rows if None.
+        columns (Optional[List[str]]): Columns to keep, matched as substrings of the column name
+            (e.g. ["2024", "2023"] for those fiscal periods). The label column is always kept. All columns if None.
+        max_rows (int): Max number of rows returned. Defaults to 50.
+
+    Returns:
+        str: The selected rows and columns as a table, or a new artifact preview if still large.
+    """
+    store = get_artifact_store()
+    try:
+        artifact = store.get(handle)
+    except KeyError as e:
+        return e.args[0]
+    df = artifact.value
+    if not isinstance(df, pd.DataFrame):
+        return f"Artifact {artifact.handle} is text, not a table: use read_artifact."
+
+    labels = df["label"].astype(str) if "label" in df.columns else df.index.to_series().astype(str)
+    if rows:
+        wanted = [row.lower() for row in rows]
+        df = df[labels.str.lower().map(lambda label: any(row in label for row in wanted)).to_numpy()]
+    if columns:
+        keep = [c for c in df.columns if c == "label" or any(str(wanted) in str(c) for wanted in columns)]
+        df = df[keep]
+    df = df.head(max_rows)
+    if df.empty:
+        return f"No rows of artifact {artifact.handle} match rows={rows} columns={columns}."
+    if _result_size(df) > artifact_max_output_chars:
+        meta = {"handle": artifact.handle, "rows": rows, "columns": columns}
+        return preview_artifact(store.put(df, "slice_artifact", meta))
+    return df.to_string(index=False, max_colwidth=60)
+
+def compute_ratios_from_artifacts(handles: List[str]) -> str:
+    """
+    Computes financial ratios (margins, leverage, current ratio, interest coverage and growth)
+    from income statement and balance sheet artifacts returned by get_financial_statement,
+    without fetching the statements again.
+
+    Args:
+        handles (List[str]): Artifact handles of income and/or balance sheet statements, for one
+            or more tickers.
+
+    Returns:
+        str: A markdown table with one row per (ticker, fiscal year).
+    """
+    store = get_artifact_store()
+    statements: Dict[str, Dict[str, Any]] = {}
+    problems = []
+    for handle in handles:
+        try:
+            artifact = store.get(handle)
+        except KeyError as e:
+            problems.append(e.args[0])
+            continue
+        key = _RATIO_STATEMENT_KEYS.get(artifact.meta.get("statement_type"))
+        if artifact.source != "get_financial_statement" or key is None:
+            problems.append(f"{artifact.handle} is not an income statement or balance sheet")
+            continue
+        statements.setdefault(str(artifact.meta["ticker"]).upper(), {})[key] = artifact.value
+    table = format_ratio_table(compute_ratios(build_line_item_frame(statements)))
+    return table + ("\n\nSkipped: " + "; ".join(problems) if problems else "")
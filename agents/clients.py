@@ -0,0 +1,101 @@
+import atexit, os, threading
+from typing import Any, Callable, Dict, Hashable, Optional
+import httpx
+import pymongo
+from finnhub import Client
+from openai import OpenAI
+from requests.adapters import HTTPAdapter
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from agents.config import (
+    finnhub_pool_size, openai_max_connections, openai_max_keepalive_connections, mongo_max_pool_size
+)
+
+# Process-wide registry of long-lived clients. Each client is built lazily on first use and
+# reused afterwards, so tool calls don't pay for a new TLS handshake and connection pool.
+# All the clients kept here are safe to share across threads and asyncio tasks.
+_clients: Dict[Hashable, Any] = {}
+_closers: Dict[Hashable, Callable[[], None]] = {}
+_lock = threading.RLock()  # re-entrant: creating a client may create the shared HTTP pool
+
+def _get_or_create(key: Hashable, create: Callable[[], Any], close: Optional[Callable[[Any], None]] = None) -> Any:
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = create()
+            _clients[key] = client
+            if close is not None:
+                _closers[key] = lambda: close(client)
+    return client
+
+def _shared_http_client() -> httpx.Client:
+    # One keep-alive pool shared by the OpenAI SDK client and every ChatOpenAI/OpenAIEmbeddings
+    limits = httpx.Limits(max_connections=openai_max_connections,
+                          max_keepalive_connections=openai_max_keepalive_connections)
+    return _get_or_create("httpx", lambda: httpx.Client(limits=limits, timeout=httpx.Timeout(600, connect=10)),
+                          lambda c: c.close())
+
+def get_openai_client() -> OpenAI:
+    """
+    Returns the shared OpenAI SDK client.
+    """
+    return _get_or_create("openai", lambda: OpenAI(http_client=_shared_http_client()))
+
+def get_chat_model(model: str = "gpt-4o", temperature: Optional[float] = None) -> ChatOpenAI:
+    """
+    Returns a shared ChatOpenAI instance for the given model and temperature.
+    """
+    def create():
+        kwargs = {"model": model, "http_client": _shared_http_client()}
+        if temperature is not None:
+            kwargs["temperature"] = temperature
+        return ChatOpenAI(**kwargs)
+    return _get_or_create(("chat", model, temperature), create)
+
+def get_embeddings_model(model: str = "text-embedding-ada-002") -> OpenAIEmbeddings:
+    """
+    Returns a shared OpenAIEmbeddings instance for the given model.
+    """
+    return _get_or_create(("embeddings", model),
+                          lambda: OpenAIEmbeddings(model=model, http_client=_shared_http_client()))
+
+def get_mongo_client(uri_env: str = "MONGO_URI") -> pymongo.MongoClient:
+    """
+    Returns the shared MongoClient for the connection string in the `uri_env` environment variable.
+    MongoClient keeps its own connection pool and is thread-safe.
+    """
+    uri = os.getenv(uri_env)
+    return _get_or_create(("mongo", uri), lambda: pymongo.MongoClient(uri, maxPoolSize=mongo_max_pool_size),
+                          lambda c: c.close())
+
+def get_finnhub_client() -> Client:
+    """
+    Returns the process-wide Finnhub client. Its HTTP session keeps a pool of connections alive.
+    """
+    def create():
+        api_key = os.getenv("FINNHUB_API_KEY")
+        if not api_key:
+            raise ValueError("Environment variable FINNHUB_API_KEY is not set")
+        client = Client(api_key=api_key)
+        client._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=finnhub_pool_size))
+        return client
+    return _get_or_create("finnhub", create, lambda c: c.close())
+
+def close_clients() -> None:
+    """
+    Closes every client in the registry. Registered with atexit, so it runs when the
+    langgraph-api worker shuts down.
+    """
+    with _lock:
+        closers = list(_closers.values())
+        _closers.clear()
+        _clients.clear()
+    for close in closers:
+        try:
+            close()
+        except Exception as e:
+            print(f"⚠️ Warning: Error while closing client: {e}")
+
+atexit.register(close_clients)
@@ -1,2 +1,114 @@
+import os
+
 numCandidates = 150 #use for the vector index querying  
-limit = 10 #used for vector index querying 
\ No newline at end of file
+limit = 10 #used for vector index querying 
+
+# Context packing for query_ar_index (agents/context_packing.py)
+context_token_budget = 3000 #max tokens of 10-K excerpts put in the answer prompt
+context_mmr_lambda = 0.7 #relevance vs. novelty when picking excerpts (1.0 = by score only)
+context_duplicate_similarity = 0.8 #word-shingle Jaccard above which an excerpt is dropped as a near-duplicate
+context_min_overlap_chars = 20 #shortest end-to-start overlap for two chunks to be merged
+context_max_overlap_chars = 200 #longest overlap looked for (the splitter's chunk_overlap is 100)
+
+# Peer data gathering (agents/data_wrappers.py)
+peer_data_max_workers = 8 #max number of (ticker, source) fetches running at once
+peer_data_source_timeouts = { #seconds to wait on each source once its fetch has started
+    "income_statement": 60,
+    "balance_sheet": 60,
+    "stock_price": 15,
+    "analyst_rating": 15,
+    "earnings": 15,
+}
+peer_table_max_periods = 3 #fiscal years per line item in the peer comparison prompt
+
+# Message history compaction before each chatbot call (agents/history.py)
+history_token_budget = 12000 #max tokens of summary + messages sent to the chatbot LLM
+history_keep_turns = 2 #most recent user turns always kept verbatim
+history_tool_output_tokens = 400 #tool outputs of earlier turns are cut to this many tokens
+history_summary_model = "gpt-4o-mini" #writes the rolling summary of compacted turns
+history_summary_max_words = 250 #length cap of the rolling summary
+
+# Root directory for on-disk caches
+cache_root = os.getenv("MAXIT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "maxit"))
+
+# On-disk EDGAR filing cache (agents/filing_cache.py)
+filing_cache_dir = os.getenv("FILING_CACHE_DIR", os.path.join(cache_root, "filings"))
+filing_cache_max_bytes = 2 * 1024**3 #LRU-evict raw documents and parsed items above this size
+filing_index_ttl_seconds = 6 * 60 * 60 #how long a cached filing index is trusted before asking EDGAR again
+
+# In-process XBRL parse cache (agents/xbrl_cache.py)
+xbrl_cache_max_filings = 64 #parsed per-filing XBRL objects kept in memory
+xbrl_cache_max_statements = 128 #stitched statement DataFrames kept in memory
+
+# Single-flight deduplication of identical in-flight tool calls (agents/single_flight.py)
+single_flight_wait_seconds = 180 #a caller waiting on an identical call longer than this runs the tool itself
+
+# Artifact store for large tool outputs (agents/artifact_store.py, agents/artifact_tools.py)
+artifact_min_chars = 2000 #tool results larger than this are stored and returned as a handle + preview
+artifact_max_entries = 128 #artifacts kept in memory
+artifact_max_memory_bytes = 256 * 1024**2 #in-memory size above which least recently used artifacts are evicted
+artifact_spill_dir = os.getenv("ARTIFACT_SPILL_DIR", os.path.join(cache_root, "artifacts")) #evicted artifacts are written here; "" disables spilling
+artifact_spill_ttl_seconds = 24 * 60 * 60 #spilled artifacts older than this are deleted
+artifact_preview_rows = 8 #rows of a table shown in a preview
+artifact_preview_chars = 800 #characters of a text shown in a preview
+artifact_max_output_chars = 6000 #artifact reads and slices larger than this are stored again as an artifact
+
+# Finnhub access layer (agents/finnhub_cache.py)
+finnhub_rate_limit_per_second = 1.0 #sustained rate of the process-wide token bucket (free tier: 60 calls/min)
+finnhub_rate_limit_burst = 10 #calls allowed back-to-back before the bucket starts queueing
+finnhub_pool_size = 10 #pooled HTTP connections kept alive to the Finnhub API
+finnhub_ttl_seconds = { #how long each endpoint's responses are served from cache
+    "quote": 15,
+    "recommendation_trends": 6 * 60 * 60,
+    "earnings_calendar": 6 * 60 * 60,
+}
+finnhub_earnings_fallback_ttl_seconds = 60 * 60 #earnings TTL when the next report date is unknown or today
+
+# Long-lived clients (agents/clients.py)
+openai_max_connections = 50 #connections in the shared OpenAI HTTP pool
+openai_max_keepalive_connections = 20 #idle connections kept alive between calls
+mongo_max_pool_size = 50 #connections per MongoClient
+
+# Offline ticker / CIK / name resolution (agents/ticker_index.py)
+ticker_index_path = os.getenv("TICKER_INDEX_PATH", os.path.join(cache_root, "company_tickers.json")) #SEC company_tickers snapshot
+ticker_index_url = "https://www.sec.gov/files/company_tickers.json" #where the snapshot is refreshed from
+ticker_index_max_age_seconds = 7 * 24 * 3600 #re-download the snapshot when older than this
+ticker_index_check_seconds = 300 #how often the snapshot file is checked for changes
+ticker_index_min_score = 0.3 #min trigram similarity for a fuzzy name match
+ticker_name_match_min_score = 0.6 #min match score for get_ticker_given_name to answer locally instead of asking Yahoo
+
+# 10-K item summaries (agents/core_utils.py) and their cache (agents/summary_cache.py)
+summary_cache_max_entries = 512 #summaries kept in memory
+summary_cache_mongo_timeout_seconds = 2 #max wait on MongoDB per cache lookup or write
+summary_cache_retry_seconds = 60 #how long to skip MongoDB after it failed
+summary_section_tokens = 12000 #items longer than this are summarized section by section (map-reduce)
+summary_map_concurrency = 8 #LLM summary calls in flight at once across all items of a request
+
+# Local 10-K item router (agents/item_router.py)
+item_router_embedding_model = "text-embedding-ada-002"
+item_router_cache_path = os.path.join(cache_root, "item_router_embeddings.json") #precomputed item description embeddings
+item_router_min_similarity = 0.80 #below this top cosine similarity the router falls back to the LLM
+item_router_margin = 0.015 #items within this similarity of the best match are also returned
+item_router_max_items = 3 #max items returned by a local route
+item_router_memo_size = 1024 #recent queries remembered with their routed items
+
+# Persistent embedding cache (agents/embedding_cache.py)
+embedding_model = "text-embedding-ada-002" #model used for chunk and query embeddings
+embedding_cache_path = os.path.join(cache_root, "embeddings.sqlite3") #float32 vectors keyed by (model, sha256(text))
+embedding_storage = os.getenv("EMBEDDING_STORAGE", "float32") #how all_filing_chunks stores embeddings: "float32" (number list, what the Atlas vector_index is built on), "float16" or "int8" (BSON binary, see agents/quantization.py)
+
+# Embedding request batching (agents/embedding_batcher.py)
+embedding_batch_max_tokens = 100_000 #tokens packed into one embeddings request (API limit: 300k)
+embedding_batch_max_inputs = 2048 #inputs per embeddings request (API limit)
+embedding_max_input_tokens = 8191 #per-input token limit of the embedding model
+embedding_batch_max_wait_seconds = 0.2 #how long a partial batch waits for more chunks before it is sent
+embedding_batch_concurrency = 4 #embeddings requests in flight at once
+embedding_max_retries = 6 #retries on 429/5xx/connection errors
+embedding_retry_max_delay_seconds = 60 #cap of the exponential backoff
+
+# Retrieval backend for query_ar_index (agents/retrieval.py). numCandidates/limit above apply to both
+retrieval_backend = os.getenv("RETRIEVAL_BACKEND", "atlas") #"atlas" ($vectorSearch on MongoDB) or "local" (on-disk index)
+local_index_dir = os.getenv("LOCAL_INDEX_DIR", os.path.join(cache_root, "local_index")) #built by ar_pipeline/create_local_index.py
+local_index_storage = "float32" #matrix dtype of the local index: "float32", "float16" or "int8" (with a per-row scale)
+local_index_ivf_lists = 0 #IVF clusters built for approximate search; 0 = exact search only
+local_search_batch_rows = 65536 #rows scored per matrix multiply in exact search
@@ -0,0 +1,134 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+from agents.core_utils import count_tokens
+from agents.config import (
+    context_token_budget, context_mmr_lambda, context_duplicate_similarity, context_min_overlap_chars,
+    context_max_overlap_chars
+)
+
+@dataclass
+class Passage:
+    item_code: str
+    text: str
+    score: float
+    chunks: int = 1
+    shingles: Set[str] = field(default_factory=set, repr=False)
+
+@dataclass
+class PackedContext:
+    text: str
+    passages: List[Passage]
+    chunks_in: int
+    tokens_in: int
+    tokens_out: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_in - self.tokens_out
+
+    def report(self) -> str:
+        return (f"📦 Context: {self.chunks_in} chunks → {len(self.passages)} passages, "
+                f"{self.tokens_in} → {self.tokens_out} tokens ({self.tokens_saved} saved)")
+
+def _overlap(left: str, right: str) -> int:
+    """
+    Length of the longest suffix of `left` that is a prefix of `right` (the text splitter's
+    chunk_overlap), or 0 if shorter than context_min_overlap_chars.
+    """
+    for size in range(min(len(left), len(right), context_max_overlap_chars), context_min_overlap_chars - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+def _merge_item_chunks(passages: List[Passage]) -> List[Passage]:
+    """
+    Stitches chunks of one item that overlap end-to-start back into continuous passages, and
+    drops chunks contained in another one.
+    """
+    passages = list(passages)
+    merged = True
+    while merged:
+        merged = False
+        for i, left in enumerate(passages):
+            for j, right in enumerate(passages):
+                if i == j:
+                    continue
+                if right.text in left.text:
+                    left.score, left.chunks = max(left.score, right.score), left.chunks + right.chunks
+                elif (size := _overlap(left.text, right.text)):
+                    left.text += right.text[size:]
+                    left.score, left.chunks = max(left.score, right.score), left.chunks + right.chunks
+                else:
+                    continue
+                del passages[j]
+                merged = True
+                break
+            if merged:
+                break
+    return passages
+
+def _shingles(text: str, size: int = 3) -> Set[str]:
+    words = re.findall(r"\w+", text.lower())
+    return {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+
+def _similarity(a: Passage, b: Passage) -> float:
+    if not a.shingles or not b.shingles:
+        return 0.0
+    return len(a.shingles & b.shingles) / len(a.shingles | b.shingles)
+
+def pack_context(docs: List[Dict], token_budget: int = context_token_budget,
+                 mmr_lambda: float = context_mmr_lambda) -> PackedContext:
+    """
+    Builds the excerpts block of a RAG prompt from retrieved chunks.
+
+    Overlapping chunks of the same item are merged back into passages, then passages are picked
+    by maximal marginal relevance (retrieval score against word-shingle similarity to what is
+    already picked). Near-duplicates (similarity ≥ context_duplicate_similarity) are dropped,
+    and packing stops at `token_budget`.
+
+    Args:
+        docs (List[Dict]): Retrieved chunks with `chunk`, `item_code` and `score`, best first.
+        token_budget (int): Max tokens of the packed context.
+        mmr_lambda (float): Weight of relevance vs. novelty, 1.0 = by score only.
+
+    Returns:
+        PackedContext: The context text, its passages and the token counts before and after.
+    """
+    docs = [doc for doc in docs if doc.get("chunk")]
+    tokens_in = count_tokens("\n\n".join(doc["chunk"] for doc in docs))
+
+    by_item: Dict[str, List[Passage]] = {}
+    for doc in docs:
+        item_code = doc.get("item_code", "")
+        by_item.setdefault(item_code, []).append(Passage(item_code, doc["chunk"], float(doc.get("score", 0.0))))
+    candidates = [passage for passages in by_item.values() for passage in _merge_item_chunks(passages)]
+    for passage in candidates:
+        passage.shingles = _shingles(passage.text)
+
+    # Scores are normalised so relevance and similarity are on the same 0-1 scale
+    top_score = max((passage.score for passage in candidates), default=0.0) or 1.0
+    selected: List[Passage] = []
+    used_tokens = 0
+    while candidates:
+        best: Optional[Passage] = None
+        best_value = float("-inf")
+        for passage in list(candidates):
+            redundancy = max((_similarity(passage, chosen) for chosen in selected), default=0.0)
+            if redundancy >= context_duplicate_similarity:
+                candidates.remove(passage)
+                continue
+            value = mmr_lambda * passage.score / top_score - (1 - mmr_lambda) * redundancy
+            if value > best_value:
+                best, best_value = passage, value
+        if best is None:
+            break
+        candidates.remove(best)
+        tokens = count_tokens(best.text)
+        if used_tokens + tokens > token_budget:
+            continue  # a smaller passage may still fit
+        selected.append(best)
+        used_tokens += tokens
+
+    text = "\n\n".join(f"[{passage.item_code}]\n{passage.text}" for passage in selected)
+    return PackedContext(text, selected, len(docs), tokens_in, count_tokens(text) if text else 0)
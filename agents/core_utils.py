@@ -3,14 +3,20 @@ from datetime import datetime, timezone
 from typing_extensions import TypedDict, NotRequired, List
 from pydantic import BaseModel, Field
 from collections.abc import Iterable
-from finnhub import Client
-from typing import Dict, Any
-import os
+from typing import Dict, Any, Awaitable, Optional, TypeVar
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import asyncio, os, threading, time
+import pandas as pd
 from edgar.core import set_identity
+from langgraph.config import get_stream_writer
 from edgar.company_reports import TenK
 from edgar.company_reports import FilingStructure
 from edgar.company_reports import TenK
-from langchain_openai import ChatOpenAI
+from agents.clients import get_chat_model, get_finnhub_client
+from agents.financial_concepts import KEY_LINE_ITEMS, select_line_items
+from agents.ratio_engine import build_line_item_frame, compute_ratios, format_ratio_table
+from agents.config import peer_table_max_periods, summary_section_tokens, summary_map_concurrency
 
 
 # Define classes 
@@ -60,8 +66,12 @@ REQUIRED_KEY_VALUES = {
     ]
 }
 
-def summarize_item_text(item_code: str, title:str, description: str, item_text: str)-> str: 
-    prompt = (
+# Bump when the prompts below (or the ingestion prompt in ar_pipeline/ingest_ar_filings.py) change,
+# so cached and ingested summaries from the old prompts are not reused
+SUMMARY_PROMPT_VERSION = "v2"
+
+def _build_item_summary_prompt(item_code: str, title: str, description: str, item_text: str) -> str:
+    return (
         f"You are a financial analyst assistant. Read the following text from {title} ({item_code}) "
         "of a 10-K filing. Extract and populate the following structured format:\n\n"
         f"{description}\n\n"
@@ -69,18 +79,167 @@ def summarize_item_text(item_code: str, title:str, description: str, item_text:
         "- Remember to include key numerical data \n"
         f"TEXT:\n{item_text}"
     )
-    
-    llm = ChatOpenAI(model="gpt-4o")
 
-    response = llm.invoke(prompt)
-    llmgen_summary = response.content
-    return llmgen_summary 
+def split_into_sections(text: str, max_tokens: int) -> List[str]:
+    """
+    Splits text into sections of at most ~`max_tokens` tokens, at paragraph boundaries where
+    possible (a paragraph longer than that is cut by length).
+    """
+    max_chars = max_tokens * 4
+    sections, current, current_tokens = [], [], 0
+    for paragraph in text.split("\n"):
+        pieces = [paragraph[i:i + max_chars] for i in range(0, len(paragraph), max_chars)] or [""]
+        for piece in pieces:
+            tokens = count_tokens(piece) + 1
+            if current and current_tokens + tokens > max_tokens:
+                sections.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += tokens
+    if current:
+        sections.append("\n".join(current))
+    return [section for section in sections if section.strip()]
+
+def summarize_item_text(item_code: str, title: str, description: str, item_text: str,
+                        semaphore: Optional[threading.Semaphore] = None) -> str:
+    """
+    Summarizes one 10-K item. Items longer than `summary_section_tokens` are summarized
+    map-reduce style: the sections are summarized concurrently on threads (at most
+    `summary_map_concurrency` LLM calls at once, or as allowed by `semaphore`), then one reduce
+    call writes the item summary from the section summaries.
+
+    Calls are synchronous `invoke`s, not `ainvoke`s on a throwaway event loop: the shared
+    ChatOpenAI's async HTTP client stays bound to the loop that first used it.
+    """
+    llm = get_chat_model("gpt-4o")
+    semaphore = semaphore or threading.Semaphore(summary_map_concurrency)
+
+    def invoke(prompt: str) -> str:
+        with semaphore:
+            return llm.invoke(prompt).content
+
+    sections = split_into_sections(item_text, summary_section_tokens)
+    if len(sections) <= 1:
+        return invoke(_build_item_summary_prompt(item_code, title, description, item_text))
+
+    prompts = [
+        f"You are a financial analyst assistant. Below is part {i} of {len(sections)} of {title} ({item_code}) "
+        "of a 10-K filing. Summarize it in at most 150 words, keeping every key figure, trend and risk "
+        f"it mentions.\n\nTEXT:\n{section}"
+        for i, section in enumerate(sections, start=1)
+    ]
+    # The semaphore, not the pool size, caps concurrent calls
+    with ThreadPoolExecutor(max_workers=len(prompts)) as executor:
+        section_summaries = list(executor.map(invoke, prompts))
+    combined = "\n\n".join(f"[Part {i}]\n{summary}" for i, summary in enumerate(section_summaries, start=1))
+    return invoke(_build_item_summary_prompt(item_code, title, description, combined))
+
+T = TypeVar("T")
+
+class StageTimer:
+    """
+    Records wall time per named stage of a pipeline, for latency breakdowns.
+
+    Example:
+        timer = StageTimer("query_ar_index")
+        with timer.stage("vector_search"):
+            ...
+        embedding = await timer.atime("embed", embed_coro)
+        print(timer.report())
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.timings: Dict[str, float] = {}
+        self._start = time.perf_counter()
 
-def get_finnhub_client() -> Client:
-    api_key = os.getenv("FINNHUB_API_KEY")
-    if not api_key:
-        raise ValueError("Environment variable FINNHUB_API_KEY is not set")
-    return Client(api_key=api_key)
+    @contextmanager
+    def stage(self, stage_name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage_name] = time.perf_counter() - start
+
+    async def atime(self, stage_name: str, awaitable: Awaitable[T]) -> T:
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.timings[stage_name] = time.perf_counter() - start
+
+    def report(self) -> str:
+        stages = " ".join(f"{name}={seconds:.2f}s" for name, seconds in self.timings.items())
+        return f"⏱️ {self.name}: {stages} total={time.perf_counter() - self._start:.2f}s"
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """
+    Runs a coroutine to completion from synchronous code (e.g. a sync tool).
+    If the calling thread already runs an event loop, the coroutine is run on a separate thread.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+def emit_stream_event(event: Dict[str, Any]) -> None:
+    """
+    Sends `event` to clients streaming the graph with stream_mode="custom".
+    Does nothing when called outside a graph run (e.g. from a script).
+    """
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        return
+    writer(event)
+
+def stream_llm_text(llm, prompt, source: str) -> str:
+    """
+    Generates a completion token by token and returns its full text. Each token is sent as a
+    custom stream event {"source": source, "delta": text}; inside a graph run the tokens also
+    reach stream_mode="messages" clients, tagged with `source`.
+    """
+    parts = []
+    for chunk in llm.with_config(tags=[source]).stream(prompt):
+        if chunk.content:
+            parts.append(chunk.content)
+            emit_stream_event({"source": source, "delta": chunk.content})
+    return "".join(parts)
+
+_token_encoding = None
+_token_encoding_loaded = False
+
+def count_tokens(text: str) -> int:
+    """
+    Counts tokens with the cl100k_base encoding used by gpt-4o-era and ada-002 models.
+    If tiktoken (or its encoding file) is unavailable, estimates ~4 characters per token.
+    """
+    encoding = _get_token_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Returns the first `max_tokens` tokens of `text` (~4 characters per token without tiktoken).
+    """
+    encoding = _get_token_encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+def _get_token_encoding():
+    global _token_encoding, _token_encoding_loaded
+    if not _token_encoding_loaded:
+        try:
+            import tiktoken
+            _token_encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"⚠️ Warning: tiktoken unavailable, estimating token counts: {e}")
+        _token_encoding_loaded = True
+    return _token_encoding
 
 def set_sec_client():
     """
@@ -132,23 +291,85 @@ def get_tenk_items():
         all_items.extend(part_dict.keys())
     return all_items
 
-def format_peer_comparison_prompt(peer_data: Dict[str, Any]) -> str:
-    prompt = "Compare the following companies across:\n"
-    prompt += "- Revenue\n- Cost Structure\n- Profitability\n- Leverage\n- Stock and Valuation\n\n"
-    prompt += "Here is the raw data:\n"
+def _format_number(value: Optional[float], unit: str) -> str:
+    if value is None:
+        return ""
+    if unit == "per_share":
+        return f"{value:.2f}"
+    millions = value / 1e6
+    return f"{millions:.1f}" if abs(millions) < 10 else f"{millions:.0f}"
 
+def encode_peer_financials(peer_data: Dict[str, Any], max_periods: int = peer_table_max_periods) -> str:
+    """
+    Encodes the income statement and balance sheet of each peer as one markdown table: the
+    KEY_LINE_ITEMS only, one row per (line item, ticker) and one column per fiscal year,
+    aligned across peers with different fiscal year ends.
+    """
+    selected = {}
     for ticker, data in peer_data.items():
-        prompt += f"\n### {ticker} ###\n"
         if "error" in data:
-            prompt += f"Error: {data['error']}\n"
             continue
-        prompt += f"Income Statement: {data['income_statement']}\n"
-        prompt += f"Balance Sheet: {data['balance_sheet']}\n"
-        prompt += f"Stock Price: {data['stock_price']}\n"
-        prompt += f"Analyst Rating: {data['analyst_rating']}\n"
-        prompt += f"Earnings: {data['earnings']}\n"
+        items = {}
+        for statement_type, key in (("income", "income_statement"), ("balance_sheet", "balance_sheet")):
+            if isinstance(data.get(key), pd.DataFrame):
+                items.update(select_line_items(data[key], statement_type))
+        selected[ticker] = items
+
+    years = sorted({year for items in selected.values() for values in items.values() for year in values}, reverse=True)
+    years = years[:max_periods]
+    lines = ["| Item | Ticker | " + " | ".join(years) + " |", "|---|---|" + "---|" * len(years)]
+    for statement_items in KEY_LINE_ITEMS.values():
+        for name, unit, _concepts, _labels in statement_items:
+            for ticker, items in selected.items():
+                if name in items:
+                    cells = [_format_number(items[name].get(year), unit) for year in years]
+                    lines.append(f"| {name} | {ticker} | " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+def encode_peer_market_data(peer_data: Dict[str, Any]) -> str:
+    """
+    Encodes quote, latest analyst rating counts and recent EPS (actual/estimate) of each peer as
+    one markdown table.
+    """
+    lines = ["| Ticker | Price | Day % | Ratings SB/B/H/S/SS | EPS actual/est by quarter |", "|---|---|---|---|---|"]
+    for ticker, data in peer_data.items():
+        if "error" in data:
+            continue
+        quote = data.get("stock_price") or {}
+        ratings = (data.get("analyst_rating") or [{}])[0]
+        rating = "/".join(str(ratings[key]) for key in ("strongBuy", "buy", "hold", "sell", "strongSell")) \
+            if "strongBuy" in ratings else ""
+        if ratings.get("period"):
+            rating += f" ({ratings['period']})"
+        eps = "; ".join(
+            f"{e.get('year')}Q{e.get('quarter')} {e.get('actual')}/{e.get('estimate')}" for e in (data.get("earnings") or [])
+        )
+        lines.append(f"| {ticker} | {quote.get('c', '')} | {quote.get('dp', '')} | {rating} | {eps} |")
+    return "\n".join(lines)
+
+def _format_raw_peer_data(peer_data: Dict[str, Any]) -> str:
+    # The uncompressed payload (whole DataFrames and API responses), kept to report the savings
+    return "".join(
+        f"\n### {ticker} ###\n" + "".join(f"{key}: {value}\n" for key, value in data.items())
+        for ticker, data in peer_data.items()
+    )
+
+def format_peer_comparison_prompt(peer_data: Dict[str, Any]) -> str:
+    prompt = "Compare the following companies across:\n"
+    prompt += "- Revenue\n- Cost Structure\n- Profitability\n- Leverage\n- Stock and Valuation\n\n"
+    prompt += "Financials (USD millions except EPS; fiscal years named by the year they end in):\n"
+    prompt += encode_peer_financials(peer_data) + "\n\n"
+    prompt += "Ratios (computed from the financials above; use these rather than recomputing):\n"
+    prompt += format_ratio_table(compute_ratios(build_line_item_frame(peer_data))) + "\n\n"
+    prompt += "Market data:\n"
+    prompt += encode_peer_market_data(peer_data) + "\n"
+
+    errors = {ticker: data["error"] for ticker, data in peer_data.items() if "error" in data}
+    for ticker, error in errors.items():
+        prompt += f"\n{ticker}: data unavailable ({error})"
 
-    prompt += "\nPlease provide a concise peer comparison."
+    prompt = prompt.rstrip("\n") + "\n\nPlease provide a concise peer comparison."
+    print(f"🧾 Peer payload: {count_tokens(_format_raw_peer_data(peer_data))} tokens raw → {count_tokens(prompt)} tokens in prompt")
     return prompt
 
 def generate_item_descriptions(structure: FilingStructure) -> str:
@@ -178,7 +399,7 @@ def infer_relevant_items(query: str, item_map: dict[str, str]) -> list[str]:
         f"Format your output as InferredItemCodes(item_codes=[...])\n\n"
         f"Available Items:\n{item_list_str}"
     )
-    llm = ChatOpenAI(model="gpt-4o")
+    llm = get_chat_model("gpt-4o")
     structured_llm =llm.with_structured_output(InferredItemCodes)
     response = structured_llm.invoke(prompt)
     return response.item_codes
@@ -1,19 +1,40 @@
-from agents.core_utils import summarize_item_text, infer_relevant_items,get_tenk_items, get_tenk_item_descriptions, ensure_list, get_finnhub_client, convert_unix_to_datetime, set_sec_client
+from agents.core_utils import summarize_item_text, SUMMARY_PROMPT_VERSION, get_tenk_items, convert_unix_to_datetime, set_sec_client
 from agents.schemas import FilingItemSummary
+from agents.filing_cache import get_filing_index, get_tenk_item_texts
+from agents.xbrl_cache import get_stitched_statement
+from agents.item_router import route_relevant_items
+from agents.summary_cache import get_summary_cache
+from agents.ticker_index import get_ticker_index
+from agents.config import summary_map_concurrency, ticker_name_match_min_score
+from agents.finnhub_cache import get_quote, get_recommendation_trends, get_company_earnings
 from edgar import *
-from edgar.xbrl.stitching import XBRLS
-import requests, pandas as pd
-from typing import Literal
+from edgar.company_reports import TenK
+import requests, threading, pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Literal
 
 
+def _summarize_items(item_codes: List[str], item_texts: Dict[str, str]) -> Dict[str, str]:
+    # Items are summarized on threads, sharing one limit on concurrent LLM calls
+    semaphore = threading.Semaphore(summary_map_concurrency)
+
+    def summarize(item_code: str) -> str:
+        tenk_item = TenK.structure.get_item(item_code)
+        return summarize_item_text(item_code, tenk_item["Title"], tenk_item["Description"],
+                                   item_texts[item_code], semaphore)
+
+    with ThreadPoolExecutor(max_workers=max(1, len(item_codes))) as executor:
+        return dict(zip(item_codes, executor.map(summarize, item_codes)))
+
 def get_latest_10K_item_summary(user_query: str, ticker:str, item_codes: Optional[List[str]]=None) -> FilingItemSummary:
     """
     Generate a summarized view of the latest 10-K filing items for a given company.
 
     If no item codes are provided, the function will infer the most relevant 10-K item(s) 
-    based on the user's query using an LLM-based matching system. For each specified or 
+    based on the user's query using a local embedding router (with an LLM fallback). For each specified or 
     inferred item code, the function fetches the latest 10-K filing for the given ticker,
-    extracts the section text, and produces a concise summary using a language model.
+    extracts the section text, and produces a concise summary using a language model. Summaries
+    already made for the same filing (by an earlier call or by ingestion) are reused.
 
     Args:
         user_query (str): A natural language query describing the type of information the user is seeking.
@@ -28,9 +49,7 @@ def get_latest_10K_item_summary(user_query: str, ticker:str, item_codes: Optiona
      
     # Case 1: item_code not specified — infer it from the user_query
     if item_codes is None:
-        item_map = get_tenk_item_descriptions()
-        relevant_items = infer_relevant_items(user_query, item_map)
-        item_codes = relevant_items
+        item_codes = route_relevant_items(user_query)
     else:
         # Case 2: item_code specified — validate it
         allowed_items = get_tenk_items()
@@ -42,15 +61,21 @@ def get_latest_10K_item_summary(user_query: str, ticker:str, item_codes: Optiona
     form_type = "10-K"
     filing = get_latest_filings(ticker, form_type, n=1, as_text=False)
     filing = filing[0]
-    tenk = filing.obj()
+    # Summaries of this filing from earlier questions or from ingestion are reused
+    summary_cache = get_summary_cache()
+    summaries = summary_cache.get_many(ticker, filing, item_codes, SUMMARY_PROMPT_VERSION)
+    missing = [code for code in item_codes if code not in summaries]
+    if missing:
+        item_texts = get_tenk_item_texts(filing, missing)
+        # Missing items are summarized in parallel, sharing one limit on concurrent LLM calls
+        summaries.update(_summarize_items(missing, item_texts))
+        for item_code in missing:
+            summary_cache.put(ticker, filing, item_code, SUMMARY_PROMPT_VERSION, summaries[item_code])
+
     filing_text = f"\n\n--- Filing: {filing.filing_date} ---\n"
     for item_code in item_codes:
-        tenk_item = tenk.structure.get_item(item_code)
-        title = tenk_item["Title"]
-        description = tenk_item["Description"]
-        item_txt = str(tenk[item_code])
-        
-        summarized_item_text = summarize_item_text(item_code, title, description, item_txt)
+        title = TenK.structure.get_item(item_code)["Title"]
+        summarized_item_text = summaries[item_code]
         filing_text += f"\n === Summary of {item_code}: {title} ===\n{summarized_item_text}"
             
     return filing_text.strip()
@@ -82,23 +107,10 @@ def get_financial_statement(
     """
     set_sec_client()
 
-    c = Company(ticker)
-    filings = c.get_filings(form=form_type).latest(n)
-    filings = ensure_list(filings)
-
-    xbs = XBRLS.from_filings(filings)
-
-    # Select the statement based on the requested type
-    if statement_type == "cashflow":
-        stmt = xbs.statements.cashflow_statement()
-    elif statement_type == "balance_sheet":
-        stmt = xbs.statements.balance_sheet()
-    elif statement_type == "income":
-        stmt = xbs.statements.income_statement()
-    else:
-        raise ValueError(f"Unsupported statement type: {statement_type}")
+    filings = get_filing_index(ticker, form_type, n)
 
-    return stmt.to_dataframe()
+    # Per-filing XBRL parses and stitched statements are cached (see agents/xbrl_cache.py)
+    return get_stitched_statement(filings, statement_type)
 
 def get_latest_filings(ticker: str, form_type: Optional[str] = None, n: int = 5, as_text: bool = True) -> str:
     """
@@ -116,14 +128,8 @@ def get_latest_filings(ticker: str, form_type: Optional[str] = None, n: int = 5,
     """
     set_sec_client()
 
-    c = Company(ticker)
-    
-    if form_type:
-        filings = c.get_filings(form=form_type).latest(n)
-    else:
-        filings = c.get_filings().latest(n)
-    
-    filings = ensure_list(filings)
+    # The filing index is cached on disk and refreshed on a TTL (see agents/filing_cache.py)
+    filings = get_filing_index(ticker, form_type, n)
     if as_text:
         return "\n".join(str(f) for f in filings)
     else: 
@@ -140,8 +146,12 @@ def get_cik (name: str) -> str:
     Returns:
         str: The CIK number of the entity (e.g. 'CIK0001730168').
     """
+    entry = get_ticker_index().resolve(name)
+    if entry is not None:
+        return entry.cik_formatted
+
+    # Not in the local snapshot: resolve through Yahoo and EDGAR
     set_sec_client()
-    
     ticker = get_ticker_given_name(name)[0]['symbol']
     c = Company(ticker)    
     cik_raw = c.cik
@@ -153,7 +163,8 @@ def get_cik (name: str) -> str:
 ## Get ticker given company name 
 def get_ticker_given_name(company_name: str):
     """
-    Searches for ticker symbols that match a given company name using Yahoo Finance's search API.
+    Searches for ticker symbols that match a given company name, in the local SEC ticker snapshot
+    first and with Yahoo Finance's search API as a fallback.
     If more than one ticker is returned, get human assistance. 
     Args:
         company_name (str): The name of the company to search for (e.g., "Apple").
@@ -163,6 +174,11 @@ def get_ticker_given_name(company_name: str):
             - 'symbol': The stock ticker symbol (str)
     """
 
+    # Weak fuzzy matches (e.g. a misspelled name) are left to Yahoo's search
+    matches = get_ticker_index().search_names(company_name, limit=5, min_score=ticker_name_match_min_score)
+    if matches:
+        return [{"name": entry.name, "symbol": entry.ticker} for entry in matches]
+
     url = "https://query2.finance.yahoo.com/v1/finance/search"
     user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
     params = {"q": company_name, "quotes_count": 5, "country": "United States"}
@@ -194,8 +210,7 @@ def get_earnings(ticker: str, n: int=1):
     Example:
         get_earnings("AAPL", 2)
     """
-    finnhub_client = get_finnhub_client()
-    earnings_items = finnhub_client.company_earnings(ticker, limit=n)
+    earnings_items = get_company_earnings(ticker, limit=n)
     return earnings_items
 
 def get_analyst_rating_summary(ticker: str):
@@ -222,8 +237,7 @@ def get_analyst_rating_summary(ticker: str):
     Example:
         get_analyst_rating_summary("AAPL")
     """
-    finnhub_client = get_finnhub_client()
-    reco_items = finnhub_client.recommendation_trends(ticker)
+    reco_items = get_recommendation_trends(ticker)
     return reco_items
 
 
@@ -251,8 +265,7 @@ def get_stock_price(ticker: str):
     Example:
         get_stock_price("AAPL")
     """
-    finnhub_client = get_finnhub_client()
-    quote_item = finnhub_client.quote(ticker)
+    quote_item = get_quote(ticker)
     quote_item['t'] = convert_unix_to_datetime(quote_item['t'])
     return quote_item
  
@@ -1,25 +1,94 @@
-from typing import List, Dict, Any
+import threading, time
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeoutError
+from typing import List, Dict, Any, Callable, Optional
 from agents.data_fetch_tools import get_financial_statement, get_stock_price, get_analyst_rating_summary, get_earnings
+from agents.config import peer_data_max_workers, peer_data_source_timeouts
 
-def gather_peer_data(tickers: List[str]) -> Dict[str, Any]:
+# One entry per data source gathered for each ticker. Order matters: when several
+# sources fail for a ticker, the error of the first one in this list is reported.
+PEER_DATA_SOURCES: Dict[str, Callable[[str], Any]] = {
+    "income_statement": lambda ticker: get_financial_statement(ticker, "10-K", "income"),
+    "balance_sheet": lambda ticker: get_financial_statement(ticker, "10-K", "balance_sheet"),
+    "stock_price": lambda ticker: get_stock_price(ticker),
+    "analyst_rating": lambda ticker: get_analyst_rating_summary(ticker),
+    "earnings": lambda ticker: get_earnings(ticker, n=4),
+}
+
+class _TimedFetch:
+    """
+    Runs one (ticker, source) fetch and records when the worker actually picked it up,
+    so the per-source timeout does not count time spent queued behind other fetches.
+    """
+    def __init__(self, fetch: Callable[[str], Any], ticker: str):
+        self.fetch = fetch
+        self.ticker = ticker
+        self.started_at = None
+        self.started = threading.Event()
+
+    def __call__(self) -> Any:
+        self.started_at = time.monotonic()
+        self.started.set()
+        return self.fetch(self.ticker)
+
+def _wait_for_result(future: Future, job: _TimedFetch, timeout: float, deadline: float) -> Any:
+    # Block (without polling) until a worker picks the job up, then give it `timeout`
+    # seconds measured from its own start time, never past the overall `deadline`.
+    # A job still queued at the deadline counts as timed out.
+    if not job.started.wait(timeout=max(deadline - time.monotonic(), 0)):
+        raise FutureTimeoutError()
+    if future.done():
+        return future.result()
+    remaining = min(job.started_at + timeout, deadline) - time.monotonic()
+    return future.result(timeout=max(remaining, 0))
+
+def gather_peer_data(tickers: List[str], sources: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Fetches the financial and market data used for a peer comparison.
+
+    All (ticker, source) fetches run concurrently on a bounded thread pool
+    (`peer_data_max_workers`), each with its own timeout from `peer_data_source_timeouts`,
+    so the wall time is close to the slowest single fetch rather than the sum of all of them.
+    The whole call never takes longer than the largest of those timeouts: fetches still queued
+    by then count as timed out.
+
+    Args:
+        tickers (List[str]): Ticker symbols to gather data for.
+        sources (Optional[List[str]]): Subset of PEER_DATA_SOURCES to fetch. Defaults to all of them.
+
+    Returns:
+        Dict[str, Any]: Per-ticker dict with the requested PEER_DATA_SOURCES keys, or
+        {"error": ...} for a ticker where any source failed or timed out.
+    """
+    selected = {source: PEER_DATA_SOURCES[source] for source in (sources or PEER_DATA_SOURCES)}
     peer_data = {}
+    executor = ThreadPoolExecutor(max_workers=peer_data_max_workers, thread_name_prefix="peer-data")
+    try:
+        jobs = {}
+        deadline = time.monotonic() + max(peer_data_source_timeouts.get(source, 30) for source in selected)
+        for ticker in tickers:
+            for source, fetch in selected.items():
+                job = _TimedFetch(fetch, ticker)
+                future = executor.submit(job)
+                # Also wakes a waiter if the job is cancelled before a worker picks it up
+                future.add_done_callback(lambda _future, job=job: job.started.set())
+                jobs[(ticker, source)] = (future, job)
+
+        for ticker in tickers:
+            ticker_data = {}
+            error = None
+            for source in selected:
+                future, job = jobs[(ticker, source)]
+                timeout = peer_data_source_timeouts.get(source, 30)
+                try:
+                    ticker_data[source] = _wait_for_result(future, job, timeout, deadline)
+                except FutureTimeoutError:
+                    future.cancel()
+                    error = error or f"Timed out fetching {source} for {ticker} after {timeout}s"
+                except Exception as e:
+                    error = error or str(e)
+            peer_data[ticker] = {"error": error} if error else ticker_data
+    finally:
+        # Don't block the caller on fetches that already timed out; they finish in the background.
+        executor.shutdown(wait=False, cancel_futures=True)
 
-    for ticker in tickers:
-        try:
-            income = get_financial_statement(ticker, "10-K", "income")
-            balance = get_financial_statement(ticker, "10-K", "balance_sheet")
-            price = get_stock_price(ticker)
-            rating = get_analyst_rating_summary(ticker)
-            earnings = get_earnings(ticker, n=4)
-
-            peer_data[ticker] = {
-                "income_statement": income,
-                "balance_sheet": balance,
-                "stock_price": price,
-                "analyst_rating": rating,
-                "earnings": earnings
-            }
-        except Exception as e:
-            peer_data[ticker] = {"error": str(e)}
-
-    return peer_data
\ No newline at end of file
+    return peer_data
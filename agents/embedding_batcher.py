@@ -0,0 +1,172 @@
+import asyncio, random
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Set
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError
+from agents.core_utils import count_tokens
+from agents.config import (
+    embedding_batch_max_tokens, embedding_batch_max_inputs, embedding_max_input_tokens,
+    embedding_batch_max_wait_seconds, embedding_batch_concurrency, embedding_max_retries,
+    embedding_retry_max_delay_seconds
+)
+
+class _Request:
+    """
+    One aembed_documents call: its results fill in as the batches carrying its texts complete.
+    """
+    def __init__(self, size: int, future: asyncio.Future):
+        self.vectors: List[Optional[List[float]]] = [None] * size
+        self.remaining = size
+        self.future = future
+
+    def set_vector(self, index: int, vector: List[float]) -> None:
+        self.vectors[index] = vector
+        self.remaining -= 1
+        if self.remaining == 0 and not self.future.done():
+            self.future.set_result(self.vectors)
+
+    def fail(self, error: Exception) -> None:
+        if not self.future.done():
+            self.future.set_exception(error)
+
+@dataclass
+class _Piece:
+    request: _Request
+    index: int
+    text: str
+    tokens: int
+
+class EmbeddingBatcher:
+    """
+    Packs texts from many concurrent `aembed_documents` calls into embeddings requests that are
+    as large as the model's token and input limits allow.
+
+    Small calls (e.g. a short ITEM 1B) are merged with others, large ones (ITEM 7) are split
+    across requests, and each caller gets its vectors back in its own order. At most
+    `concurrency` requests are in flight; 429, 5xx and connection errors are retried with
+    jittered exponential backoff. Use one batcher per event loop (e.g. per ingestion run).
+    """
+    def __init__(
+        self,
+        model: str,
+        max_tokens: int = embedding_batch_max_tokens,
+        max_inputs: int = embedding_batch_max_inputs,
+        max_wait_seconds: float = embedding_batch_max_wait_seconds,
+        concurrency: int = embedding_batch_concurrency,
+        max_retries: int = embedding_max_retries,
+        client: Optional[AsyncOpenAI] = None,
+    ):
+        self.model = model
+        self.max_tokens = max_tokens
+        self.max_inputs = max_inputs
+        self.max_wait_seconds = max_wait_seconds
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.stats = {"requests": 0, "inputs": 0, "tokens": 0, "retries": 0}
+        self._client = client
+        self._queue: Deque[_Piece] = deque()
+        self._queued_tokens = 0
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+    def _get_client(self) -> AsyncOpenAI:
+        if self._client is None:
+            # Retries are handled here, with backoff shared across the whole batch
+            self._client = AsyncOpenAI(max_retries=0)
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        if self._batch_ready is None:
+            self._batch_ready = asyncio.Event()
+            self._slots = asyncio.Semaphore(self.concurrency)
+
+        # Validate every text before queueing any, so a rejected call leaves nothing behind
+        token_counts = [count_tokens(text) for text in texts]
+        for tokens in token_counts:
+            if tokens > embedding_max_input_tokens:
+                raise ValueError(f"Text of {tokens} tokens exceeds the {embedding_max_input_tokens}-token embedding input limit")
+
+        request = _Request(len(texts), asyncio.get_running_loop().create_future())
+        for index, (text, tokens) in enumerate(zip(texts, token_counts)):
+            self._queue.append(_Piece(request, index, text, tokens))
+            self._queued_tokens += tokens
+
+        if self._queued_tokens >= self.max_tokens or len(self._queue) >= self.max_inputs:
+            self._batch_ready.set()
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+        return await request.future
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+    def _next_batch(self) -> List[_Piece]:
+        batch, tokens = [], 0
+        while self._queue and len(batch) < self.max_inputs:
+            piece = self._queue[0]
+            if batch and tokens + piece.tokens > self.max_tokens:
+                break
+            self._queue.popleft()
+            batch.append(piece)
+            tokens += piece.tokens
+        self._queued_tokens -= tokens
+        return batch
+
+    async def _flush_loop(self) -> None:
+        while self._queue:
+            # Give other callers a moment to add texts unless a full batch is already waiting
+            if self._queued_tokens < self.max_tokens and len(self._queue) < self.max_inputs:
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self.max_wait_seconds)
+                except asyncio.TimeoutError:
+                    pass
+            self._batch_ready.clear()
+
+            await self._slots.acquire()
+            batch = self._next_batch()
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._run_batch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _run_batch(self, batch: List[_Piece]) -> None:
+        try:
+            vectors = await self._embed_with_retry([piece.text for piece in batch])
+            for piece, vector in zip(batch, vectors):
+                piece.request.set_vector(piece.index, vector)
+            self.stats["requests"] += 1
+            self.stats["inputs"] += len(batch)
+            self.stats["tokens"] += sum(piece.tokens for piece in batch)
+        except Exception as e:
+            for piece in batch:
+                piece.request.fail(e)
+        finally:
+            self._slots.release()
+
+    async def _embed_with_retry(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._get_client().embeddings.create(input=texts, model=self.model)
+                return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+            except (APIConnectionError, APIStatusError) as e:
+                retryable = isinstance(e, APIConnectionError) or e.status_code == 429 or e.status_code >= 500
+                if not retryable or attempt == self.max_retries:
+                    raise
+                # Full jitter: spread retries of concurrent batches over the backoff window
+                delay = random.uniform(0, min(embedding_retry_max_delay_seconds, 2 ** attempt))
+                self.stats["retries"] += 1
+                print(f"⚠️ Warning: Embedding request failed ({e.__class__.__name__}), retry {attempt + 1} in {delay:.1f}s")
+                await asyncio.sleep(delay)
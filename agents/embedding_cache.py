@@ -0,0 +1,130 @@
+import asyncio, hashlib, os, sqlite3, threading
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from agents.clients import get_embeddings_model
+from agents.config import embedding_model, embedding_cache_path
+
+_SQLITE_MAX_PARAMS = 500
+
+def text_hash(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+class EmbeddingCache:
+    """
+    Persistent embedding store keyed by (model, sha256(text)).
+
+    Vectors are kept as float32 blobs in SQLite (WAL mode, one connection per thread), so
+    identical strings — repeated questions, boilerplate shared by successive 10-Ks — are only
+    ever embedded once per model.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL, text_hash BLOB NOT NULL, vector BLOB NOT NULL,"
+                " PRIMARY KEY (model, text_hash)) WITHOUT ROWID"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, model: str, hashes: Sequence[bytes]) -> Dict[bytes, List[float]]:
+        found = {}
+        conn = self._connection()
+        unique = list(dict.fromkeys(hashes))
+        for start in range(0, len(unique), _SQLITE_MAX_PARAMS):
+            batch = unique[start:start + _SQLITE_MAX_PARAMS]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                [model, *batch],
+            )
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, model: str, hashes: Sequence[bytes], vectors: Sequence[Sequence[float]]) -> None:
+        rows = [(model, key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in zip(hashes, vectors)]
+        with self._connection() as conn:
+            conn.executemany("INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)", rows)
+
+class CachedEmbedder:
+    """
+    Drop-in for OpenAIEmbeddings.embed_documents / embed_query (and their async versions) that
+    checks the EmbeddingCache first and sends only the distinct misses to the API, in one batch.
+    """
+    def __init__(self, model: str, cache: EmbeddingCache, embeddings=None):
+        self.model = model
+        self.cache = cache
+        self.embeddings = embeddings or get_embeddings_model(model)
+        self.stats = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def _lookup(self, texts: Sequence[str]):
+        hashes = [text_hash(text) for text in texts]
+        found = self.cache.get_many(self.model, hashes)
+        # Distinct texts still to embed, in first-seen order
+        misses = {}
+        for text, key in zip(texts, hashes):
+            if key not in found and key not in misses:
+                misses[key] = text
+        with self._lock:
+            self.stats["hits"] += len(texts) - sum(1 for key in hashes if key not in found)
+            self.stats["misses"] += len(misses)
+        return hashes, found, misses
+
+    def _store(self, found: Dict[bytes, List[float]], misses: Dict[bytes, str], vectors: List[List[float]]) -> None:
+        self.cache.put_many(self.model, list(misses.keys()), vectors)
+        found.update(zip(misses.keys(), vectors))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes, found, misses = self._lookup(texts)
+        if misses:
+            self._store(found, misses, self.embeddings.embed_documents(list(misses.values())))
+        return [found[key] for key in hashes]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes, found, misses = await asyncio.to_thread(self._lookup, texts)
+        if misses:
+            vectors = await self.embeddings.aembed_documents(list(misses.values()))
+            await asyncio.to_thread(self._store, found, misses, vectors)
+        return [found[key] for key in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+_embedders: Dict[str, CachedEmbedder] = {}
+_cache: Optional[EmbeddingCache] = None
+_lock = threading.Lock()
+
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Returns the process-wide EmbeddingCache at `embedding_cache_path`.
+    """
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = EmbeddingCache(embedding_cache_path)
+        return _cache
+
+def get_cached_embedder(model: str = embedding_model) -> CachedEmbedder:
+    """
+    Returns the process-wide cached embedder for `model`, backed by `embedding_cache_path`.
+    """
+    cache = get_embedding_cache()
+    with _lock:
+        if model not in _embedders:
+            _embedders[model] = CachedEmbedder(model, cache)
+        return _embedders[model]
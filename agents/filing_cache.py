@@ -0,0 +1,215 @@
+import json, os, re, tempfile, threading, time
+from datetime import date
+from typing import Dict, List, Optional
+from edgar import Company
+from edgar.entity.filings import EntityFiling
+from edgar.files.htmltools import ChunkedDocument
+from agents.core_utils import ensure_list
+from agents.config import filing_cache_dir, filing_cache_max_bytes, filing_index_ttl_seconds
+
+# Filing documents never change once published, so documents and parsed items are cached
+# forever (subject to LRU eviction). Only the per-company filing index can go stale.
+_INDEX_DIR = "index"
+_DOCUMENT_DIR = "documents"
+_ITEM_DIR = "items"
+
+_FILING_FIELDS = [
+    "cik", "company", "form", "filing_date", "report_date", "acceptance_datetime", "accession_no",
+    "file_number", "items", "size", "primary_document", "primary_doc_description", "is_xbrl", "is_inline_xbrl",
+]
+
+_eviction_lock = threading.Lock()
+# Running size of documents and parsed items, so writes don't rescan the cache directory.
+# Taken from one scan on first use; eviction rescans and resyncs it (other processes may share the cache).
+_cache_bytes: Optional[int] = None
+# Eviction frees down to this fraction of the limit, so a full cache isn't rescanned on every write
+_EVICT_TO_FRACTION = 0.9
+
+def _path(*parts: str) -> str:
+    return os.path.join(filing_cache_dir, *parts)
+
+def _safe_name(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", value)
+
+def _read_file(path: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+    except (FileNotFoundError, OSError):
+        return None
+    # Mark as recently used for the LRU eviction
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return content
+
+def _write_file(path: str, content: str) -> None:
+    # Write to a temp file and rename, so concurrent readers never see a partial file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _scan_cached_files() -> List[tuple]:
+    entries = []
+    for sub_dir in (_DOCUMENT_DIR, _ITEM_DIR):
+        try:
+            with os.scandir(_path(sub_dir)) as it:
+                for entry in it:
+                    if entry.is_file() and not entry.name.endswith(".tmp"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            continue
+    return entries
+
+def evict_lru(max_bytes: int = filing_cache_max_bytes) -> int:
+    """
+    Removes least recently used documents and parsed items until the cache fits in `max_bytes`.
+
+    Returns:
+        int: Number of bytes freed.
+    """
+    global _cache_bytes
+    with _eviction_lock:
+        entries = _scan_cached_files()
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for _, size, path in sorted(entries):
+            if total - freed <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                freed += size
+            except FileNotFoundError:
+                pass
+        _cache_bytes = total - freed
+        return freed
+
+def _write_cached_file(path: str, content: str) -> None:
+    """
+    Writes a document or parsed items file and evicts only if the cache is now over its size limit.
+    """
+    global _cache_bytes
+    try:
+        old_size = os.path.getsize(path)
+    except OSError:
+        old_size = 0
+    _write_file(path, content)
+    with _eviction_lock:
+        if _cache_bytes is None:
+            _cache_bytes = sum(size for _, size, _ in _scan_cached_files())
+        else:
+            _cache_bytes += os.path.getsize(path) - old_size
+        over_limit = _cache_bytes > filing_cache_max_bytes
+    if over_limit:
+        evict_lru(int(filing_cache_max_bytes * _EVICT_TO_FRACTION))
+
+def _filing_to_dict(filing) -> Dict:
+    return {field: (str(getattr(filing, field)) if isinstance(getattr(filing, field, None), date) else getattr(filing, field, None))
+            for field in _FILING_FIELDS}
+
+def _filing_from_dict(data: Dict) -> EntityFiling:
+    data = dict(data)
+    try:
+        data["filing_date"] = date.fromisoformat(data["filing_date"])
+    except (TypeError, ValueError):
+        pass
+    return EntityFiling(**data)
+
+def get_filing_index(ticker: str, form_type: Optional[str] = None, n: int = 5) -> List[EntityFiling]:
+    """
+    Returns the latest `n` filings for a ticker, most recent first.
+
+    The filing index is served from disk and only refreshed from EDGAR when it is older than
+    `filing_index_ttl_seconds` or holds fewer filings than requested. If that refresh fails, the
+    cached index is served anyway.
+
+    Args:
+        ticker (str): The stock ticker (e.g., "AAPL").
+        form_type (Optional[str]): Form to filter by (e.g., "10-K"). If None, all forms are used.
+        n (int): Number of filings to return.
+
+    Returns:
+        List[EntityFiling]: The latest filings.
+    """
+    index_path = _path(_INDEX_DIR, f"{_safe_name(ticker.upper())}__{_safe_name(form_type or 'ALL')}.json")
+    cached = _read_file(index_path)
+    stale = None
+    if cached:
+        try:
+            index = json.loads(cached)
+            fresh = time.time() - index["fetched_at"] < filing_index_ttl_seconds
+            # A short index is enough if EDGAR had no more filings when it was fetched
+            enough = len(index["filings"]) >= n or index["requested"] > len(index["filings"])
+            stale = [_filing_from_dict(f) for f in index["filings"][:n]]
+            if fresh and enough:
+                return stale
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"⚠️ Warning: Ignoring unreadable filing index {index_path}: {e}")
+
+    try:
+        c = Company(ticker)
+        filings = c.get_filings(form=form_type) if form_type else c.get_filings()
+        latest = ensure_list(filings.latest(n))
+    except Exception as e:
+        if not stale:
+            raise
+        # EDGAR down or throttling: an outdated index beats no answer
+        print(f"⚠️ Warning: Could not refresh the filing index of {ticker}, serving the cached one: {e}")
+        return stale
+
+    index = {"fetched_at": time.time(), "requested": n, "filings": [_filing_to_dict(f) for f in latest]}
+    _write_file(index_path, json.dumps(index))
+    return latest
+
+def get_filing_html(filing) -> Optional[str]:
+    """
+    Returns the primary HTML document of a filing, downloading it only on a cache miss.
+    """
+    doc_path = _path(_DOCUMENT_DIR, f"{_safe_name(filing.accession_no)}.html")
+    html = _read_file(doc_path)
+    if html is not None:
+        return html
+
+    html = filing.html()
+    if html:
+        _write_cached_file(doc_path, html)
+    return html
+
+def get_tenk_item_texts(filing, item_codes: List[str]) -> Dict[str, str]:
+    """
+    Returns the text of the requested 10-K items, keyed by item code.
+
+    Items are cached per accession number, so a repeat lookup costs one disk read. On a miss the
+    cached (or freshly downloaded) document is parsed once for all missing items.
+
+    Args:
+        filing: The 10-K filing (edgar Filing object).
+        item_codes (List[str]): Item codes like ["ITEM 1A", "ITEM 7"].
+
+    Returns:
+        Dict[str, str]: Item code → item text (as `str(tenk[item_code])` would return it).
+    """
+    items_path = _path(_ITEM_DIR, f"{_safe_name(filing.accession_no)}.json")
+    cached = _read_file(items_path)
+    items = json.loads(cached) if cached else {}
+
+    missing = [code for code in item_codes if code not in items]
+    if missing:
+        html = get_filing_html(filing)
+        if html is None:
+            raise ValueError(f"No HTML document found for filing {filing.accession_no}")
+        document = ChunkedDocument(html)
+        for code in missing:
+            items[code] = str(document[code])
+        _write_cached_file(items_path, json.dumps(items))
+
+    return {code: items[code] for code in item_codes}
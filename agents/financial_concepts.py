@@ -0,0 +1,92 @@
+import re
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+
+# Key line items per statement type, in output order: (name, unit, XBRL concepts, labels).
+# A stitched statement row matches on its concept (namespace prefix ignored) first, then on its
+# standardized label, so filers using different concepts for the same item still line up.
+KEY_LINE_ITEMS: Dict[str, List[Tuple[str, str, List[str], List[str]]]] = {
+    "income": [
+        ("Revenue", "usd", ["Revenues", "RevenueFromContractWithCustomerExcludingAssessedTax", "SalesRevenueNet"],
+         ["Revenue", "Revenues", "Total Revenue", "Net Sales"]),
+        ("Cost of Revenue", "usd", ["CostOfRevenue", "CostOfGoodsAndServicesSold", "CostOfGoodsSold"],
+         ["Cost of Revenue", "Cost of Goods Sold", "Cost of Sales"]),
+        ("Gross Profit", "usd", ["GrossProfit"], ["Gross Profit"]),
+        ("R&D", "usd", ["ResearchAndDevelopmentExpense"], ["Research and Development Expense", "Research and Development"]),
+        ("SG&A", "usd", ["SellingGeneralAndAdministrativeExpense"],
+         ["Selling, General and Administrative Expense", "Selling, General and Administrative"]),
+        ("Operating Income", "usd", ["OperatingIncomeLoss"], ["Operating Income", "Operating Income (Loss)"]),
+        ("Interest Expense", "usd", ["InterestExpense", "InterestExpenseNonoperating"], ["Interest Expense"]),
+        ("Net Income", "usd", ["NetIncomeLoss", "ProfitLoss"], ["Net Income", "Net Income (Loss)"]),
+        ("Diluted EPS", "per_share", ["EarningsPerShareDiluted"], ["Earnings Per Share (Diluted)", "Diluted"]),
+    ],
+    "balance_sheet": [
+        ("Cash", "usd", ["CashAndCashEquivalentsAtCarryingValue"], ["Cash and Cash Equivalents"]),
+        ("Current Assets", "usd", ["AssetsCurrent"], ["Total Current Assets"]),
+        ("Total Assets", "usd", ["Assets"], ["Total Assets"]),
+        ("Current Liabilities", "usd", ["LiabilitiesCurrent"], ["Total Current Liabilities"]),
+        ("Long-Term Debt", "usd", ["LongTermDebtNoncurrent", "LongTermDebt"], ["Long-Term Debt", "Long-Term Debt, Noncurrent"]),
+        ("Total Liabilities", "usd", ["Liabilities"], ["Total Liabilities"]),
+        ("Total Equity", "usd", ["StockholdersEquity", "StockholdersEquityIncludingPortionAttributableToNoncontrollingInterest"],
+         ["Total Stockholders' Equity", "Total Equity", "Stockholders' Equity"]),
+    ],
+}
+
+_PERIOD_COLUMN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+def _concept_name(concept: str) -> str:
+    # "us-gaap_Revenues" / "us-gaap:Revenues" -> "Revenues"
+    return re.split(r"[_:]", str(concept), maxsplit=1)[-1]
+
+def fiscal_year_columns(df: pd.DataFrame) -> Dict[str, str]:
+    """
+    Maps the period columns of a stitched statement (period end dates) to fiscal year labels,
+    named after the year the period ends in, e.g. 2024-08-29 -> "FY2024". When two columns fall
+    in the same year the later one wins.
+    """
+    columns = {}
+    for column in sorted((c for c in df.columns if _PERIOD_COLUMN.match(str(c))), reverse=True):
+        columns.setdefault(f"FY{str(column)[:4]}", column)
+    return {column: label for label, column in columns.items()}
+
+def select_line_items(df: pd.DataFrame, statement_type: str) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Picks the KEY_LINE_ITEMS of `statement_type` out of a stitched statement DataFrame
+    (as returned by get_financial_statement).
+
+    Returns:
+        Dict[str, Dict[str, Optional[float]]]: Line item name -> fiscal year label -> value.
+            Items the filer doesn't report are left out.
+    """
+    periods = fiscal_year_columns(df)
+    concepts = [_concept_name(concept) for concept in df.get("concept", pd.Series(index=df.index, dtype=object))]
+    labels = [str(label).strip().lower() for label in df.get("label", pd.Series(index=df.index, dtype=object))]
+
+    selected = {}
+    for name, _unit, item_concepts, item_labels in KEY_LINE_ITEMS[statement_type]:
+        wanted_labels = {label.lower() for label in item_labels}
+        rows = [i for i, concept in enumerate(concepts) if concept in item_concepts] or \
+               [i for i, label in enumerate(labels) if label in wanted_labels]
+        for i in rows:
+            row = df.iloc[i]
+            values = {label: _to_number(row[column]) for column, label in periods.items()}
+            if any(value is not None for value in values.values()):
+                selected[name] = values
+                break
+    return selected
+
+def line_item_unit(name: str) -> str:
+    for items in KEY_LINE_ITEMS.values():
+        for item_name, unit, _concepts, _labels in items:
+            if item_name == name:
+                return unit
+    raise KeyError(name)
+
+def _to_number(value) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if pd.isna(number) else number
@@ -0,0 +1,128 @@
+import copy, random, threading, time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+from finnhub.exceptions import FinnhubAPIException
+from agents.core_utils import get_finnhub_client
+from agents.config import (
+    finnhub_rate_limit_per_second, finnhub_rate_limit_burst, finnhub_ttl_seconds,
+    finnhub_earnings_fallback_ttl_seconds
+)
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `acquire` blocks until a token is available, so callers
+    queue up behind the rate limit instead of failing.
+    """
+    def __init__(self, rate_per_second: float, capacity: int):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+# Process-wide limiter shared by every Finnhub call
+rate_limiter = TokenBucket(finnhub_rate_limit_per_second, finnhub_rate_limit_burst)
+
+_MAX_RATE_LIMIT_RETRIES = 3
+
+_cache: Dict[Tuple, Tuple[float, Any]] = {}
+_cache_lock = threading.Lock()
+
+def _call(fetch: Callable[[], Any]) -> Any:
+    # Waits for the rate limiter; if Finnhub still answers 429 (e.g. another process shares
+    # the API key), back off with jitter and queue again rather than failing the tool call.
+    for attempt in range(_MAX_RATE_LIMIT_RETRIES + 1):
+        rate_limiter.acquire()
+        try:
+            return fetch()
+        except FinnhubAPIException as e:
+            if e.status_code != 429 or attempt == _MAX_RATE_LIMIT_RETRIES:
+                raise
+            time.sleep((2 ** attempt) + random.uniform(0, 1))
+
+def _cached(key: Tuple, fetch: Callable[[], Any], ttl: Callable[[Any], float]) -> Any:
+    now = time.time()
+    with _cache_lock:
+        entry = _cache.get(key)
+    if entry and entry[0] > now:
+        return copy.deepcopy(entry[1])
+
+    value = _call(fetch)
+    expires_at = time.time() + ttl(value)
+    with _cache_lock:
+        _cache[key] = (expires_at, value)
+    # Callers get their own copy, so mutating a result never corrupts the cache
+    return copy.deepcopy(value)
+
+def get_quote(ticker: str) -> Dict:
+    """
+    Cached `Client.quote`. Quotes are served from cache for a few seconds.
+    """
+    client = get_finnhub_client()
+    return _cached(("quote", ticker.upper()), lambda: client.quote(ticker),
+                   lambda _: finnhub_ttl_seconds["quote"])
+
+def get_recommendation_trends(ticker: str) -> list:
+    """
+    Cached `Client.recommendation_trends`. Analyst ratings change at most a few times a day.
+    """
+    client = get_finnhub_client()
+    return _cached(("recommendation_trends", ticker.upper()), lambda: client.recommendation_trends(ticker),
+                   lambda _: finnhub_ttl_seconds["recommendation_trends"])
+
+def get_next_report_date(ticker: str) -> Optional[date]:
+    """
+    Returns the next scheduled earnings report date for a ticker, if Finnhub knows one.
+    """
+    client = get_finnhub_client()
+    today = datetime.now(timezone.utc).date()
+
+    def fetch():
+        return client.earnings_calendar(_from=today.isoformat(), to=(today + timedelta(days=120)).isoformat(),
+                                        symbol=ticker)
+
+    calendar = _cached(("earnings_calendar", ticker.upper(), today.isoformat()), fetch,
+                       lambda _: finnhub_ttl_seconds["earnings_calendar"])
+    dates = sorted(entry["date"] for entry in (calendar or {}).get("earningsCalendar", []) if entry.get("date"))
+    return date.fromisoformat(dates[0]) if dates else None
+
+def _seconds_until_next_report(ticker: str) -> float:
+    try:
+        next_report = get_next_report_date(ticker)
+    except Exception as e:
+        print(f"⚠️ Warning: Could not fetch earnings calendar for {ticker}: {e}")
+        next_report = None
+    if next_report is None:
+        return finnhub_earnings_fallback_ttl_seconds
+    expires_at = datetime.combine(next_report, datetime.min.time(), tzinfo=timezone.utc)
+    remaining = (expires_at - datetime.now(timezone.utc)).total_seconds()
+    # On the report day itself keep refreshing until the new numbers show up
+    return max(remaining, finnhub_earnings_fallback_ttl_seconds)
+
+def get_company_earnings(ticker: str, limit: int) -> list:
+    """
+    Cached `Client.company_earnings`. Reported earnings only change on the next report date,
+    so they are cached until then.
+    """
+    client = get_finnhub_client()
+    return _cached(("company_earnings", ticker.upper(), limit), lambda: client.company_earnings(ticker, limit=limit),
+                   lambda _: _seconds_until_next_report(ticker))
+
+def clear_finnhub_cache() -> None:
+    """
+    Drops all cached Finnhub responses.
+    """
+    with _cache_lock:
+        _cache.clear()
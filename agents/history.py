@@ -0,0 +1,97 @@
+import json
+from typing import List
+from langchain_core.messages import BaseMessage, HumanMessage, RemoveMessage, SystemMessage, ToolMessage, get_buffer_string
+from langgraph.constants import TAG_NOSTREAM
+from langgraph.graph import MessagesState
+from agents.clients import get_chat_model
+from agents.core_utils import count_tokens, truncate_to_tokens
+from agents.config import (
+    history_token_budget, history_keep_turns, history_tool_output_tokens, history_summary_model,
+    history_summary_max_words
+)
+
+class AgentState(MessagesState):
+    summary: str  # rolling summary of the turns compacted out of `messages`
+
+def message_tokens(message: BaseMessage) -> int:
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content, default=str)
+    tokens = count_tokens(content) + 4  # role and message framing
+    for call in getattr(message, "tool_calls", None) or []:
+        tokens += count_tokens(call["name"]) + count_tokens(json.dumps(call["args"], default=str))
+    return tokens
+
+def _truncate_tool_output(message: ToolMessage, max_tokens: int) -> ToolMessage:
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content, default=str)
+    original_tokens = count_tokens(content)
+    note = (f"\n… [output truncated to ~{max_tokens} of {original_tokens} tokens; "
+            "call the tool again for the full result]")
+    # Same id and tool_call_id: add_messages replaces the stored message in place. The marker
+    # keeps later passes from cutting the message again.
+    additional_kwargs = {**message.additional_kwargs, "truncated_from": original_tokens}
+    return message.model_copy(update={"content": truncate_to_tokens(content, max_tokens) + note,
+                                      "additional_kwargs": additional_kwargs})
+
+def _turn_starts(messages: List[BaseMessage]) -> List[int]:
+    return [i for i, message in enumerate(messages) if isinstance(message, HumanMessage)]
+
+async def _summarize(summary: str, messages: List[BaseMessage]) -> str:
+    llm = get_chat_model(history_summary_model, temperature=0).with_config(tags=[TAG_NOSTREAM])
+    previous = f"Summary so far:\n{summary}\n\n" if summary else ""
+    prompt = (
+        "You maintain the running summary of a conversation between a Relationship Manager and a financial "
+        f"analyst assistant. {previous}Extend the summary with the messages below. Keep companies, tickers, "
+        "peers, filing dates, key figures, conclusions and open questions; drop pleasantries and raw tables. "
+        f"Answer with the updated summary only, at most {history_summary_max_words} words.\n\n"
+        f"Messages:\n{get_buffer_string(messages)}"
+    )
+    return (await llm.ainvoke(prompt)).content
+
+async def compact_history(state: AgentState) -> dict:
+    """
+    Keeps the prompt of the next chatbot call within history_token_budget.
+
+    Tool outputs of earlier turns are cut to history_tool_output_tokens (the current turn is left
+    alone, the chatbot is still working with it). If the history is still over budget, the oldest
+    turns are folded into the rolling `summary` and removed, up to the last history_keep_turns
+    turns which stay verbatim. Turns are only cut at user messages, so an AI tool call is never
+    separated from its tool results.
+    """
+    messages = state["messages"]
+    summary = state.get("summary", "")
+    starts = _turn_starts(messages)
+    if not starts:
+        return {}
+
+    compacted = list(messages)
+    replaced = {}
+    for i in range(starts[-1]):
+        message = messages[i]
+        if (isinstance(message, ToolMessage) and "truncated_from" not in message.additional_kwargs
+                and message_tokens(message) > history_tool_output_tokens):
+            compacted[i] = replaced[i] = _truncate_tool_output(message, history_tool_output_tokens)
+
+    tokens = [message_tokens(message) for message in compacted]
+    summary_tokens = count_tokens(summary)
+    keep_from = starts[-history_keep_turns] if len(starts) >= history_keep_turns else starts[0]
+    cut = 0
+    for start in starts:
+        if start > keep_from or summary_tokens + sum(tokens[cut:]) <= history_token_budget:
+            break
+        cut = start
+
+    update = {"messages": [message for i, message in replaced.items() if i >= cut]}
+    if cut:
+        update["summary"] = await _summarize(summary, compacted[:cut])
+        update["messages"] += [RemoveMessage(id=message.id) for message in messages[:cut]]
+        print(f"🗜️ History: folded {cut} messages into the summary, "
+              f"{sum(tokens[cut:])} tokens of messages kept")
+    return update
+
+def with_summary(state: AgentState) -> List[BaseMessage]:
+    """
+    The messages to send to the chatbot LLM: the rolling summary (if any) first, then the history.
+    """
+    summary = state.get("summary")
+    if not summary:
+        return state["messages"]
+    return [SystemMessage(content=f"Summary of the earlier conversation:\n{summary}")] + state["messages"]
@@ -0,0 +1,160 @@
+import hashlib, json, os, re, threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from agents.embedding_cache import get_cached_embedder
+from agents.core_utils import get_tenk_item_descriptions, infer_relevant_items
+from agents.config import (
+    item_router_embedding_model, item_router_cache_path, item_router_min_similarity, item_router_margin,
+    item_router_max_items, item_router_memo_size
+)
+
+class ItemRouter:
+    """
+    Maps a question to the relevant 10-K item codes without an LLM call.
+
+    The item descriptions are embedded once (and persisted to `cache_path`), a question is routed
+    to the items whose descriptions are nearest by cosine similarity, and recent questions are
+    memoized. When the best match is below `min_similarity` the router is not confident and falls
+    back to the LLM (`infer_relevant_items`).
+    """
+    def __init__(
+        self,
+        item_map: Dict[str, str],
+        embed_documents: Callable[[List[str]], List[List[float]]],
+        embed_query: Callable[[str], List[float]],
+        model: str,
+        cache_path: Optional[str] = None,
+        min_similarity: float = item_router_min_similarity,
+        margin: float = item_router_margin,
+        max_items: int = item_router_max_items,
+        memo_size: int = item_router_memo_size,
+    ):
+        self.item_map = item_map
+        self.embed_documents = embed_documents
+        self.embed_query = embed_query
+        self.model = model
+        self.cache_path = cache_path
+        self.min_similarity = min_similarity
+        self.margin = margin
+        self.max_items = max_items
+        self.memo_size = memo_size
+        self.stats = {"memo_hits": 0, "local_routes": 0, "llm_fallbacks": 0}
+        self._codes = list(item_map.keys())
+        self._matrix: Optional[np.ndarray] = None
+        self._memo: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _fingerprint(self) -> str:
+        payload = json.dumps([self.model, sorted(self.item_map.items())])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _item_matrix(self) -> np.ndarray:
+        if self._matrix is not None:
+            return self._matrix
+        with self._lock:
+            if self._matrix is not None:
+                return self._matrix
+            fingerprint = self._fingerprint()
+            vectors = None
+            if self.cache_path and os.path.exists(self.cache_path):
+                try:
+                    with open(self.cache_path, "r", encoding="utf-8") as f:
+                        cached = json.load(f)
+                    if cached.get("fingerprint") == fingerprint:
+                        vectors = cached["vectors"]
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"⚠️ Warning: Ignoring unreadable item router cache {self.cache_path}: {e}")
+            if vectors is None:
+                vectors = self.embed_documents([self.item_map[code] for code in self._codes])
+                if self.cache_path:
+                    os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+                    with open(self.cache_path, "w", encoding="utf-8") as f:
+                        json.dump({"fingerprint": fingerprint, "vectors": vectors}, f)
+            matrix = np.asarray(vectors, dtype=np.float32)
+            self._matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+        return self._matrix
+
+    @staticmethod
+    def _memo_key(query: str) -> str:
+        return re.sub(r"\s+", " ", query.strip().lower())
+
+    def _remember(self, key: str, items: List[str]) -> None:
+        with self._lock:
+            self._memo[key] = items
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+    def route(self, query: str, query_embedding: Optional[List[float]] = None) -> List[str]:
+        """
+        Returns the item codes relevant to `query`.
+
+        Args:
+            query (str): The user question.
+            query_embedding (Optional[List[float]]): Embedding of `query` with the router's model,
+                if the caller already has one. Otherwise the query is embedded here.
+
+        Returns:
+            List[str]: Relevant item codes, best match first.
+        """
+        key = self._memo_key(query)
+        with self._lock:
+            memoized = self._memo.get(key)
+            if memoized is not None:
+                self._memo.move_to_end(key)
+                self.stats["memo_hits"] += 1
+                return list(memoized)
+
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
+        vector = np.asarray(query_embedding, dtype=np.float32)
+        similarities = self._item_matrix() @ (vector / np.linalg.norm(vector))
+        best = float(similarities.max())
+
+        if best >= self.min_similarity:
+            ranked = np.argsort(-similarities)[:self.max_items]
+            items = [self._codes[i] for i in ranked if similarities[i] >= best - self.margin]
+            with self._lock:
+                self.stats["local_routes"] += 1
+        else:
+            items = infer_relevant_items(query, self.item_map)
+            with self._lock:
+                self.stats["llm_fallbacks"] += 1
+
+        self._remember(key, items)
+        return list(items)
+
+_router: Optional[ItemRouter] = None
+_router_lock = threading.Lock()
+
+def get_item_router() -> ItemRouter:
+    """
+    Returns the process-wide router over the 10-K item descriptions.
+    """
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                embedder = get_cached_embedder(item_router_embedding_model)
+                _router = ItemRouter(
+                    get_tenk_item_descriptions(),
+                    embed_documents=embedder.embed_documents,
+                    embed_query=embedder.embed_query,
+                    model=item_router_embedding_model,
+                    cache_path=item_router_cache_path,
+                )
+    return _router
+
+def route_relevant_items(query: str, query_embedding: Optional[List[float]] = None) -> List[str]:
+    """
+    Infers the 10-K item codes relevant to a question, locally when confident and with the
+    LLM otherwise. See ItemRouter.
+    """
+    return get_item_router().route(query, query_embedding)
+
+def get_router_stats() -> Dict[str, int]:
+    """
+    Returns the router's memo hit, local route and LLM fallback counters.
+    """
+    return dict(get_item_router().stats)
@@ -0,0 +1,65 @@
+from typing import Any, Dict, Sequence, Tuple
+import numpy as np
+from bson.binary import Binary, BinaryVectorDtype
+
+# Embedding storage modes. float32 keeps the plain list of numbers; float16 and int8 store a BSON
+# binary (2 and 1 bytes per dimension) instead of ~14 bytes per BSON double array element.
+# Atlas' vector_index stays on float32: float16 is not a BSON vector dtype it can index, and our
+# int8 codes carry a per-vector scale it doesn't know about. For a smaller Atlas index, its own
+# scalar quantization on the float32 field keeps full-fidelity vectors for rescoring.
+STORAGE_DTYPES = ["float32", "float16", "int8"]
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric scalar quantization of each row: x ≈ q * scale with q in [-127, 127].
+
+    Args:
+        vectors (np.ndarray): A vector or a matrix of row vectors.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The int8 codes and the float32 scale of each row.
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+def encode_embedding(vector: Sequence[float], storage: str = "float32") -> Dict[str, Any]:
+    """
+    Encodes an embedding for a chunk document.
+
+    Args:
+        vector (Sequence[float]): The embedding.
+        storage (str): One of STORAGE_DTYPES.
+
+    Returns:
+        Dict[str, Any]: The `embedding`, `embedding_dtype` and `embedding_scale` fields to store.
+    """
+    if storage == "float32":
+        return {"embedding": [float(x) for x in vector], "embedding_dtype": "float32", "embedding_scale": None}
+    if storage == "float16":
+        data = np.asarray(vector, dtype=np.float16).tobytes()
+        return {"embedding": Binary(data), "embedding_dtype": "float16", "embedding_scale": None}
+    if storage == "int8":
+        codes, scales = quantize_int8(vector)
+        # The BSON vector subtype, so the codes stay readable as an int8 vector by other tools
+        return {"embedding": Binary.from_vector(codes[0].tolist(), BinaryVectorDtype.INT8),
+                "embedding_dtype": "int8", "embedding_scale": float(scales[0])}
+    raise ValueError(f"Unknown embedding storage '{storage}', expected one of {STORAGE_DTYPES}")
+
+def decode_embedding(doc: Dict[str, Any]) -> np.ndarray:
+    """
+    Returns the float32 embedding of a chunk document, whichever storage mode it was written with.
+    Documents written before the storage modes existed hold a plain list.
+    """
+    dtype = doc.get("embedding_dtype") or "float32"
+    embedding = doc["embedding"]
+    if dtype == "float32":
+        return np.asarray(embedding, dtype=np.float32)
+    if dtype == "float16":
+        return np.frombuffer(embedding, dtype=np.float16).astype(np.float32)
+    if dtype == "int8":
+        codes = np.asarray(embedding.as_vector().data, dtype=np.float32)
+        return codes * np.float32(doc["embedding_scale"])
+    raise ValueError(f"Unknown embedding_dtype '{dtype}'")
@@ -1,22 +1,50 @@
-import os, pymongo
-from openai import OpenAI
+import asyncio
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+from agents.clients import get_chat_model
+from agents.embedding_cache import get_cached_embedder
 from typing import Optional
-from agents.core_utils import infer_relevant_items
-from agents.core_utils import get_tenk_item_descriptions
-from agents.config import numCandidates, limit
+from agents.core_utils import StageTimer, run_sync, emit_stream_event, stream_llm_text
+from agents.item_router import route_relevant_items
+from agents.retrieval import get_retriever
+from agents.context_packing import pack_context
+from agents.config import numCandidates, limit, embedding_model
+
+def _embed_query(query_text: str) -> list[float]:
+  # Repeated questions are served from the persistent embedding cache
+  return get_cached_embedder(embedding_model).embed_query(query_text)
+
+def _find_latest_filingdate(ticker: str) -> Optional[str]:
+  return get_retriever().latest_filingdate(ticker, "10-K")
+
+async def _gather_retrieval_inputs(query_text: str, ticker: str, filingdate: Optional[str], timer: StageTimer):
+  """
+  Stage 1 of the retrieval path: the query embedding and (if no filingdate was given) the
+  latest filing lookup run concurrently on worker threads. The relevant items are then routed
+  locally from the same embedding; only a low-confidence route costs an LLM call.
+  """
+  embed = timer.atime("embed", asyncio.to_thread(_embed_query, query_text))
+  if filingdate:
+    embedding = await embed
+  else:
+    latest = timer.atime("latest_filing", asyncio.to_thread(_find_latest_filingdate, ticker))
+    embedding, filingdate = await asyncio.gather(embed, latest)
+  relevant_items = await timer.atime(
+    "route_items", asyncio.to_thread(route_relevant_items, query_text, embedding)
+  )
+  return embedding, relevant_items, filingdate
 
 def query_ar_index(query_text:str, ticker:str, filingdate: Optional[str] = None) -> str:
   """
     Retrieves an answer to a user query using annual report (10-K) filing data via a hybrid RAG (Retrieval-Augmented Generation) approach.
 
     This function performs the following steps:
-    1. Embeds the input query using OpenAI embeddings.
-    2. Infers the most relevant 10-K item codes for the query (e.g., ITEM 1A, ITEM 7A).
-    3. Retrieves relevant text chunks from a vector index stored in MongoDB.
-    4. Optionally filters by a specific filing date. If not provided, defaults to the latest available filing for the given ticker.
-    5. Synthesizes a final answer using GPT-4o based on the retrieved excerpts.
+    1. Concurrently embeds the input query using OpenAI embeddings and, if no filing date is given,
+       looks up the latest available filing for the given ticker. The most relevant 10-K item codes
+       for the query (e.g., ITEM 1A, ITEM 7A) are then routed from the query embedding.
+    2. Retrieves relevant text chunks from the vector index (MongoDB Atlas or a local index, see agents/retrieval.py).
+    3. Packs the excerpts into a token budget (overlapping chunks merged, near-duplicates dropped)
+       and synthesizes a final answer using GPT-4o based on them. The answer is streamed to the
+       client token by token while it is generated.
 
     Parameters:
         query_text (str): The natural language question to be answered.
@@ -26,75 +54,30 @@ def query_ar_index(query_text:str, ticker:str, filingdate: Optional[str] = None)
     Returns:
         str: A concise, professional answer generated by the LLM based on the retrieved 10-K content.
   """
-  uri = os.getenv("MONGO_URI")
-  print(uri)
+  timer = StageTimer("query_ar_index")
+  emit_stream_event({"source": "query_ar_index", "status": f"Searching {ticker} 10-K filings"})
 
-  # connect to your Atlas cluster
-  client_mongo = pymongo.MongoClient(uri)
-
-  # Create the query embeddings 
-  client_openai = OpenAI()
-  response = client_openai.embeddings.create(
-      input=query_text,
-      model="text-embedding-ada-002"
+  # Embedding and the latest-filing lookup don't depend on each other, run them together
+  embedding, relevant_items, filingdate = run_sync(
+    _gather_retrieval_inputs(query_text, ticker, filingdate, timer)
   )
-  embedding = response.data[0].embedding
-
-  # Find relevant item(s) from the tenk that should be used 
-  item_map = get_tenk_item_descriptions()
-  relevant_items = infer_relevant_items(query_text, item_map)
-
-  # select the database and collection
-  db = client_mongo["filingdb"]
-  collection = db["all_filing_chunks"]
-  
   if not filingdate:
-    # Find the latest filing date 
-    latest_filing = collection.find_one(
-        {"ticker": "MU", "form": "10-K"},
-        sort=[("filingdate", -1)]
-    )
-    if not latest_filing:
-      return f"No filings found for {ticker}"
-    filingdate = latest_filing["filingdate"]
+    return f"No filings found for {ticker}"
 
-  # define pipeline
-  pipeline = [
-    {
-      '$vectorSearch': {
-        'index': 'vector_index', 
-        'path': 'embedding', 
-        'queryVector': embedding, 
-        'numCandidates': numCandidates, 
-        'limit': limit, 
-        'filter': {
-          'item_code': {'$in': relevant_items}, 
-          'filingdate': filingdate,
-          'ticker': 'MU'
-        }
-      }
-    }, {
-      '$project': {
-        '_id': 0, 
-        'ticker': 1, 
-        'filingdate': 1,
-        'item_code': 1,
-        'chunk': 1,
-        'score': {
-          '$meta': 'vectorSearchScore'
-        }
-      }
-    }
-  ]
+  # Atlas $vectorSearch or the local index, per retrieval_backend in config
+  filters = {
+    'item_code': {'$in': relevant_items},
+    'filingdate': filingdate,
+    'ticker': ticker
+  }
+  with timer.stage("vector_search"):
+    retrieved_docs = get_retriever().search(embedding, filters, numCandidates, limit)
 
-  # run pipeline
-  result_cursor = client_mongo["filingdb"]["all_filing_chunks"].aggregate(pipeline)
-
-  retrieved_docs = list(result_cursor)
-  retrieved_chunks = [doc["chunk"] for doc in retrieved_docs if "chunk" in doc]
-
-  # Optional: Truncate or filter very long content if needed
-  context = "\n\n".join(retrieved_chunks)  
+  # Merge overlapping chunks, drop near-duplicates and cap the excerpts at the token budget
+  with timer.stage("pack_context"):
+    packed = pack_context(retrieved_docs)
+  print(packed.report())
+  context = packed.text
 
   # Prepare the prompt
   final_prompt = (
@@ -103,11 +86,13 @@ def query_ar_index(query_text:str, ticker:str, filingdate: Optional[str] = None)
     f"Excerpts:\n{context}\n\n"
     f"Answer in a clear, concise, and professional tone suitable for an RM (Relationship Manager)."
 )
-  # Call the LLM to generate the final answer
-  llm = ChatOpenAI(model="gpt-4o", temperature=0.2)
-  final_answer = llm.invoke(final_prompt)
-  
-  return (final_answer.content)
+  # Call the LLM to generate the final answer, streaming tokens to the client as they arrive
+  llm = get_chat_model("gpt-4o", temperature=0.2)
+  with timer.stage("answer"):
+    final_answer = stream_llm_text(llm, final_prompt, "query_ar_index")
+  print(timer.report())
+
+  return final_answer
 
 def main(): 
   query_text = "what FX risks does Micron face"
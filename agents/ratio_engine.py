@@ -0,0 +1,97 @@
+from typing import Any, Dict
+import numpy as np
+import pandas as pd
+from agents.financial_concepts import select_line_items
+
+# Ratio name -> (numerator, denominator) line items, see KEY_LINE_ITEMS
+RATIOS = {
+    "Gross Margin": ("Gross Profit", "Revenue"),
+    "Operating Margin": ("Operating Income", "Revenue"),
+    "Net Margin": ("Net Income", "Revenue"),
+    "R&D / Revenue": ("R&D", "Revenue"),
+    "Debt / Equity": ("Long-Term Debt", "Total Equity"),
+    "Liabilities / Equity": ("Total Liabilities", "Total Equity"),
+    "Current Ratio": ("Current Assets", "Current Liabilities"),
+    "Interest Coverage": ("Operating Income", "Interest Expense"),
+}
+# Line items whose year-over-year change is reported
+GROWTH_ITEMS = {"Revenue Growth": "Revenue", "Operating Income Growth": "Operating Income", "Net Income Growth": "Net Income"}
+PERCENT_COLUMNS = ["Gross Margin", "Operating Margin", "Net Margin", "R&D / Revenue", *GROWTH_ITEMS]
+
+def build_line_item_frame(peer_statements: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Normalizes the stitched statements of several companies into one frame.
+
+    Args:
+        peer_statements (Dict[str, Dict[str, Any]]): Per ticker, the "income_statement" and
+            "balance_sheet" DataFrames from get_financial_statement (as gathered by gather_peer_data).
+            Tickers with an "error" are skipped.
+
+    Returns:
+        pd.DataFrame: One row per (ticker, fiscal_year), one column per key line item.
+    """
+    records = []
+    for ticker, data in peer_statements.items():
+        if "error" in data:
+            continue
+        for statement_type, key in (("income", "income_statement"), ("balance_sheet", "balance_sheet")):
+            if not isinstance(data.get(key), pd.DataFrame):
+                continue
+            for item, values in select_line_items(data[key], statement_type).items():
+                records.extend((ticker, year, item, value) for year, value in values.items())
+    if not records:
+        return pd.DataFrame(index=pd.MultiIndex.from_tuples([], names=["ticker", "fiscal_year"]))
+    long = pd.DataFrame(records, columns=["ticker", "fiscal_year", "item", "value"])
+    return long.pivot_table(index=["ticker", "fiscal_year"], columns="item", values="value", aggfunc="first")
+
+def compute_ratios(items: pd.DataFrame) -> pd.DataFrame:
+    """
+    Computes RATIOS and GROWTH_ITEMS for every (ticker, fiscal_year) row at once.
+    Ratios whose inputs are missing, or whose denominator is zero, are NaN.
+    """
+    items = items.copy()
+    for column in {column for pair in RATIOS.values() for column in pair} | set(GROWTH_ITEMS.values()):
+        if column not in items:
+            items[column] = np.nan
+    # Filers without a gross profit line still report revenue and cost of revenue
+    if "Cost of Revenue" in items:
+        items["Gross Profit"] = items["Gross Profit"].fillna(items["Revenue"] - items["Cost of Revenue"])
+
+    # Interest expense is reported with either sign; only its magnitude is the denominator, so an
+    # operating loss still gives a negative coverage
+    items["Interest Expense"] = items["Interest Expense"].abs()
+
+    ratios = pd.DataFrame(index=items.index)
+    for name, (numerator, denominator) in RATIOS.items():
+        ratios[name] = items[numerator] / items[denominator].replace(0, np.nan)
+
+    # Rows are sorted by (ticker, fiscal_year), so the previous row of a ticker is its prior year
+    items = items.sort_index()
+    ratios = ratios.loc[items.index]
+    for name, column in GROWTH_ITEMS.items():
+        previous = items.groupby(level="ticker")[column].shift(1)
+        ratios[name] = (items[column] - previous) / previous.abs().replace(0, np.nan)
+    return ratios
+
+def format_ratio_table(ratios: pd.DataFrame) -> str:
+    """
+    Formats computed ratios as a markdown table, newest fiscal year first for each ticker.
+    Ratios that no company reports are left out.
+    """
+    ratios = ratios.dropna(axis=1, how="all")
+    if ratios.empty:
+        return "No ratios could be computed."
+    columns = list(ratios.columns)
+    lines = ["| Ticker | Year | " + " | ".join(columns) + " |", "|---|---|" + "---|" * len(columns)]
+    for (ticker, year), row in ratios.sort_index(ascending=[True, False]).iterrows():
+        cells = []
+        for column in columns:
+            value = row[column]
+            if pd.isna(value):
+                cells.append("")
+            elif column in PERCENT_COLUMNS:
+                cells.append(f"{value * 100:.1f}%")
+            else:
+                cells.append(f"{value:.2f}x")
+        lines.append(f"| {ticker} | {year} | " + " | ".join(cells) + " |")
+    return "\n".join(lines)
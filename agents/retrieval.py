@@ -0,0 +1,295 @@
+import json, os, shutil, threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+from agents.clients import get_mongo_client
+from agents.quantization import STORAGE_DTYPES, quantize_int8, decode_embedding
+from agents.config import (
+    numCandidates, limit, retrieval_backend, local_index_dir, local_index_storage, local_index_ivf_lists,
+    local_search_batch_rows, embedding_storage
+)
+
+# Metadata columns a local index can pre-filter on (the filter fields of Atlas' vector_index, plus form)
+FILTER_COLUMNS = ["ticker", "form", "item_code", "filingdate"]
+
+class AtlasRetriever:
+    """
+    Vector search through the MongoDB Atlas `$vectorSearch` stage and the `vector_index` built by
+    ar_pipeline/create_ar_index.py.
+    """
+    def __init__(self, uri_env: str = "MONGO_URI", index_name: str = "vector_index"):
+        self.uri_env = uri_env
+        self.index_name = index_name
+
+    def _collection(self):
+        return get_mongo_client(self.uri_env)["filingdb"]["all_filing_chunks"]
+
+    def search(self, query_vector: List[float], filters: Dict[str, Any],
+               num_candidates: int = numCandidates, limit: int = limit) -> List[Dict]:
+        pipeline = [
+            {
+                '$vectorSearch': {
+                    'index': self.index_name,
+                    'path': 'embedding',
+                    'queryVector': query_vector,
+                    'numCandidates': num_candidates,
+                    'limit': limit,
+                    'filter': filters
+                }
+            }, {
+                '$project': {
+                    '_id': 0,
+                    'ticker': 1,
+                    'filingdate': 1,
+                    'item_code': 1,
+                    'chunk': 1,
+                    'score': {
+                        '$meta': 'vectorSearchScore'
+                    }
+                }
+            }
+        ]
+        return list(self._collection().aggregate(pipeline))
+
+    def latest_filingdate(self, ticker: str, form: str = "10-K") -> Optional[str]:
+        # Indexed read of the filing catalog maintained by ar_pipeline/ingest_ar_filings.py
+        catalog = get_mongo_client(self.uri_env)["filingdb"]["filing_catalog"]
+        latest_filing = catalog.find_one({"ticker": ticker, "form": form, "status": "complete"},
+                                         {"_id": 0, "filingdate": 1}, sort=[("filingdate", -1)])
+        if latest_filing is None:
+            # Not in the catalog: e.g. chunks ingested before the catalog existed
+            latest_filing = self._collection().find_one({"ticker": ticker, "form": form},
+                                                        {"_id": 0, "filingdate": 1}, sort=[("filingdate", -1)])
+        return latest_filing["filingdate"] if latest_filing else None
+
+class LocalVectorIndex:
+    """
+    On-disk vector index over the chunk embeddings, searched in-process.
+
+    The embeddings are a memory-mapped matrix of unit rows, so only the rows that are scored are
+    paged in. The matrix is float32, float16 or int8 with a per-row scale (`storage`); quantized
+    rows are scored as stored, and the int8 products are rescaled by each row's scale. Filters on the metadata columns (FILTER_COLUMNS) are applied first, then
+    the remaining rows are scored exactly by batched matrix multiply. If the index was built with
+    IVF clusters and a query has more than `num_candidates` rows left after filtering, only the
+    nearest clusters holding about `num_candidates` rows are scored — the same recall/speed knob
+    as numCandidates in Atlas. Scores use Atlas' dotProduct scale, (1 + cosine) / 2.
+
+    Layout of `directory`:
+        index.json            count, dim, storage, ivf_lists
+        vectors.bin           count x dim matrix of the storage dtype
+        scales.npy            (int8 only) scale of each row
+        metadata.npz          one string array per filter column, plus chunk byte offsets
+        chunks.txt            chunk texts, utf-8, concatenated
+        ivf_centroids.npy     (optional) ivf_lists x dim unit centroids
+        ivf_assignments.npy   (optional) cluster of each row
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "index.json"), "r", encoding="utf-8") as f:
+            self.info = json.load(f)
+        self.count, self.dim = self.info["count"], self.info["dim"]
+        self.storage = self.info.get("storage", "float32")
+        self._vectors = np.memmap(os.path.join(directory, "vectors.bin"), dtype=self.storage, mode="r",
+                                  shape=(self.count, self.dim))
+        self._scales = np.load(os.path.join(directory, "scales.npy")) if self.storage == "int8" else None
+        metadata = np.load(os.path.join(directory, "metadata.npz"))
+        self._columns = {name: metadata[name] for name in FILTER_COLUMNS}
+        self._chunk_offsets = metadata["chunk_offsets"]
+        self._chunks = np.memmap(os.path.join(directory, "chunks.txt"), dtype=np.uint8, mode="r") \
+            if self._chunk_offsets[-1] else np.zeros(0, dtype=np.uint8)
+        self._centroids = self._assignments = None
+        if self.info.get("ivf_lists"):
+            self._centroids = np.load(os.path.join(directory, "ivf_centroids.npy"))
+            self._assignments = np.load(os.path.join(directory, "ivf_assignments.npy"), mmap_mode="r")
+
+    def _filter_rows(self, filters: Dict[str, Any]) -> np.ndarray:
+        mask = np.ones(self.count, dtype=bool)
+        for field, condition in (filters or {}).items():
+            if field not in self._columns:
+                raise ValueError(f"Local index can't filter on '{field}', supported: {FILTER_COLUMNS}")
+            column = self._columns[field]
+            if isinstance(condition, dict):
+                if set(condition) - {"$in", "$eq"}:
+                    raise ValueError(f"Unsupported filter on '{field}': {condition}")
+                if "$in" in condition:
+                    mask &= np.isin(column, [str(value) for value in condition["$in"]])
+                if "$eq" in condition:
+                    mask &= column == str(condition["$eq"])
+            else:
+                mask &= column == str(condition)
+        return np.flatnonzero(mask)
+
+    def _probe(self, query: np.ndarray, rows: np.ndarray, num_candidates: int) -> np.ndarray:
+        row_lists = np.asarray(self._assignments[rows])
+        sizes = np.bincount(row_lists, minlength=len(self._centroids))
+        order = np.argsort(-(self._centroids @ query))
+        # Nearest clusters first, until they hold num_candidates of the filtered rows
+        n_lists = int(np.searchsorted(np.cumsum(sizes[order]), num_candidates)) + 1
+        return rows[np.isin(row_lists, order[:n_lists])]
+
+    def _score(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        scores = np.empty(len(rows), dtype=np.float32)
+        for start in range(0, len(rows), local_search_batch_rows):
+            batch = rows[start:start + local_search_batch_rows]
+            if batch[-1] - batch[0] + 1 == len(batch):
+                block = self._vectors[batch[0]:batch[-1] + 1]  # contiguous rows: a plain slice of the memmap
+            else:
+                block = self._vectors[batch]
+            # Quantized rows are widened one batch at a time; the matrix itself stays compact
+            block = block.astype(np.float32, copy=False)
+            if self._scales is not None:
+                scores[start:start + len(batch)] = (block @ query) * self._scales[batch]
+            else:
+                scores[start:start + len(batch)] = block @ query
+        return scores
+
+    def chunk(self, row: int) -> str:
+        start, end = self._chunk_offsets[row], self._chunk_offsets[row + 1]
+        return bytes(self._chunks[start:end]).decode("utf-8")
+
+    def search(self, query_vector: List[float], filters: Dict[str, Any],
+               num_candidates: int = numCandidates, limit: int = limit) -> List[Dict]:
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / np.linalg.norm(query)
+        rows = self._filter_rows(filters)
+        if self._centroids is not None and len(rows) > num_candidates:
+            rows = self._probe(query, rows, num_candidates)
+        if not len(rows):
+            return []
+
+        scores = self._score(rows, query)
+        k = min(limit, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {
+                "ticker": str(self._columns["ticker"][rows[i]]),
+                "filingdate": str(self._columns["filingdate"][rows[i]]),
+                "item_code": str(self._columns["item_code"][rows[i]]),
+                "chunk": self.chunk(int(rows[i])),
+                "score": float((1 + scores[i]) / 2),
+            }
+            for i in top
+        ]
+
+    def latest_filingdate(self, ticker: str, form: str = "10-K") -> Optional[str]:
+        rows = self._filter_rows({"ticker": ticker, "form": form})
+        return str(np.unique(self._columns["filingdate"][rows])[-1]) if len(rows) else None
+
+    @staticmethod
+    def build(docs: Iterable[Dict], directory: str, dim: int, storage: str = local_index_storage,
+              ivf_lists: int = local_index_ivf_lists) -> "LocalVectorIndex":
+        """
+        Writes a new index from chunk documents (as stored in all_filing_chunks) and swaps it
+        in place of any existing one at `directory`.
+
+        Args:
+            docs (Iterable[Dict]): Documents with `embedding` (in any storage mode), `chunk` and the
+                FILTER_COLUMNS fields. Consumed as a stream: only the metadata is held in memory.
+            directory (str): Where the index is written.
+            dim (int): Embedding dimensions.
+            storage (str): Matrix dtype, one of STORAGE_DTYPES.
+            ivf_lists (int): Number of IVF clusters to build; 0 for exact search only.
+
+        Returns:
+            LocalVectorIndex: The new index, opened.
+        """
+        if storage not in STORAGE_DTYPES:
+            raise ValueError(f"Unknown storage '{storage}', expected one of {STORAGE_DTYPES}")
+        staging = directory.rstrip(os.sep) + ".building"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+
+        columns = {name: [] for name in FILTER_COLUMNS}
+        offsets, scales = [0], []
+        with open(os.path.join(staging, "vectors.bin"), "wb") as vectors_file, \
+             open(os.path.join(staging, "chunks.txt"), "wb") as chunks_file:
+            for doc in docs:
+                vector = decode_embedding(doc)
+                if vector.shape != (dim,):
+                    raise ValueError(f"Embedding of {doc.get('ticker')} {doc.get('item_code')} has shape {vector.shape}, expected ({dim},)")
+                vector = vector / np.linalg.norm(vector)
+                if storage == "int8":
+                    codes, scale = quantize_int8(vector)
+                    vectors_file.write(codes.tobytes())
+                    scales.append(scale[0])
+                else:
+                    vectors_file.write(vector.astype(storage).tobytes())
+                text = doc["chunk"].encode("utf-8")
+                chunks_file.write(text)
+                offsets.append(offsets[-1] + len(text))
+                for name in FILTER_COLUMNS:
+                    columns[name].append(str(doc.get(name, "")))
+
+        count = len(offsets) - 1
+        np.savez(os.path.join(staging, "metadata.npz"), chunk_offsets=np.asarray(offsets, dtype=np.int64),
+                 **{name: np.asarray(values, dtype=str) for name, values in columns.items()})
+
+        if storage == "int8":
+            np.save(os.path.join(staging, "scales.npy"), np.asarray(scales, dtype=np.float32))
+
+        ivf_lists = min(ivf_lists, count)
+        if ivf_lists:
+            vectors = np.memmap(os.path.join(staging, "vectors.bin"), dtype=storage, mode="r", shape=(count, dim))
+            # Clusters are trained on the stored rows; int8 codes keep the rows' directions
+            centroids = _train_ivf_centroids(vectors, ivf_lists)
+            assignments = np.empty(count, dtype=np.int32)
+            for start in range(0, count, local_search_batch_rows):
+                block = np.asarray(vectors[start:start + local_search_batch_rows], dtype=np.float32)
+                assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+            np.save(os.path.join(staging, "ivf_centroids.npy"), centroids)
+            np.save(os.path.join(staging, "ivf_assignments.npy"), assignments)
+            del vectors
+
+        with open(os.path.join(staging, "index.json"), "w", encoding="utf-8") as f:
+            json.dump({"count": count, "dim": dim, "storage": storage, "ivf_lists": ivf_lists,
+                       "built_at": datetime.now(timezone.utc).isoformat()}, f)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(staging, directory)
+        return LocalVectorIndex(directory)
+
+def _train_ivf_centroids(vectors: np.ndarray, n_lists: int, iterations: int = 10, sample_per_list: int = 256,
+                         seed: int = 0) -> np.ndarray:
+    """
+    Spherical k-means on a sample of the rows.
+    """
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), n_lists * sample_per_list)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))], dtype=np.float32)
+    sample /= np.linalg.norm(sample, axis=1, keepdims=True)
+    centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        norms = np.linalg.norm(sums, axis=1)
+        filled = norms > 0  # an empty cluster keeps its previous centroid
+        centroids[filled] = sums[filled] / norms[filled, None]
+    return centroids
+
+_retriever = None
+_retriever_lock = threading.Lock()
+
+def get_retriever():
+    """
+    Returns the retrieval backend selected by `retrieval_backend` in config ("atlas" or "local").
+    Both expose `search(query_vector, filters, num_candidates, limit)` and `latest_filingdate(ticker, form)`.
+    """
+    global _retriever
+    if _retriever is None:
+        with _retriever_lock:
+            if _retriever is None:
+                if retrieval_backend == "local":
+                    if not os.path.exists(os.path.join(local_index_dir, "index.json")):
+                        raise FileNotFoundError(
+                            f"No local vector index at {local_index_dir}, build it with ar_pipeline/create_local_index.py"
+                        )
+                    _retriever = LocalVectorIndex(local_index_dir)
+                elif retrieval_backend == "atlas":
+                    if embedding_storage != "float32":
+                        print(f"⚠️ Warning: Atlas vector_index is built on float32 embeddings, but embedding_storage is "
+                              f"'{embedding_storage}'; chunks stored compactly are only searchable with RETRIEVAL_BACKEND=local")
+                    _retriever = AtlasRetriever()
+                else:
+                    raise ValueError(f"Unknown retrieval_backend '{retrieval_backend}', expected 'atlas' or 'local'")
+    return _retriever
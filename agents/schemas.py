@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 
 class KeyValuePair(BaseModel):
     key: str = Field(..., description="Name of the metric or fact")
@@ -24,15 +24,22 @@ class FilingSummary(BaseModel):
     ticker: str
     filingdate: str 
     form: str
+    accession_no: Optional[str] = Field(None, description="SEC accession number of the filing")
+    prompt_version: Optional[str] = Field(None, description="SUMMARY_PROMPT_VERSION the summaries were written with")
     filingitemsummaries: List[FilingItemSummary]
 
 class FilingChunks(BaseModel):
     ticker: str
     filingdate: str 
     form: str
+    accession_no: Optional[str] = Field(None, description="SEC accession number of the filing")
     item_code: str
     chunk: str 
-    embedding: List[float]
+    chunk_hash: Optional[str] = Field(None, description="sha256 of the chunk text, part of the chunk's upsert key")
+    # A float list (float32), the raw float16 bytes, or a BSON int8 vector (see agents/quantization.py)
+    embedding: Union[List[float], bytes] = Field(..., description="Chunk embedding, encoded per embedding_dtype")
+    embedding_dtype: Literal["float32", "float16", "int8"] = Field("float32", description="Storage mode of embedding")
+    embedding_scale: Optional[float] = Field(None, description="Per-vector scale of int8 codes: vector ≈ codes * scale")
 
 class LLMGeneratedFilingItemSummary(BaseModel):
     summary: Optional[str]
@@ -0,0 +1,108 @@
+import copy, functools, inspect, json, threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional
+from agents.config import single_flight_wait_seconds
+
+# Arguments compared case-insensitively ("nvda" and "NVDA" are the same call)
+_CASE_INSENSITIVE_ARGS = {"ticker", "tickers", "form_type"}
+
+def _normalize(name: str, value: Any) -> Any:
+    if isinstance(value, str):
+        value = value.strip()
+        return value.upper() if name in _CASE_INSENSITIVE_ARGS else value
+    if isinstance(value, (list, tuple)):
+        return [_normalize(name, item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _normalize(str(key), item) for key, item in value.items()}
+    return value
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one execution: the first caller of a key runs the
+    function, callers arriving while it is in flight wait for it and get (a copy of) its result,
+    or its exception. Nothing is cached once the call is done.
+
+    Stats per name: calls, executions (upstream work done) and coalesced (calls that shared an
+    in-flight execution).
+    """
+    def __init__(self, wait_seconds: float = single_flight_wait_seconds):
+        self.wait_seconds = wait_seconds
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"calls": 0, "executions": 0, "coalesced": 0})
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, name: str, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            stats = self.stats[name]
+            stats["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                stats["executions"] += 1
+            else:
+                call.waiters += 1
+                stats["coalesced"] += 1
+
+        if not leader:
+            if call.done.wait(self.wait_seconds):
+                if call.error is not None:
+                    raise call.error
+                # Tool results can be mutable (dicts, DataFrames): every caller gets its own
+                return copy.deepcopy(call.result)
+            print(f"⚠️ Warning: {name} in flight for over {self.wait_seconds}s, calling it separately")
+            with self._lock:
+                self.stats[name]["executions"] += 1
+            return fn()
+
+        result = None
+        try:
+            result = fn()
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                waiters = call.waiters
+            # The leader may go on to modify its result: waiters copy from a snapshot
+            if waiters and call.error is None:
+                call.result = copy.deepcopy(result)
+            call.done.set()
+
+    def report(self) -> str:
+        with self._lock:
+            return " ".join(f"{name}: {s['calls']} calls/{s['executions']} executions/{s['coalesced']} coalesced"
+                            for name, s in sorted(self.stats.items()))
+
+_single_flight = SingleFlight()
+
+def get_single_flight() -> SingleFlight:
+    return _single_flight
+
+def single_flight(tool: Callable) -> Callable:
+    """
+    Wraps a tool so that identical concurrent calls (same tool, same arguments after applying
+    defaults and normalizing tickers) share one upstream execution, across all sessions of the
+    process. The wrapper keeps the tool's name, signature and docstring.
+    """
+    signature = inspect.signature(tool)
+    name = tool.__name__
+
+    @functools.wraps(tool)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = {arg: _normalize(arg, value) for arg, value in bound.arguments.items()}
+        key = f"{name}:{json.dumps(arguments, sort_keys=True, default=str)}"
+        return _single_flight.do(name, key, lambda: tool(*args, **kwargs))
+
+    return wrapper
@@ -0,0 +1,133 @@
+import os, threading, time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import pymongo
+from pymongo.errors import PyMongoError
+from agents.clients import get_mongo_client
+from agents.config import (
+    summary_cache_max_entries, summary_cache_mongo_timeout_seconds, summary_cache_retry_seconds
+)
+
+def format_ingested_summary(item_summary: Dict[str, Any]) -> str:
+    """
+    Renders a FilingItemSummary stored by ar_pipeline/ingest_ar_filings.py as summary text.
+    """
+    text = item_summary.get("summary") or ""
+    key_values = item_summary.get("key_values") or []
+    if key_values:
+        text += "\nKey values: " + "; ".join(f"{kv['key']}: {kv['value']}" for kv in key_values)
+    return text.strip()
+
+class SummaryCache:
+    """
+    Cache of 10-K item summaries keyed by (ticker, accession number, item code, prompt version).
+
+    Lookups go through three layers: an in-process LRU, the `item_summary_cache` collection, and
+    the structured summaries ingestion already stored in `all_filing_summaries` for the same filing
+    and prompt version.
+    MongoDB is optional: when it is not configured or not reachable the cache degrades to the
+    in-process layer and retries Mongo after `summary_cache_retry_seconds`.
+    """
+    def __init__(self, uri_env: str = "MONGO_URI", max_entries: int = summary_cache_max_entries):
+        self.uri_env = uri_env
+        self.max_entries = max_entries
+        self.stats = {"memory_hits": 0, "cache_hits": 0, "ingested_hits": 0, "misses": 0}
+        self._memory: "OrderedDict[Tuple[str, str, str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._mongo_down_until = 0.0
+
+    @staticmethod
+    def _key(ticker: str, filing, item_code: str, prompt_version: str) -> Tuple[str, str, str, str]:
+        return (ticker.upper(), filing.accession_no, item_code, prompt_version)
+
+    def _remember(self, key, summary: str) -> None:
+        with self._lock:
+            self._memory[key] = summary
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _mongo(self, operation):
+        """
+        Runs `operation(db)` against filingdb with a short timeout. Returns None if MongoDB is not
+        configured, known to be down, or fails now.
+        """
+        if not os.getenv(self.uri_env) or time.monotonic() < self._mongo_down_until:
+            return None
+        try:
+            with pymongo.timeout(summary_cache_mongo_timeout_seconds):
+                return operation(get_mongo_client(self.uri_env)["filingdb"])
+        except PyMongoError as e:
+            self._mongo_down_until = time.monotonic() + summary_cache_retry_seconds
+            print(f"⚠️ Warning: Summary cache skipping MongoDB for {summary_cache_retry_seconds}s: {e}")
+            return None
+
+    def get_many(self, ticker: str, filing, item_codes: List[str], prompt_version: str) -> Dict[str, str]:
+        """
+        Returns the cached summaries of `item_codes` for `filing`; items not found are left out.
+        """
+        found, missing = {}, []
+        with self._lock:
+            for item_code in item_codes:
+                key = self._key(ticker, filing, item_code, prompt_version)
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[item_code] = self._memory[key]
+                    self.stats["memory_hits"] += 1
+                else:
+                    missing.append(item_code)
+        if not missing:
+            return found
+
+        def lookup(db) -> Dict[str, Tuple[str, str]]:
+            results = {}
+            ids = {f"{ticker.upper()}|{filing.accession_no}|{code}|{prompt_version}": code for code in missing}
+            for doc in db["item_summary_cache"].find({"_id": {"$in": list(ids)}}):
+                results[ids[doc["_id"]]] = (doc["summary"], "cache_hits")
+            if len(results) < len(missing):
+                # Only summaries ingested with the same prompt version (older ones have none)
+                ingested = db["all_filing_summaries"].find_one({
+                    "ticker": ticker.upper(), "accession_no": filing.accession_no, "prompt_version": prompt_version,
+                })
+                for item_summary in (ingested or {}).get("filingitemsummaries", []):
+                    code = item_summary.get("item_code")
+                    if code in missing and code not in results:
+                        results[code] = (format_ingested_summary(item_summary), "ingested_hits")
+            return results
+
+        results = self._mongo(lookup) or {}
+        with self._lock:
+            for item_code in missing:
+                if item_code in results:
+                    summary, layer = results[item_code]
+                    found[item_code] = summary
+                    self.stats[layer] += 1
+                else:
+                    self.stats["misses"] += 1
+        for item_code, (summary, _layer) in results.items():
+            self._remember(self._key(ticker, filing, item_code, prompt_version), summary)
+        return found
+
+    def put(self, ticker: str, filing, item_code: str, prompt_version: str, summary: str) -> None:
+        self._remember(self._key(ticker, filing, item_code, prompt_version), summary)
+        doc = {
+            "ticker": ticker.upper(), "accession_no": filing.accession_no, "filingdate": str(filing.report_date),
+            "item_code": item_code, "prompt_version": prompt_version, "summary": summary,
+            "created_at": datetime.now(timezone.utc),
+        }
+        _id = f"{ticker.upper()}|{filing.accession_no}|{item_code}|{prompt_version}"
+        self._mongo(lambda db: db["item_summary_cache"].replace_one({"_id": _id}, doc, upsert=True))
+
+_summary_cache: Optional[SummaryCache] = None
+_summary_cache_lock = threading.Lock()
+
+def get_summary_cache() -> SummaryCache:
+    """
+    Returns the process-wide SummaryCache (MongoDB from MONGO_URI).
+    """
+    global _summary_cache
+    with _summary_cache_lock:
+        if _summary_cache is None:
+            _summary_cache = SummaryCache()
+        return _summary_cache
@@ -0,0 +1,180 @@
+import json, os, re, tempfile, threading, time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import requests
+from agents.config import (
+    ticker_index_path, ticker_index_url, ticker_index_max_age_seconds, ticker_index_check_seconds,
+    ticker_index_min_score
+)
+
+# Words that don't help tell companies apart ("Micron Technology, Inc." ~ "micron technology")
+_NAME_STOPWORDS = {"inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited", "plc",
+                   "llc", "lp", "sa", "nv", "ag", "the", "and", "de", "class"}
+
+@dataclass(frozen=True)
+class TickerEntry:
+    ticker: str
+    cik: int
+    name: str
+
+    @property
+    def cik_formatted(self) -> str:
+        return f"CIK{self.cik:010d}"
+
+def normalize_name(name: str) -> str:
+    words = re.findall(r"[a-z0-9]+", name.lower().replace("&", " and "))
+    return " ".join(word for word in words if word not in _NAME_STOPWORDS)
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class _Snapshot:
+    """
+    Immutable lookup tables over one company_tickers file: exact ticker and CIK maps, and a
+    trigram index over normalized company names.
+    """
+    def __init__(self, entries: List[TickerEntry], mtime: float):
+        self.entries = entries
+        self.mtime = mtime
+        self.by_ticker: Dict[str, TickerEntry] = {}
+        self.by_cik: Dict[int, List[TickerEntry]] = defaultdict(list)
+        self.names: List[str] = []
+        self.trigram_counts: List[int] = []
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        for i, entry in enumerate(entries):
+            self.by_ticker.setdefault(entry.ticker, entry)
+            self.by_cik[entry.cik].append(entry)
+            name = normalize_name(entry.name)
+            grams = _trigrams(name)
+            self.names.append(name)
+            self.trigram_counts.append(len(grams))
+            for gram in grams:
+                self.postings[gram].append(i)
+
+class TickerIndex:
+    """
+    Offline ticker / CIK / company name resolution from the SEC `company_tickers.json` snapshot.
+
+    The snapshot is loaded on first use. Every `ticker_index_check_seconds` the file's mtime is
+    checked and the tables are rebuilt if it changed; a snapshot older than
+    `ticker_index_max_age_seconds` is re-downloaded from the SEC when the network allows it.
+    """
+    def __init__(self, path: str = ticker_index_path, url: Optional[str] = ticker_index_url):
+        self.path = path
+        self.url = url
+        self._snapshot: Optional[_Snapshot] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _download(self) -> None:
+        email = os.getenv("SEC_IDENTITY", "default@example.com")
+        response = requests.get(self.url, headers={"User-Agent": f"maxit {email}"}, timeout=30)
+        response.raise_for_status()
+        response.json()  # don't replace a good snapshot with an error page
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(response.content)
+        os.replace(tmp_path, self.path)
+
+    def _load(self) -> Optional[_Snapshot]:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return None
+        if self._snapshot is not None and self._snapshot.mtime == mtime:
+            return self._snapshot
+        with open(self.path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        records = raw.values() if isinstance(raw, dict) else raw
+        entries = [TickerEntry(str(r["ticker"]).upper(), int(r["cik_str"]), r["title"]) for r in records]
+        return _Snapshot(entries, mtime)
+
+    def _current(self) -> Optional[_Snapshot]:
+        now = time.monotonic()
+        # Also throttles retries when there is no snapshot and no network
+        if self._checked_at is not None and now - self._checked_at < ticker_index_check_seconds:
+            return self._snapshot
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < ticker_index_check_seconds:
+                return self._snapshot
+            self._checked_at = now
+            try:
+                stale = not os.path.exists(self.path) or \
+                    time.time() - os.path.getmtime(self.path) > ticker_index_max_age_seconds
+                if stale and self.url:
+                    self._download()
+            except (requests.RequestException, ValueError, OSError) as e:
+                print(f"⚠️ Warning: Could not refresh ticker snapshot from {self.url}: {e}")
+            try:
+                self._snapshot = self._load()
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Warning: Could not load ticker snapshot {self.path}: {e}")
+        return self._snapshot
+
+    def by_ticker(self, ticker: str) -> Optional[TickerEntry]:
+        snapshot = self._current()
+        return snapshot.by_ticker.get(ticker.strip().upper()) if snapshot else None
+
+    def by_cik(self, cik) -> List[TickerEntry]:
+        snapshot = self._current()
+        digits = re.sub(r"\D", "", str(cik))
+        return list(snapshot.by_cik.get(int(digits), [])) if snapshot and digits else []
+
+    def search_names(self, query: str, limit: int = 5, min_score: float = ticker_index_min_score) -> List[TickerEntry]:
+        """
+        Fuzzy company name search: trigram similarity of the normalized names, with exact and
+        prefix matches ranked first. For a company with several share classes, the first listed
+        ticker is returned.
+        """
+        snapshot = self._current()
+        name = normalize_name(query)
+        if not snapshot or not name:
+            return []
+        grams = _trigrams(name)
+        shared = defaultdict(int)
+        for gram in grams:
+            for i in snapshot.postings.get(gram, ()):
+                shared[i] += 1
+
+        scored = {}
+        for i, overlap in shared.items():
+            score = overlap / (len(grams) + snapshot.trigram_counts[i] - overlap)
+            candidate = snapshot.names[i]
+            if candidate == name:
+                score += 1.0
+            elif candidate.startswith(name + " "):
+                score += 0.5
+            if score < min_score:
+                continue
+            # One result per company: its best-scoring (then first listed) entry
+            cik = snapshot.entries[i].cik
+            if cik not in scored or (score, -i) > (scored[cik][0], -scored[cik][1]):
+                scored[cik] = (score, i)
+        best = sorted(scored.values(), key=lambda hit: (-hit[0], hit[1]))[:limit]
+        return [snapshot.entries[i] for _score, i in best]
+
+    def resolve(self, name_or_ticker: str) -> Optional[TickerEntry]:
+        """
+        Resolves a ticker ("MU"), a CIK ("CIK0000723125", "723125") or a company name
+        ("Micron Technology") to one entry.
+        """
+        text = name_or_ticker.strip()
+        if re.fullmatch(r"(?i)(cik)?\d{1,10}", text):
+            entries = self.by_cik(text)
+            if entries:
+                return entries[0]
+        matches = self.search_names(text, limit=1)
+        if matches and normalize_name(matches[0].name) == normalize_name(text):
+            return matches[0]
+        entry = self.by_ticker(text)
+        if entry is not None:
+            return entry
+        return matches[0] if matches else None
+
+_ticker_index = TickerIndex()
+
+def get_ticker_index() -> TickerIndex:
+    return _ticker_index
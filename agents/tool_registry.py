@@ -5,15 +5,25 @@ from agents.data_fetch_tools import (
     get_financial_statement, get_latest_10K_item_summary
 )
 from agents.generic_tools import web_search
-from agents.analysis_tools import run_peer_comparison
+from agents.analysis_tools import run_peer_comparison, compute_financial_ratios
 from agents.query_ar_index import query_ar_index
+from agents.single_flight import single_flight
+from agents.artifact_tools import (
+    store_large_results, read_artifact, slice_artifact, compute_ratios_from_artifacts
+)
 from langchain_community.tools.yahoo_finance_news import YahooFinanceNewsTool
 
 # Define the base tool list (functions and tool instances)
+# Tools whose results can be large return an artifact handle and a preview instead (see agents/artifact_tools.py).
+# Tools calling EDGAR, Finnhub or OpenAI share one execution between identical concurrent calls from
+# all sessions (see agents/single_flight.py); run_peer_comparison is left out, it streams to its caller.
 _base_tools = [
-    web_search, YahooFinanceNewsTool(), get_stock_price, get_analyst_rating_summary,
-    get_earnings, get_ticker_given_name, get_cik, get_latest_filings,
-    get_financial_statement, run_peer_comparison, get_latest_10K_item_summary #query_ar_index,
+    single_flight(web_search), YahooFinanceNewsTool(), single_flight(get_stock_price),
+    single_flight(get_analyst_rating_summary), single_flight(get_earnings), get_ticker_given_name, get_cik,
+    store_large_results(single_flight(get_latest_filings)), store_large_results(single_flight(get_financial_statement)),
+    run_peer_comparison, single_flight(compute_financial_ratios),
+    store_large_results(single_flight(get_latest_10K_item_summary)), #query_ar_index,
+    read_artifact, slice_artifact, compute_ratios_from_artifacts,
 ]
 
 def list_tools() -> str:
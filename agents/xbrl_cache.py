@@ -0,0 +1,140 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+import pandas as pd
+from edgar.xbrl.xbrl import XBRL
+from edgar.xbrl.stitching import XBRLS
+from agents.config import xbrl_cache_max_filings, xbrl_cache_max_statements
+
+# Maps the statement_type accepted by get_financial_statement to the XBRLS statements method
+STATEMENT_METHODS = {
+    "cashflow": "cashflow_statement",
+    "balance_sheet": "balance_sheet",
+    "income": "income_statement",
+}
+
+class _LRUCache:
+    """
+    Small thread-safe LRU map.
+    """
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self._items: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Optional[Any]:
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+_xbrl_by_accession = _LRUCache(xbrl_cache_max_filings)
+_statements = _LRUCache(xbrl_cache_max_statements)
+
+# One lock per accession number while it is being parsed, so concurrent callers (e.g. the income
+# and balance sheet fetches in gather_peer_data) wait for a single parse instead of parsing twice.
+# Each entry counts its users and is dropped when the last one is done.
+_parse_locks: Dict[str, List[Any]] = {}
+_parse_locks_guard = threading.Lock()
+
+@contextmanager
+def _parse_lock(accession_no: str):
+    with _parse_locks_guard:
+        entry = _parse_locks.setdefault(accession_no, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _parse_locks_guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _parse_locks[accession_no]
+
+def get_filing_xbrl(filing) -> Optional[XBRL]:
+    """
+    Returns the parsed XBRL for a filing, parsing it at most once per process.
+    """
+    xbrl = _xbrl_by_accession.get(filing.accession_no)
+    if xbrl is not None:
+        return xbrl
+    with _parse_lock(filing.accession_no):
+        xbrl = _xbrl_by_accession.get(filing.accession_no)
+        if xbrl is None:
+            xbrl = XBRL.from_filing(filing)
+            if xbrl is not None:
+                _xbrl_by_accession.put(filing.accession_no, xbrl)
+    return xbrl
+
+def _stitch_key(filings: List[Any]) -> Tuple[List[Any], Tuple[str, ...]]:
+    # Same ordering as XBRLS.from_filings: newest first
+    sorted_filings = sorted(filings, key=lambda f: str(f.filing_date), reverse=True)
+    return sorted_filings, tuple(f.accession_no for f in sorted_filings)
+
+def get_stitched_statement(filings: List[Any], statement_type: str) -> pd.DataFrame:
+    """
+    Returns a statement stitched across `filings` as a DataFrame.
+
+    Per-filing XBRL parses are shared across statement types and across filing sets, so the
+    income statement, balance sheet and cash flow for the same filings share one parse per
+    filing, and adding one more filing only parses that filing before re-stitching.
+
+    Args:
+        filings (List[Filing]): Filings of the same company and form.
+        statement_type (str): One of "cashflow", "balance_sheet", or "income".
+
+    Returns:
+        pd.DataFrame: Line items as rows and reporting periods as columns. A copy is
+        returned, so callers may modify it freely.
+
+    Raises:
+        ValueError: If the statement_type is invalid.
+    """
+    if statement_type not in STATEMENT_METHODS:
+        raise ValueError(f"Unsupported statement type: {statement_type}")
+
+    sorted_filings, accessions = _stitch_key(filings)
+    cached = _statements.get((accessions, statement_type))
+    if cached is not None:
+        return cached.copy()
+
+    xbrl_list = []
+    complete = True
+    for filing in sorted_filings:
+        try:
+            xbrl = get_filing_xbrl(filing)
+        except Exception as e:
+            xbrl = None
+            complete = False
+            print(f"Warning: Could not parse XBRL from filing {filing.accession_no}: {e}")
+        if xbrl is not None:
+            xbrl_list.append(xbrl)
+
+    xbs = XBRLS(xbrl_list)
+    stmt = getattr(xbs.statements, STATEMENT_METHODS[statement_type])()
+    df = stmt.to_dataframe()
+    # A stitch missing a filing that failed to parse (e.g. a transient EDGAR error) is returned
+    # but not cached, so the next call retries the parse
+    if complete:
+        _statements.put((accessions, statement_type), df)
+    return df.copy()
+
+def clear_xbrl_cache() -> None:
+    """
+    Drops all cached XBRL parses and stitched statements.
+    """
+    _xbrl_by_accession.clear()
+    _statements.clear()
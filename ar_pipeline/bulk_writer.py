@@ -0,0 +1,89 @@
+import statistics, threading, time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Iterable, List
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
+
+@dataclass
+class BulkWriteStats:
+    batches: int = 0
+    operations: int = 0
+    upserted: int = 0
+    modified: int = 0
+    errors: int = 0
+    # Latencies of the most recent batches only, so a long backfill doesn't grow this list
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+class BulkWriter:
+    """
+    Streams write operations to a collection as unordered `bulk_write` calls of `batch_size`.
+
+    Operations are pulled lazily from the iterable passed to `write`, so the writer itself holds
+    at most one batch of operations at a time. Because batches are unordered, a bad
+    document fails on its own: the rest of its batch is still written and the failure is
+    counted and returned to the caller.
+    """
+    def __init__(self, collection: Collection, batch_size: int = 500, name: str = ""):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.name = name or collection.name
+        self.stats = BulkWriteStats()
+        self._lock = threading.Lock()
+
+    def write(self, operations: Iterable) -> List[dict]:
+        """
+        Writes `operations` in batches and returns the write errors, if any.
+
+        Args:
+            operations (Iterable): pymongo write operations (UpdateOne, ReplaceOne, ...),
+                ideally a generator so documents are built as they are written.
+
+        Returns:
+            List[dict]: The `writeErrors` entries of the failed operations (empty on success).
+        """
+        errors, batch = [], []
+        for operation in operations:
+            batch.append(operation)
+            if len(batch) >= self.batch_size:
+                errors.extend(self._flush(batch))
+                batch = []
+        if batch:
+            errors.extend(self._flush(batch))
+        return errors
+
+    def _flush(self, batch: List) -> List[dict]:
+        start = time.perf_counter()
+        errors = []
+        try:
+            result = self.collection.bulk_write(batch, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            errors = details.get("writeErrors", [])
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.stats.batches += 1
+            self.stats.operations += len(batch)
+            self.stats.upserted += details.get("nUpserted", 0)
+            self.stats.modified += details.get("nModified", 0)
+            self.stats.errors += len(errors)
+            self.stats.latencies.append(elapsed)
+            batch_no = self.stats.batches
+        print(f"📝 {self.name} batch {batch_no}: {len(batch)} ops in {elapsed * 1000:.0f} ms"
+              + (f", {len(errors)} failed" if errors else ""))
+        return errors
+
+    def report(self) -> str:
+        stats = self.stats
+        if not stats.batches:
+            return f"{self.name}: no writes"
+        latencies = sorted(stats.latencies)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        return (
+            f"{self.name}: {stats.operations} ops in {stats.batches} batches "
+            f"({stats.upserted} upserted, {stats.modified} modified, {stats.errors} failed), "
+            f"latency p50 {statistics.median(latencies) * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms, "
+            f"max {latencies[-1] * 1000:.0f} ms"
+        )
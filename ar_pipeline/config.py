@@ -1,6 +1,15 @@
+import os
+
 tickers_to_ingest = ["MU"]#["MU","AVGO", "NVDA","AMD", "INTC", "VZ", "T"]
 form_types_to_ingest = ["10-K"]
 tenk_items_to_ingest = ["ITEM 1","ITEM 1A", "ITEM 1B", "ITEM 6", "ITEM 7","ITEM 7A" ]
 num_years_data_to_ingest = 2
 num_embeddings_dimensions = 1536
 
+# Ingestion pipeline: workers per stage and bounded queue size between stages
+fetch_workers = 4 #threads downloading filing indexes and documents
+parse_processes = max(1, (os.cpu_count() or 2) - 1) #processes for 10-K parsing and text splitting
+summarize_concurrency = 8 #concurrent LLM summary calls
+embed_concurrency = 4 #concurrent embedding calls
+stage_queue_size = 32 #max items waiting between two stages
+chunk_write_batch_size = 200 #chunk upserts per bulk_write (each carries a 1536-float embedding)
@@ -0,0 +1,38 @@
+import argparse, os, time
+from dotenv import load_dotenv
+from agents.clients import get_mongo_client
+from agents.retrieval import LocalVectorIndex, FILTER_COLUMNS
+from agents.quantization import STORAGE_DTYPES
+from agents.config import local_index_dir, local_index_storage, local_index_ivf_lists
+from config import num_embeddings_dimensions
+
+# Builds the local vector index (agents/retrieval.py) from all_filing_chunks.
+# Query it by setting RETRIEVAL_BACKEND=local.
+
+def main():
+    parser = argparse.ArgumentParser(description="Export all_filing_chunks into a local vector index.")
+    parser.add_argument("--dir", default=local_index_dir, help="Index directory (default: local_index_dir in agents/config.py)")
+    parser.add_argument("--storage", choices=STORAGE_DTYPES, default=local_index_storage,
+                        help="Matrix dtype; float16 and int8 shrink the index 2x and 4x")
+    parser.add_argument("--ivf-lists", type=int, default=local_index_ivf_lists,
+                        help="IVF clusters for approximate search; 0 builds an exact-search index only")
+    args = parser.parse_args()
+
+    load_dotenv()
+    start_time = time.time()
+    collection = get_mongo_client("MONGO_URI_LOCAL")["filingdb"]["all_filing_chunks"]
+    projection = {"_id": 0, "embedding": 1, "embedding_dtype": 1, "embedding_scale": 1, "chunk": 1,
+                  **{name: 1 for name in FILTER_COLUMNS}}
+    # Sorted so rows of one filing are contiguous in the matrix and filtered scans read adjacent pages
+    cursor = collection.find({}, projection, batch_size=1000).sort(
+        [("ticker", 1), ("filingdate", 1), ("item_code", 1)]
+    )
+
+    index = LocalVectorIndex.build(cursor, args.dir, num_embeddings_dimensions, storage=args.storage,
+                                   ivf_lists=args.ivf_lists)
+    size_mb = sum(os.path.getsize(os.path.join(args.dir, name)) for name in os.listdir(args.dir)) / 2**20
+    print(f"✅ Indexed {index.count} chunks into {args.dir} ({size_mb:.1f} MB, {index.storage}, ivf_lists={index.info['ivf_lists']}) "
+          f"in {time.time() - start_time:.2f} seconds.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.collection import Collection
+from pymongo.database import Database
+
+STATUS_IN_PROGRESS = "in_progress"
+STATUS_COMPLETE = "complete"
+
+class FilingCatalog:
+    """
+    One document per ingested filing (keyed by accession number) with its ticker, form, filing
+    date, ingestion status, item coverage and chunk counts.
+
+    Ingestion checkpoints each item here (with its structured summary) as soon as its chunks are
+    stored, so an interrupted run resumes with the missing items only, and filings that are
+    complete are skipped before anything is downloaded. Readers use it instead of scanning
+    all_filing_chunks: the latest filing of a ticker and per-filing coverage are indexed reads.
+    """
+    def __init__(self, collection: Collection):
+        self.collection = collection
+
+    def ensure_indexes(self) -> None:
+        # Latest complete filing of a ticker: equality on (ticker, form, status), then sorted by date
+        self.collection.create_index(
+            [("ticker", ASCENDING), ("form", ASCENDING), ("status", ASCENDING), ("filingdate", DESCENDING)],
+            name="catalog_latest"
+        )
+        # Coverage reports: all filings of a ticker by date
+        self.collection.create_index(
+            [("ticker", ASCENDING), ("form", ASCENDING), ("filingdate", ASCENDING)], name="catalog_coverage"
+        )
+        self.collection.create_index([("status", ASCENDING), ("ticker", ASCENDING)], name="catalog_status")
+
+    def adopt_legacy_manifest(self, db: Database, legacy_name: str = "ingestion_manifest") -> int:
+        """
+        Copies the documents of the former ingestion manifest into an empty catalog, adding the
+        item coverage and chunk totals. Returns the number of filings copied.
+        """
+        if legacy_name not in db.list_collection_names() or self.collection.estimated_document_count():
+            return 0
+        copied = 0
+        for doc in db[legacy_name].find():
+            items = doc.get("items", {})
+            doc.update(accession_no=doc["_id"], item_codes=sorted(items),
+                       chunk_count=sum(item.get("chunk_count", 0) for item in items.values()))
+            self.collection.replace_one({"_id": doc["_id"]}, doc, upsert=True)
+            copied += 1
+        return copied
+
+    def completed_accessions(self, accession_nos: Iterable[str]) -> Set[str]:
+        cursor = self.collection.find(
+            {"_id": {"$in": list(accession_nos)}, "status": STATUS_COMPLETE}, {"_id": 1}
+        )
+        return {doc["_id"] for doc in cursor}
+
+    def get(self, accession_no: str) -> Optional[Dict]:
+        return self.collection.find_one({"_id": accession_no})
+
+    def items_done(self, accession_no: str) -> Set[str]:
+        doc = self.collection.find_one({"_id": accession_no}, {"item_codes": 1})
+        return set((doc or {}).get("item_codes", []))
+
+    def record_item(self, ticker: str, form: str, filingdate: str, accession_no: str, item_code: str,
+                    item_summary: Dict, chunk_count: int) -> Dict:
+        """
+        Marks one item of a filing as stored and returns the updated catalog document.
+        """
+        now = datetime.now(timezone.utc)
+        return self.collection.find_one_and_update(
+            {"_id": accession_no},
+            {
+                "$set": {f"items.{item_code}": {"summary": item_summary, "chunk_count": chunk_count},
+                         "updated_at": now},
+                "$addToSet": {"item_codes": item_code},
+                "$setOnInsert": {"ticker": ticker, "form": form, "filingdate": filingdate,
+                                 "accession_no": accession_no, "status": STATUS_IN_PROGRESS, "started_at": now},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def mark_complete(self, accession_no: str, chunk_count: int) -> None:
+        self.collection.update_one(
+            {"_id": accession_no},
+            {"$set": {"status": STATUS_COMPLETE, "chunk_count": chunk_count,
+                      "completed_at": datetime.now(timezone.utc)}},
+        )
+
+    def in_progress(self) -> List[Dict]:
+        return list(self.collection.find({"status": STATUS_IN_PROGRESS}, {"items": 0}))
+
+    def latest(self, ticker: str, form: str) -> Optional[Dict]:
+        return self.collection.find_one(
+            {"ticker": ticker, "form": form, "status": STATUS_COMPLETE}, {"items": 0},
+            sort=[("filingdate", DESCENDING)]
+        )
+
+    def coverage(self, ticker: str, form: str) -> List[Dict]:
+        """
+        Every cataloged filing of `ticker`, oldest first, without the item summaries.
+        """
+        return list(self.collection.find({"ticker": ticker, "form": form}, {"items": 0},
+                                         sort=[("filingdate", ASCENDING)]))
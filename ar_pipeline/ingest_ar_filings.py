@@ -1,26 +1,66 @@
 from agents.data_fetch_tools import get_latest_filings
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-import os, time
+from agents.filing_cache import get_filing_html, get_tenk_item_texts
+from edgar.company_reports import TenK
+from agents.clients import get_chat_model, get_mongo_client
+from agents.core_utils import SUMMARY_PROMPT_VERSION
+from agents.embedding_cache import CachedEmbedder, get_embedding_cache
+from agents.embedding_batcher import EmbeddingBatcher
+from agents.quantization import encode_embedding
+from agents.config import embedding_storage, embedding_model
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+import argparse, asyncio, hashlib, multiprocessing, time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from dotenv import load_dotenv
-from pymongo import MongoClient
 from agents.schemas import FilingItemSummary, FilingSummary, FilingChunks, LLMGeneratedFilingItemSummary
 from constants import REQUIRED_KEY_VALUES
-from typing import List
-from config import tickers_to_ingest, form_types_to_ingest, tenk_items_to_ingest, num_years_data_to_ingest
-
-def generate_filing__item_structured_summary_and_chunks(
-    ticker: str,
-    filingdate: str,
-    form: str,
-    item_code: str,
-    title: str,
-    description: str,
+from typing import Any, Dict, List, Optional
+from pymongo import ASCENDING, ReplaceOne, UpdateOne
+from pipeline import Pipeline, Stage, format_stage_report
+from filing_catalog import FilingCatalog
+from bulk_writer import BulkWriter
+from config import (
+    tickers_to_ingest, form_types_to_ingest, tenk_items_to_ingest, num_years_data_to_ingest,
+    fetch_workers, parse_processes, summarize_concurrency, embed_concurrency, stage_queue_size,
+    chunk_write_batch_size
+)
+
+@dataclass
+class FilingJob:
+    ticker: str
+    form: str
+    filing: Any
+
+    def __repr__(self):
+        return f"FilingJob({self.ticker}, {self.form}, {getattr(self.filing, 'report_date', None)})"
+
+@dataclass
+class ItemJob:
+    ticker: str
+    form: str
+    filing: Any
+    item_code: str
+    title: str
+    description: str
     item_txt: str
-) -> tuple[FilingItemSummary, List[FilingChunks]]:
-    
-    # 1. Structured summary via LLM
-    llm = ChatOpenAI(model="gpt-4o")
+    summary: Optional[FilingItemSummary] = None
+    chunks_written: int = 0
+    write_failed: bool = False
+
+    def __repr__(self):
+        return f"ItemJob({self.ticker}, {self.filing.report_date}, {self.item_code})"
+
+@dataclass
+class ChunkBatch:
+    # Up to chunk_write_batch_size embedded chunks of one item, in order; `last` closes the item
+    job: ItemJob
+    chunks: List[FilingChunks]
+    last: bool
+
+    def __repr__(self):
+        return f"ChunkBatch({self.job!r}, {len(self.chunks)} chunks{', last' if self.last else ''})"
+
+def build_item_summary_prompt(item_code: str, title: str, description: str, item_txt: str) -> str:
     required_keys = REQUIRED_KEY_VALUES.get(item_code.upper(), [])
     required_key_text = (
         "- Try to extract the following key-value pairs if available:\n" +
@@ -28,7 +68,7 @@ def generate_filing__item_structured_summary_and_chunks(
         if required_keys else ""
     )
 
-    prompt = (
+    return (
         f"You are a financial analyst assistant. Read the following text from {title} ({item_code}) "
         "of a 10-K filing. Extract and populate the following structured format:\n\n"
         f"{description}\n\n"
@@ -39,90 +79,251 @@ def generate_filing__item_structured_summary_and_chunks(
         f"TEXT:\n{item_txt}"
     )
 
-    structured_llm = llm.with_structured_output(LLMGeneratedFilingItemSummary)
-    llmgen_summary = structured_llm.invoke(prompt)
+# CPU-bound steps. These run in the process pool, so they must stay top-level functions.
+def parse_filing_items(filing, item_codes: List[str]) -> Dict[str, str]:
+    return get_tenk_item_texts(filing, item_codes)
+
+def split_item_text(item_txt: str) -> List[str]:
+    splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=100)
+    return splitter.split_text(item_txt)
+
+def chunk_hash(chunk: str) -> str:
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
 
-    # Assemble full FilingItemSummary
-    full_summary = FilingItemSummary(
-        item_code=item_code,
-        title=title,
-        description=description,
-        summary=llmgen_summary.summary,
-        key_values=llmgen_summary.key_values
+def ensure_ingestion_indexes(collection_filing_summary, collection_filing_chunks) -> None:
+    """
+    Unique indexes backing the upsert keys. Partial, so documents stored before accession
+    numbers were recorded don't collide.
+    """
+    has_accession = {"accession_no": {"$exists": True}}
+    collection_filing_summary.create_index(
+        [("ticker", ASCENDING), ("accession_no", ASCENDING)],
+        unique=True, partialFilterExpression=has_accession, name="filing_summary_key"
+    )
+    collection_filing_chunks.create_index(
+        [("ticker", ASCENDING), ("accession_no", ASCENDING), ("item_code", ASCENDING), ("chunk_hash", ASCENDING)],
+        unique=True, partialFilterExpression=has_accession, name="filing_chunk_key"
     )
 
-    # 2. Chunk and embed the raw text
-    splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=100)
-    embedder = OpenAIEmbeddings(model="text-embedding-ada-002")
-    chunks = splitter.split_text(item_txt)
-    vectors = embedder.embed_documents(chunks)
+class FilingIngestion:
+    """
+    The stages of the ingestion pipeline:
+
+        fetch → parse → summarize → chunk+embed → write
+
+    fetch downloads filing indexes and documents on threads, parse and text splitting run in a
+    process pool, summaries and embeddings are concurrent async API calls, and each item's chunks are
+    embedded and upserted one write batch at a time.
+
+    Ingestion is incremental: every item is checkpointed in the filing catalog once stored, filings
+    already complete are skipped before download, and a filing interrupted half way only
+    re-processes its missing items. All writes are upserts, so re-running is idempotent.
+    """
+    def __init__(self, items_of_interest: List[str], n_filings: int, collection_filing_summary, collection_filing_chunks,
+                 catalog: FilingCatalog):
+        self.items_of_interest = items_of_interest
+        self.n_filings = n_filings
+        self.collection_filing_summary = collection_filing_summary
+        self.collection_filing_chunks = collection_filing_chunks
+        self.catalog = catalog
+        self.chunk_writer = BulkWriter(collection_filing_chunks, batch_size=chunk_write_batch_size)
+        self.pipeline: Optional[Pipeline] = None
+        self.llm = get_chat_model("gpt-4o").with_structured_output(LLMGeneratedFilingItemSummary)
+        # Chunks already embedded (e.g. boilerplate repeated across years) come from the embedding cache;
+        # the rest are packed across items and filings into token-sized embeddings requests
+        self.batcher = EmbeddingBatcher(embedding_model)
+        self.embedder = CachedEmbedder(embedding_model, get_embedding_cache(), embeddings=self.batcher)
+        self.filings_written = 0
+        self.filings_skipped = 0
+
+    def build_pipeline(self, process_pool) -> Pipeline:
+        self.pipeline = Pipeline([
+            Stage("fetch", self.fetch, workers=fetch_workers),
+            Stage("parse", self.parse, workers=parse_processes),
+            Stage("summarize", self.summarize, workers=summarize_concurrency),
+            Stage("chunk_embed", self.chunk_and_embed, workers=embed_concurrency),
+            Stage("write", self.write, workers=1),
+        ], queue_size=stage_queue_size, process_pool=process_pool)
+        return self.pipeline
 
-    filing_chunks = [
-        FilingChunks(
+    async def run(self, jobs) -> List:
+        try:
+            return await self.pipeline.run(jobs)
+        finally:
+            await self.batcher.aclose()
+
+    async def fetch(self, job: FilingJob) -> List[FilingJob]:
+        # get the last n ARs, and make sure their documents are in the on-disk filing cache
+        filings = await asyncio.to_thread(get_latest_filings, job.ticker, job.form, self.n_filings, False)
+        completed = await asyncio.to_thread(self.catalog.completed_accessions, [f.accession_no for f in filings])
+        new_filings = [f for f in filings if f.accession_no not in completed]
+        self.filings_skipped += len(filings) - len(new_filings)
+        for filing in new_filings:
+            await asyncio.to_thread(get_filing_html, filing)
+        return [FilingJob(job.ticker, job.form, filing) for filing in new_filings]
+
+    async def parse(self, job: FilingJob) -> List[ItemJob]:
+        items_done = await asyncio.to_thread(self.catalog.items_done, job.filing.accession_no)
+        if not items_done:
+            # First attempt at this filing: drop copies stored before accession numbers were recorded
+            legacy = {"ticker": job.ticker, "form": job.form, "filingdate": job.filing.report_date,
+                      "accession_no": {"$exists": False}}
+            await asyncio.to_thread(self.collection_filing_summary.delete_many, legacy)
+            await asyncio.to_thread(self.collection_filing_chunks.delete_many, legacy)
+
+        missing = [code for code in self.items_of_interest if code not in items_done]
+        if not missing:
+            # Interrupted after the last item was checkpointed: only the filing summary is left
+            catalog_doc = await asyncio.to_thread(self.catalog.get, job.filing.accession_no)
+            await asyncio.to_thread(self._complete_filing, job.ticker, job.form, job.filing, catalog_doc)
+            return []
+
+        item_texts = await self.pipeline.run_in_processes(parse_filing_items, job.filing, missing)
+        item_jobs = []
+        for item_code in missing:
+            tenk_item = TenK.structure.get_item(item_code)
+            item_jobs.append(ItemJob(job.ticker, job.form, job.filing, item_code,
+                                     tenk_item["Title"], tenk_item["Description"], item_texts[item_code]))
+        return item_jobs
+
+    async def summarize(self, job: ItemJob) -> List[ItemJob]:
+        prompt = build_item_summary_prompt(job.item_code, job.title, job.description, job.item_txt)
+        llmgen_summary = await self.llm.ainvoke(prompt)
+        job.summary = FilingItemSummary(
+            item_code=job.item_code,
+            title=job.title,
+            description=job.description,
+            summary=llmgen_summary.summary,
+            key_values=llmgen_summary.key_values
+        )
+        return [job]
+
+    async def chunk_and_embed(self, job: ItemJob):
+        chunks = await self.pipeline.run_in_processes(split_item_text, job.item_txt)
+        # The raw text is no longer needed; don't keep it alive while the filing completes
+        job.item_txt = ""
+        # Embedded and handed to the write stage one write batch at a time, so only the batches in
+        # flight hold FilingChunks and their embeddings (an item without text still sends one, empty)
+        for start in range(0, max(len(chunks), 1), chunk_write_batch_size):
+            texts = chunks[start:start + chunk_write_batch_size]
+            vectors = await self.embedder.aembed_documents(texts) if texts else []
+            yield ChunkBatch(job, [
+                FilingChunks(
+                    ticker=job.ticker,
+                    filingdate=job.filing.report_date,
+                    form=job.form,
+                    accession_no=job.filing.accession_no,
+                    item_code=job.item_code,
+                    chunk=chunk,
+                    chunk_hash=chunk_hash(chunk),
+                    **encode_embedding(vector, embedding_storage)
+                )
+                for chunk, vector in zip(texts, vectors)
+            ], last=start + chunk_write_batch_size >= len(chunks))
+
+    @staticmethod
+    def _chunk_upserts(chunks: List[FilingChunks]):
+        # Generator: each document is only built when its batch is written
+        for chunk in chunks:
+            doc = chunk.model_dump()
+            key = {"ticker": doc["ticker"], "accession_no": doc["accession_no"],
+                   "item_code": doc["item_code"], "chunk_hash": doc["chunk_hash"]}
+            yield UpdateOne(key, {"$set": doc}, upsert=True)
+
+    async def write(self, batch: ChunkBatch) -> None:
+        job = batch.job
+        errors = await asyncio.to_thread(self.chunk_writer.write, self._chunk_upserts(batch.chunks))
+        if errors:
+            # Leave the item uncheckpointed so the next run retries it
+            job.write_failed = True
+            raise RuntimeError(f"{len(errors)} of {len(batch.chunks)} chunks failed to write, first: {errors[0].get('errmsg')}")
+        job.chunks_written += len(batch.chunks)
+        # The write stage has one worker, so an item's batches arrive in order and `last` comes last
+        if not batch.last:
+            return None
+        if job.write_failed:
+            raise RuntimeError(f"Not checkpointing {job!r}: an earlier chunk batch failed to write")
+        chunk_count = job.chunks_written
+
+        # Checkpoint the item; the catalog document returned tells whether the filing is now complete
+        catalog_doc = await asyncio.to_thread(
+            self.catalog.record_item, job.ticker, job.form, job.filing.report_date, job.filing.accession_no,
+            job.item_code, job.summary.model_dump(), chunk_count
+        )
+        if all(code in catalog_doc.get("items", {}) for code in self.items_of_interest):
+            await asyncio.to_thread(self._complete_filing, job.ticker, job.form, job.filing, catalog_doc)
+        return None
+
+    def _complete_filing(self, ticker: str, form: str, filing, catalog_doc: Dict) -> None:
+        items = catalog_doc["items"]
+        filing_summary = FilingSummary(
             ticker=ticker,
-            filingdate=filingdate,
+            filingdate=filing.report_date,
             form=form,
-            item_code=item_code,
-            chunk=chunk,
-            embedding=vector
+            accession_no=filing.accession_no,
+            prompt_version=SUMMARY_PROMPT_VERSION,
+            filingitemsummaries=[FilingItemSummary(**items[code]["summary"]) for code in self.items_of_interest]
         )
-        for chunk, vector in zip(chunks, vectors)
-    ]
-
-    return full_summary, filing_chunks
+        # Save to MongoDB
+        self.collection_filing_summary.bulk_write([ReplaceOne(
+            {"ticker": ticker, "accession_no": filing.accession_no}, filing_summary.model_dump(), upsert=True
+        )])
+        chunk_count = sum(items[code]["chunk_count"] for code in self.items_of_interest)
+        self.catalog.mark_complete(filing.accession_no, chunk_count)
+        self.filings_written += 1
+        print(f"💾 Stored {ticker} {form} {filing.report_date}: {len(self.items_of_interest)} items, {chunk_count} chunks")
 
 def main():
+    parser = argparse.ArgumentParser(description="Ingest 10-K filings into MongoDB (incremental and resumable).")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Delete all stored summaries, chunks and the filing catalog, then ingest from scratch.")
+    args = parser.parse_args()
 
     start_time = time.time()
     load_dotenv()
     tickers = tickers_to_ingest
     form_type = form_types_to_ingest[0] # Just AR for now
     items_of_interest = tenk_items_to_ingest
-       
-    conn_string = os.getenv("MONGO_URI_LOCAL")
 
     # Connect to MongoDB
-    client = MongoClient(conn_string)
+    client = get_mongo_client("MONGO_URI_LOCAL")
     db = client["filingdb"]
     collection_filing_summary = db["all_filing_summaries"]
     collection_filing_chunks = db["all_filing_chunks"]
+    catalog = FilingCatalog(db["filing_catalog"])
 
+    if args.rebuild:
+        collection_filing_summary.delete_many({})
+        collection_filing_chunks.delete_many({})
+        catalog.collection.delete_many({})
+        db.drop_collection("ingestion_manifest")
 
-    # Clear old data (optional, for testing)
-    collection_filing_summary.delete_many({})
-    collection_filing_chunks.delete_many({})
-
-    for ticker in tickers: 
-        #get the last n ARs
-        filings = get_latest_filings(ticker, form_type, n=num_years_data_to_ingest, as_text=False)
-        # for each AR 
-        for filing in filings:
-            tenk = filing.obj()
-            filing_item_summaries = []
-            all_chunk_docs = []
-            for item_code in items_of_interest:
-                tenk_item = tenk.structure.get_item(item_code)
-                title = tenk_item["Title"]
-                description = tenk_item["Description"]
-                item_txt = str(tenk[item_code])
-                filing_item_summary, chunk_docs = generate_filing__item_structured_summary_and_chunks(ticker, filing.report_date, form_type, item_code, title, description,item_txt)
-                filing_item_summaries.append(filing_item_summary)
-                all_chunk_docs.extend(chunk_docs)
-        
-            filing_summary = FilingSummary(
-                    ticker=ticker,
-                    filingdate=filing.report_date,
-                    form=form_type,
-                    filingitemsummaries=filing_item_summaries
-            )
-        # Save to MongoDB
-            collection_filing_summary.insert_one(filing_summary.model_dump())
-            collection_filing_chunks.insert_many([chunk.model_dump() for chunk in all_chunk_docs])
+    ensure_ingestion_indexes(collection_filing_summary, collection_filing_chunks)
+    catalog.ensure_indexes()
+    adopted = catalog.adopt_legacy_manifest(db)
+    if adopted:
+        print(f"🧾 Filing catalog: adopted {adopted} filings from ingestion_manifest")
+
+    ingestion = FilingIngestion(items_of_interest, num_years_data_to_ingest, collection_filing_summary, collection_filing_chunks,
+                                catalog)
+    # spawn (not fork): the parent already holds client threads and connection pools
+    with ProcessPoolExecutor(max_workers=parse_processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pipeline = ingestion.build_pipeline(pool)
+        stats = asyncio.run(ingestion.run(FilingJob(ticker, form_type, None) for ticker in tickers))
 
+    print("\n📊 Stage throughput:")
+    print(format_stage_report(stats))
+    print(f"📝 {ingestion.chunk_writer.report()}")
+    batches = ingestion.batcher.stats
+    print(f"🧮 Embeddings: {batches['inputs']} chunks ({batches['tokens']} tokens) in {batches['requests']} requests, "
+          f"{batches['retries']} retries; {ingestion.embedder.stats['hits']} cache hits")
+    incomplete = [f"{doc['ticker']} {doc['filingdate']}" for doc in catalog.in_progress()]
+    if incomplete:
+        print(f"⚠️ Warning: Incomplete filings, re-run to resume them: {incomplete}")
 
     end_time = time.time()
     elapsed_seconds = end_time - start_time
-    print(f"\n✅ Script completed in {elapsed_seconds:.2f} seconds.")
+    print(f"\n✅ Script completed in {elapsed_seconds:.2f} seconds. {ingestion.filings_written} filings stored, {ingestion.filings_skipped} already up to date.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
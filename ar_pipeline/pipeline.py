@@ -0,0 +1,145 @@
+import asyncio, inspect, time, traceback
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+
+# Marks the end of the stream on a stage's input queue
+_DONE = object()
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    processed: int = 0
+    emitted: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    first_start: Optional[float] = None
+    last_end: Optional[float] = None
+
+    @property
+    def active_seconds(self) -> float:
+        if self.first_start is None or self.last_end is None:
+            return 0.0
+        return self.last_end - self.first_start
+
+    @property
+    def throughput(self) -> float:
+        return self.processed / self.active_seconds if self.active_seconds else 0.0
+
+@dataclass
+class Stage:
+    """
+    One step of a Pipeline.
+
+    `func` is an async function taking one input item and returning an iterable of output
+    items for the next stage (or None), or an async generator yielding them, in which case each
+    output is handed downstream as soon as it is produced. `workers` copies of it run concurrently, so the stage's
+    parallelism is set independently of the others. CPU-bound work should be pushed to a
+    process pool from inside `func` (see Pipeline.run_in_processes).
+    """
+    name: str
+    func: Callable[[Any], Awaitable[Optional[Iterable[Any]]]]
+    workers: int = 1
+    stats: StageStats = field(init=False)
+
+    def __post_init__(self):
+        self.stats = StageStats(self.name, self.workers)
+
+class Pipeline:
+    """
+    Runs items through a chain of stages connected by bounded asyncio queues.
+
+    Each stage has its own worker pool and a bounded input queue, so a slow stage applies
+    back-pressure to the ones before it instead of letting work pile up in memory. A failing
+    item is logged and counted in its stage's stats; it doesn't stop the run.
+    """
+    def __init__(self, stages: List[Stage], queue_size: int = 32, process_pool=None):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.process_pool = process_pool
+
+    async def run_in_processes(self, func: Callable, *args) -> Any:
+        """
+        Runs `func(*args)` on the pipeline's process pool (or a thread if there is none).
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.process_pool, func, *args)
+
+    async def _emit(self, stats: StageStats, outbox: Optional[asyncio.Queue], output: Any) -> None:
+        stats.emitted += 1
+        if outbox is not None:
+            await outbox.put(output)
+
+    async def _worker(self, stage: Stage, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue]):
+        stats = stage.stats
+        streaming = inspect.isasyncgenfunction(stage.func)
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            start = time.perf_counter()
+            stats.first_start = stats.first_start or start
+            outputs = None
+            try:
+                if streaming:
+                    async for output in stage.func(item):
+                        stats.busy_seconds += time.perf_counter() - start
+                        await self._emit(stats, outbox, output)
+                        start = time.perf_counter()
+                else:
+                    outputs = await stage.func(item)
+            except Exception as e:
+                stats.errors += 1
+                print(f"❌ Stage '{stage.name}' failed on {item!r}: {e}")
+                traceback.print_exc()
+                outputs = None
+            else:
+                stats.processed += 1
+            finally:
+                # Busy time covers the work itself, not time blocked on a full downstream queue
+                end = time.perf_counter()
+                stats.busy_seconds += end - start
+                stats.last_end = end
+            for output in outputs or []:
+                await self._emit(stats, outbox, output)
+
+    async def _run_stage(self, stage: Stage, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue], next_workers: int):
+        await asyncio.gather(*(self._worker(stage, inbox, outbox) for _ in range(stage.workers)))
+        # All workers of this stage are done: tell every worker of the next stage to stop
+        if outbox is not None:
+            for _ in range(next_workers):
+                await outbox.put(_DONE)
+
+    async def run(self, inputs: Iterable[Any]) -> List[StageStats]:
+        """
+        Feeds `inputs` to the first stage and waits until every stage has drained.
+
+        Returns:
+            List[StageStats]: Per-stage counters and timings.
+        """
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        runners = []
+        for i, stage in enumerate(self.stages):
+            outbox = queues[i + 1] if i + 1 < len(self.stages) else None
+            next_workers = self.stages[i + 1].workers if outbox is not None else 0
+            runners.append(asyncio.create_task(self._run_stage(stage, queues[i], outbox, next_workers)))
+
+        for item in inputs:
+            await queues[0].put(item)
+        for _ in range(self.stages[0].workers):
+            await queues[0].put(_DONE)
+
+        await asyncio.gather(*runners)
+        return [stage.stats for stage in self.stages]
+
+def format_stage_report(stats: List[StageStats]) -> str:
+    """
+    Formats per-stage throughput as a small text table.
+    """
+    lines = [f"{'stage':<12}{'workers':>8}{'done':>8}{'out':>8}{'errors':>8}{'busy s':>10}{'active s':>10}{'items/s':>10}"]
+    for s in stats:
+        lines.append(
+            f"{s.name:<12}{s.workers:>8}{s.processed:>8}{s.emitted:>8}{s.errors:>8}"
+            f"{s.busy_seconds:>10.1f}{s.active_seconds:>10.1f}{s.throughput:>10.2f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,8 @@
+import os, sys
+
+# The agents package is imported as `agents.x`, while the LangGraph entry points (agent.py) and
+# the ar_pipeline scripts import their siblings directly
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "agents"), os.path.join(ROOT, "ar_pipeline")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,70 @@
+import os
+import pandas as pd
+import pytest
+import agents.artifact_store as artifact_store
+import agents.artifact_tools as artifact_tools
+from agents.artifact_store import ArtifactStore
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    store = ArtifactStore(max_entries=2, max_bytes=10**6, spill_dir=str(tmp_path))
+    monkeypatch.setattr(artifact_tools, "get_artifact_store", lambda: store)
+    return store
+
+def test_evicted_artifacts_are_spilled_and_loaded_back(store, tmp_path):
+    first = store.put("a" * 100, "get_latest_filings")
+    store.put("b" * 100, "get_latest_filings")
+    store.put("c" * 100, "get_latest_filings")
+    assert os.listdir(tmp_path) == [f"{first.handle}.pkl"]
+    assert store.get(f"'{first.handle}'").value == "a" * 100
+    assert store.stats["disk_hits"] == 1 and store.stats["spilled"] == 2  # loading it evicted another
+
+def test_unknown_and_malformed_handles_are_misses(store):
+    with pytest.raises(KeyError):
+        store.get("art-get_latest_filings-000000000000")
+    with pytest.raises(KeyError):
+        store.get("../../etc/passwd")
+    assert store.stats["misses"] == 2
+
+def test_spilled_artifacts_expire(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_store, "artifact_spill_ttl_seconds", -1)
+    first = store.put("a", "tool")
+    for _ in range(3):
+        store.put("x", "tool")
+    with pytest.raises(KeyError):
+        store.get(first.handle)
+
+def test_large_results_are_replaced_by_a_preview(store, monkeypatch):
+    monkeypatch.setattr(artifact_tools, "artifact_min_chars", 50)
+
+    def get_filing_text(ticker: str, item: str = "ITEM 7") -> str:
+        """Returns a 10-K item."""
+        return f"{ticker} {item} " + "text " * 100
+
+    wrapped = artifact_tools.store_large_results(get_filing_text)
+    assert wrapped.__name__ == "get_filing_text" and "handle" in wrapped.__doc__
+    preview = wrapped("NVDA")
+    assert preview.startswith("[artifact art-get_filing_text-") and "item='ITEM 7'" in preview
+    handle = preview.split()[1].rstrip("]")
+    assert artifact_tools.read_artifact(handle, offset=5, length=6) == \
+        f"[artifact {handle}: characters 5-11 of 512]\nITEM 7"
+    assert artifact_tools.store_large_results(lambda: "short")() == "short"
+
+def test_tables_are_sliced_without_refetching(store):
+    df = pd.DataFrame({"label": ["Revenue", "Net Income", "Total Assets"],
+                       "2025-01-26": [130.5, 72.9, 111.6], "2024-01-28": [60.9, 29.8, 65.7]})
+    handle = store.put(df, "get_financial_statement").handle
+    table = artifact_tools.slice_artifact(handle, rows=["revenue", "net income"], columns=["2025"])
+    assert table.split() == ["label", "2025-01-26", "Revenue", "130.5", "Net", "Income", "72.9"]
+    assert "No rows" in artifact_tools.slice_artifact(handle, rows=["goodwill"])
+    assert artifact_tools.slice_artifact("art-nope-000000000000") == \
+        "Unknown or expired artifact handle: art-nope-000000000000"
+
+def test_ratios_are_computed_from_statement_artifacts(store):
+    income = pd.DataFrame({"concept": ["us-gaap_Revenues", "us-gaap_GrossProfit"], "label": ["Revenue", "Gross Profit"],
+                           "2025-01-26": [130e9, 97.5e9]})
+    handle = store.put(income, "get_financial_statement", {"ticker": "nvda", "statement_type": "income"}).handle
+    text = store.put("notes", "get_latest_filings").handle
+    table = artifact_tools.compute_ratios_from_artifacts([handle, text])
+    assert "| NVDA | FY2025 | 75.0% |" in table
+    assert f"Skipped: {text} is not an income statement or balance sheet" in table
@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from bulk_writer import BulkWriter
+
+class FakeCollection:
+    name = "all_filing_chunks"
+
+    def __init__(self, failing_ids=()):
+        self.batches = []
+        self.failing_ids = set(failing_ids)
+
+    def bulk_write(self, batch, ordered=True):
+        assert ordered is False
+        self.batches.append(len(batch))
+        errors = [{"index": i, "errmsg": "duplicate key"} for i, op in enumerate(batch)
+                  if op._filter["_id"] in self.failing_ids]
+        result = {"nUpserted": len(batch) - len(errors), "nModified": 0, "writeErrors": errors}
+        if errors:
+            raise BulkWriteError(result)
+        return SimpleNamespace(bulk_api_result=result)
+
+def _operations(n, pulled):
+    for i in range(n):
+        pulled.append(i)
+        yield UpdateOne({"_id": i}, {"$set": {"chunk": f"chunk {i}"}}, upsert=True)
+
+def test_operations_are_written_in_batches_as_they_are_pulled():
+    collection, pulled = FakeCollection(), []
+    writer = BulkWriter(collection, batch_size=4)
+    assert writer.write(_operations(10, pulled)) == []
+    assert collection.batches == [4, 4, 2]
+    assert (writer.stats.batches, writer.stats.operations, writer.stats.upserted) == (3, 10, 10)
+    assert "10 ops in 3 batches" in writer.report()
+
+def test_failed_operations_are_returned_and_the_rest_written():
+    collection = FakeCollection(failing_ids={5})
+    writer = BulkWriter(collection, batch_size=4)
+    errors = writer.write(_operations(8, []))
+    assert [error["errmsg"] for error in errors] == ["duplicate key"]
+    assert (writer.stats.errors, writer.stats.upserted) == (1, 7)
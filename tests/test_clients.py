@@ -0,0 +1,40 @@
+import threading, time
+import pytest
+import agents.clients as clients
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(clients, "_clients", {})
+    monkeypatch.setattr(clients, "_closers", {})
+
+def test_concurrent_first_use_creates_one_client():
+    created = []
+
+    def create():
+        time.sleep(0.05)
+        created.append(object())
+        return created[-1]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(clients._get_or_create("key", create)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1 and all(result is created[0] for result in results)
+
+def test_chat_models_are_shared_per_model_and_temperature():
+    llm = clients.get_chat_model("gpt-4o")
+    assert clients.get_chat_model("gpt-4o") is llm
+    assert clients.get_chat_model("gpt-4o", temperature=0) is not llm
+    # Every OpenAI wrapper shares one HTTP connection pool
+    assert clients.get_chat_model("gpt-4o-mini").http_client is llm.http_client is clients.get_openai_client()._client
+
+def test_close_clients_closes_and_forgets_them():
+    closed = []
+    clients._get_or_create("a", lambda: "client a", closed.append)
+    clients.close_clients()
+    assert closed == ["client a"]
+    assert clients._get_or_create("a", lambda: "new client a") == "new client a"
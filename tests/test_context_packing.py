@@ -0,0 +1,38 @@
+from agents.context_packing import Passage, _merge_item_chunks, _overlap, pack_context
+
+TEXT = ("Data Center revenue grew on demand for Hopper GPUs from cloud providers and enterprises. "
+        "Gaming revenue was flat as channel inventory normalized after the prior year's correction. "
+        "Gross margin expanded on a favorable mix shift toward the data center platform.")
+
+def test_overlap_finds_the_splitters_shared_text():
+    assert _overlap(TEXT[:120], TEXT[90:]) == 30
+    assert _overlap("short ending", "short beginning") == 0
+
+def test_overlapping_and_contained_chunks_are_merged():
+    passages = [Passage("ITEM 7", TEXT[90:], 0.8), Passage("ITEM 7", TEXT[:120], 0.9),
+                Passage("ITEM 7", TEXT[20:60], 0.7)]
+    merged = _merge_item_chunks(passages)
+    assert [(passage.text, passage.score, passage.chunks) for passage in merged] == [(TEXT, 0.9, 3)]
+
+def test_pack_context_merges_chunks_and_drops_near_duplicates():
+    docs = [
+        {"item_code": "ITEM 7", "chunk": TEXT[:120], "score": 0.9},
+        {"item_code": "ITEM 7", "chunk": TEXT[90:], "score": 0.85},
+        {"item_code": "ITEM 1A", "chunk": TEXT.replace("flat", "stable"), "score": 0.8},  # near-duplicate
+        {"item_code": "ITEM 1A", "chunk": "Export controls may restrict sales of data center products to China.",
+         "score": 0.7},
+        {"item_code": "ITEM 1", "chunk": "", "score": 0.99},
+    ]
+    packed = pack_context(docs, token_budget=10_000)
+    assert [passage.item_code for passage in packed.passages] == ["ITEM 7", "ITEM 1A"]
+    assert packed.passages[0].text == TEXT
+    assert packed.chunks_in == 4
+    assert packed.tokens_out < packed.tokens_in
+    assert packed.text.startswith("[ITEM 7]\n")
+
+def test_pack_context_respects_the_token_budget():
+    docs = [{"item_code": "ITEM 7", "chunk": "revenue " * 400, "score": 0.9},
+            {"item_code": "ITEM 1A", "chunk": "Supply constraints could limit shipments.", "score": 0.5}]
+    packed = pack_context(docs, token_budget=50)
+    assert [passage.item_code for passage in packed.passages] == ["ITEM 1A"]
+    assert pack_context([], token_budget=50).text == ""
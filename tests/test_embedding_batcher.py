@@ -0,0 +1,44 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+import agents.embedding_batcher as embedding_batcher
+from agents.embedding_batcher import EmbeddingBatcher
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.requests = []
+
+    async def create(self, input, model):
+        self.requests.append(list(input))
+        # Out of order, like the API is allowed to return them
+        data = [SimpleNamespace(index=i, embedding=[float(len(text))]) for i, text in enumerate(input)]
+        return SimpleNamespace(data=list(reversed(data)))
+
+def _batcher(**kwargs):
+    embeddings = FakeEmbeddings()
+    client = SimpleNamespace(embeddings=embeddings)
+    return EmbeddingBatcher("text-embedding-3-small", max_wait_seconds=0.01, client=client, **kwargs), embeddings
+
+def test_concurrent_calls_are_packed_and_answered_in_order():
+    async def run():
+        batcher, embeddings = _batcher(max_inputs=3)
+        results = await asyncio.gather(batcher.aembed_documents(["a", "bb"]),
+                                        batcher.aembed_documents(["ccc", "dddd", "eeeee"]))
+        return results, embeddings.requests
+
+    results, requests = asyncio.run(run())
+    assert results == [[[1.0], [2.0]], [[3.0], [4.0], [5.0]]]
+    assert [len(request) for request in requests] == [3, 2]
+
+def test_oversize_text_rejects_the_call_before_queueing(monkeypatch):
+    monkeypatch.setattr(embedding_batcher, "embedding_max_input_tokens", 10)
+
+    async def run():
+        batcher, embeddings = _batcher()
+        with pytest.raises(ValueError):
+            await batcher.aembed_documents(["short", "word " * 100])
+        assert not batcher._queue and batcher._queued_tokens == 0
+        assert await batcher.aembed_documents(["ok"]) == [[2.0]]
+        return embeddings.requests
+
+    assert asyncio.run(run()) == [["ok"]]
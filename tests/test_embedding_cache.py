@@ -0,0 +1,43 @@
+import asyncio
+import pytest
+from agents.embedding_cache import CachedEmbedder, EmbeddingCache
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.requests = []
+
+    def embed_documents(self, texts):
+        self.requests.append(list(texts))
+        return [[float(len(text)), 0.5] for text in texts]
+
+    async def aembed_documents(self, texts):
+        return self.embed_documents(texts)
+
+@pytest.fixture
+def cache(tmp_path):
+    return EmbeddingCache(str(tmp_path / "embeddings.sqlite"))
+
+def test_only_distinct_misses_are_embedded(cache):
+    embeddings = FakeEmbeddings()
+    embedder = CachedEmbedder("model-a", cache, embeddings=embeddings)
+    assert embedder.embed_documents(["ab", "abc", "ab"]) == [[2.0, 0.5], [3.0, 0.5], [2.0, 0.5]]
+    assert embedder.embed_documents(["abc", "abcd"]) == [[3.0, 0.5], [4.0, 0.5]]
+    assert embeddings.requests == [["ab", "abc"], ["abcd"]]
+    assert embedder.stats == {"hits": 1, "misses": 3}
+
+def test_vectors_persist_per_model(cache, tmp_path):
+    CachedEmbedder("model-a", cache, embeddings=FakeEmbeddings()).embed_query("revenue")
+    reopened = EmbeddingCache(str(tmp_path / "embeddings.sqlite"))
+
+    same_model = FakeEmbeddings()
+    assert asyncio.run(CachedEmbedder("model-a", reopened, embeddings=same_model).aembed_query("revenue")) == [7.0, 0.5]
+    assert same_model.requests == []
+    other_model = FakeEmbeddings()
+    CachedEmbedder("model-b", reopened, embeddings=other_model).embed_query("revenue")
+    assert other_model.requests == [["revenue"]]
+
+def test_large_lookups_are_split_under_the_sqlite_parameter_limit(cache):
+    embedder = CachedEmbedder("model-a", cache, embeddings=FakeEmbeddings())
+    texts = [f"chunk {i}" for i in range(1200)]
+    embedder.embed_documents(texts)
+    assert len(cache.get_many("model-a", embedder._lookup(texts)[0])) == 1200
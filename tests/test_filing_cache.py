@@ -0,0 +1,57 @@
+import json, os, time
+import pytest
+import agents.filing_cache as filing_cache
+
+@pytest.fixture
+def cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(filing_cache, "filing_cache_dir", str(tmp_path))
+    monkeypatch.setattr(filing_cache, "_cache_bytes", None)
+    return tmp_path
+
+def _filing(accession_no: str) -> dict:
+    filing = {field: None for field in filing_cache._FILING_FIELDS}
+    filing.update(cik=1045810, company="NVIDIA CORP", form="10-K", filing_date="2025-02-26",
+                  report_date="2025-01-26", accession_no=accession_no, primary_document="nvda-20250126.htm")
+    return filing
+
+def _write_index(cache_dir, fetched_at: float) -> None:
+    index = {"fetched_at": fetched_at, "requested": 2, "filings": [_filing("0001"), _filing("0002")]}
+    path = cache_dir / filing_cache._INDEX_DIR / "NVDA__10-K.json"
+    path.parent.mkdir(parents=True)
+    path.write_text(json.dumps(index))
+
+class EdgarDown:
+    def __init__(self, ticker):
+        raise ConnectionError("EDGAR unavailable")
+
+def test_fresh_index_is_served_without_edgar(cache_dir, monkeypatch):
+    _write_index(cache_dir, time.time())
+    monkeypatch.setattr(filing_cache, "Company", EdgarDown)
+    filings = filing_cache.get_filing_index("nvda", "10-K", n=2)
+    assert [filing.accession_no for filing in filings] == ["0001", "0002"]
+
+def test_stale_index_is_served_when_edgar_fails(cache_dir, monkeypatch, capsys):
+    _write_index(cache_dir, time.time() - filing_cache.filing_index_ttl_seconds - 1)
+    monkeypatch.setattr(filing_cache, "Company", EdgarDown)
+    filings = filing_cache.get_filing_index("NVDA", "10-K", n=1)
+    assert [filing.accession_no for filing in filings] == ["0001"]
+    assert "serving the cached one" in capsys.readouterr().out
+
+def test_edgar_errors_propagate_without_a_cached_index(cache_dir, monkeypatch):
+    monkeypatch.setattr(filing_cache, "Company", EdgarDown)
+    with pytest.raises(ConnectionError):
+        filing_cache.get_filing_index("NVDA", "10-K")
+
+def test_writes_evict_least_recently_used_files_below_the_limit(cache_dir, monkeypatch):
+    monkeypatch.setattr(filing_cache, "filing_cache_max_bytes", 1000)
+    paths = [filing_cache._path(filing_cache._DOCUMENT_DIR, f"doc{i}.html") for i in range(3)]
+    for i, path in enumerate(paths):
+        filing_cache._write_cached_file(path, "x" * 300)
+        os.utime(path, (i, i))
+    assert filing_cache._cache_bytes == 900
+    assert filing_cache._read_file(paths[0]) is not None  # now the most recently used
+
+    filing_cache._write_cached_file(filing_cache._path(filing_cache._DOCUMENT_DIR, "doc3.html"), "x" * 300)
+    remaining = sorted(os.listdir(cache_dir / filing_cache._DOCUMENT_DIR))
+    assert remaining == ["doc0.html", "doc2.html", "doc3.html"]
+    assert filing_cache._cache_bytes == 900
@@ -0,0 +1,37 @@
+import mongomock
+import pytest
+from filing_catalog import FilingCatalog
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient()["filingdb"]
+
+def _record(catalog, accession_no, filingdate, item_code, chunk_count=2):
+    return catalog.record_item("NVDA", "10-K", filingdate, accession_no, item_code, {"summary": item_code}, chunk_count)
+
+def test_items_are_recorded_until_the_filing_is_complete(db):
+    catalog = FilingCatalog(db["filing_catalog"])
+    _record(catalog, "0002", "2025-01-26", "ITEM 1")
+    doc = _record(catalog, "0002", "2025-01-26", "ITEM 7", chunk_count=5)
+    assert sorted(doc["items"]) == ["ITEM 1", "ITEM 7"] and doc["status"] == "in_progress"
+    assert catalog.items_done("0002") == {"ITEM 1", "ITEM 7"}
+    assert [d["_id"] for d in catalog.in_progress()] == ["0002"]
+
+    _record(catalog, "0001", "2024-01-28", "ITEM 1")
+    catalog.mark_complete("0001", 2)
+    assert catalog.latest("NVDA", "10-K")["filingdate"] == "2024-01-28"  # 0002 is not complete yet
+    catalog.mark_complete("0002", 7)
+    assert catalog.latest("NVDA", "10-K")["chunk_count"] == 7
+    assert catalog.completed_accessions(["0001", "0002", "0003"]) == {"0001", "0002"}
+    assert [d["filingdate"] for d in catalog.coverage("NVDA", "10-K")] == ["2024-01-28", "2025-01-26"]
+    assert "items" not in catalog.coverage("NVDA", "10-K")[0]
+
+def test_legacy_manifest_is_adopted_into_an_empty_catalog_only(db):
+    db["ingestion_manifest"].insert_one({"_id": "0001", "ticker": "NVDA", "form": "10-K", "filingdate": "2024-01-28",
+                                         "status": "complete", "items": {"ITEM 1": {"chunk_count": 3},
+                                                                         "ITEM 7": {"chunk_count": 4}}})
+    catalog = FilingCatalog(db["filing_catalog"])
+    assert catalog.adopt_legacy_manifest(db) == 1
+    doc = catalog.get("0001")
+    assert (doc["accession_no"], doc["item_codes"], doc["chunk_count"]) == ("0001", ["ITEM 1", "ITEM 7"], 7)
+    assert catalog.adopt_legacy_manifest(db) == 0
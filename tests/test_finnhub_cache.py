@@ -0,0 +1,65 @@
+import threading, time
+from types import SimpleNamespace
+import pytest
+from finnhub.exceptions import FinnhubAPIException
+import agents.finnhub_cache as finnhub_cache
+from agents.finnhub_cache import TokenBucket
+
+def test_token_bucket_allows_a_burst_then_the_rate():
+    bucket = TokenBucket(rate_per_second=20, capacity=5)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.05
+    for _ in range(4):
+        bucket.acquire()
+    assert time.monotonic() - start == pytest.approx(0.2, abs=0.07)
+
+def test_token_bucket_is_shared_across_threads():
+    bucket = TokenBucket(rate_per_second=50, capacity=1)
+    start = time.monotonic()
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(11)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.monotonic() - start >= 0.19
+
+@pytest.fixture
+def client(monkeypatch):
+    client = SimpleNamespace(calls=0)
+
+    def quote(ticker):
+        client.calls += 1
+        return {"c": 100.0 + client.calls}
+
+    client.quote = quote
+    monkeypatch.setattr(finnhub_cache, "get_finnhub_client", lambda: client)
+    monkeypatch.setattr(finnhub_cache, "rate_limiter", TokenBucket(1000, 1000))
+    finnhub_cache.clear_finnhub_cache()
+    yield client
+    finnhub_cache.clear_finnhub_cache()
+
+def test_responses_are_cached_per_ticker_until_their_ttl(client, monkeypatch):
+    quote = finnhub_cache.get_quote("nvda")
+    quote["c"] = 0.0  # callers get copies
+    assert finnhub_cache.get_quote("NVDA") == {"c": 101.0}
+    assert client.calls == 1
+
+    monkeypatch.setitem(finnhub_cache.finnhub_ttl_seconds, "quote", 0)
+    finnhub_cache.clear_finnhub_cache()
+    finnhub_cache.get_quote("NVDA")
+    assert finnhub_cache.get_quote("NVDA") == {"c": 103.0}
+
+def test_rate_limited_calls_are_retried(client, monkeypatch):
+    response = SimpleNamespace(status_code=429, json=lambda: {"error": "API limit reached"})
+    failures = [FinnhubAPIException(response)]
+
+    def quote(ticker):
+        if failures:
+            raise failures.pop()
+        return {"c": 1.0}
+
+    client.quote = quote
+    monkeypatch.setattr(finnhub_cache.time, "sleep", lambda seconds: None)
+    assert finnhub_cache.get_quote("AMD") == {"c": 1.0}
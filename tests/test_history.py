@@ -0,0 +1,57 @@
+import asyncio
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, ToolMessage
+from langgraph.graph.message import add_messages
+import agents.history as history
+
+def _tool_turn(n: int, output: str):
+    call = {"name": "get_latest_filings", "args": {"ticker": "NVDA"}, "id": f"call-{n}"}
+    return [HumanMessage(content=f"question {n}", id=f"h{n}"),
+            AIMessage(content="", tool_calls=[call], id=f"a{n}"),
+            ToolMessage(content=output, tool_call_id=f"call-{n}", id=f"t{n}"),
+            AIMessage(content=f"answer {n}", id=f"r{n}")]
+
+def _apply(state, update):
+    state = dict(state)
+    if "messages" in update:
+        state["messages"] = add_messages(state["messages"], update["messages"])
+    if "summary" in update:
+        state["summary"] = update["summary"]
+    return state
+
+def _run(state):
+    return asyncio.run(history.compact_history(state))
+
+def test_tool_outputs_are_truncated_once_with_their_original_size(monkeypatch):
+    monkeypatch.setattr(history, "history_token_budget", 10**6)
+    monkeypatch.setattr(history, "history_tool_output_tokens", 100)
+    long_output = "revenue grew strongly " * 400
+    original_tokens = history.count_tokens(long_output)
+    state = {"messages": _tool_turn(1, long_output) + _tool_turn(2, long_output), "summary": ""}
+
+    state = _apply(state, _run(state))
+    truncated = state["messages"][2]
+    assert truncated.additional_kwargs["truncated_from"] == original_tokens
+    assert f"of {original_tokens} tokens" in truncated.content
+    assert truncated.tool_call_id == "call-1"
+    assert state["messages"][6].content == long_output  # the current turn is left alone
+
+    # Later passes leave the truncated message as it is
+    assert _run(state) == {"messages": []}
+    state = _apply(state, _run(state))
+    assert state["messages"][2].content == truncated.content
+
+def test_oldest_turns_are_folded_into_the_summary(monkeypatch):
+    async def fake_summarize(summary, messages):
+        return summary + "".join(f"[{message.id}]" for message in messages)
+
+    monkeypatch.setattr(history, "_summarize", fake_summarize)
+    monkeypatch.setattr(history, "history_token_budget", 60)
+    monkeypatch.setattr(history, "history_keep_turns", 2)
+    messages = [message for n in range(1, 5) for message in _tool_turn(n, "output")]
+    update = _run({"messages": messages, "summary": ""})
+
+    removed = [message.id for message in update["messages"] if isinstance(message, RemoveMessage)]
+    assert removed == [message.id for message in messages[:8]]
+    assert update["summary"] == "".join(f"[{message.id}]" for message in messages[:8])
+    kept = add_messages(messages, update["messages"])
+    assert isinstance(kept[0], HumanMessage) and kept[0].id == "h3"
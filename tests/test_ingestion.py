@@ -0,0 +1,82 @@
+import asyncio
+from types import SimpleNamespace
+import mongomock
+import pytest
+from pymongo import ReplaceOne
+import ingest_ar_filings
+from ingest_ar_filings import ChunkBatch, FilingIngestion, FilingJob, ItemJob, chunk_hash
+from filing_catalog import FilingCatalog
+from agents.core_utils import SUMMARY_PROMPT_VERSION
+from agents.quantization import encode_embedding
+from agents.schemas import FilingChunks, FilingItemSummary
+
+ITEMS = ["ITEM 1", "ITEM 7"]
+FILING = SimpleNamespace(accession_no="0001045810-25-000023", report_date="2025-01-26")
+
+class BulkCollection:
+    """
+    mongomock collection whose bulk_write applies the operations one by one (mongomock can't
+    read the operations of recent pymongo versions).
+    """
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def bulk_write(self, operations, ordered=True):
+        for op in operations:
+            write = self._collection.replace_one if isinstance(op, ReplaceOne) else self._collection.update_one
+            write(op._filter, op._doc, upsert=op._upsert)
+        return SimpleNamespace(bulk_api_result={"nUpserted": 0, "nModified": 0})
+
+@pytest.fixture
+def ingestion(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    db = mongomock.MongoClient()["filingdb"]
+    return FilingIngestion(ITEMS, 3, BulkCollection(db["all_filing_summaries"]),
+                           BulkCollection(db["all_filing_chunks"]), FilingCatalog(db["filing_catalog"]))
+
+def _item_batch(item_code, texts):
+    job = ItemJob("NVDA", "10-K", FILING, item_code, "Title", "Description", "",
+                  summary=FilingItemSummary(item_code=item_code, title="Title", description="Description",
+                                            summary=f"{item_code} summary"))
+    chunks = [FilingChunks(ticker="NVDA", filingdate=FILING.report_date, form="10-K",
+                           accession_no=FILING.accession_no, item_code=item_code, chunk=text,
+                           chunk_hash=chunk_hash(text), **encode_embedding([0.6, 0.8], "float32"))
+              for text in texts]
+    return ChunkBatch(job, chunks, last=True)
+
+def test_items_are_checkpointed_and_rewrites_are_idempotent(ingestion):
+    asyncio.run(ingestion.write(_item_batch("ITEM 1", ["a", "b"])))
+    assert ingestion.catalog.items_done(FILING.accession_no) == {"ITEM 1"}
+    assert ingestion.catalog.completed_accessions([FILING.accession_no]) == set()
+
+    # Re-running an item (e.g. after a crash before its checkpoint) upserts the same chunks
+    asyncio.run(ingestion.write(_item_batch("ITEM 1", ["a", "b"])))
+    asyncio.run(ingestion.write(_item_batch("ITEM 7", ["c"])))
+    assert ingestion.collection_filing_chunks.count_documents({}) == 3
+    assert ingestion.catalog.completed_accessions([FILING.accession_no]) == {FILING.accession_no}
+    assert ingestion.catalog.get(FILING.accession_no)["chunk_count"] == 3
+
+    summary = ingestion.collection_filing_summary.find_one({"accession_no": FILING.accession_no})
+    assert [item["item_code"] for item in summary["filingitemsummaries"]] == ITEMS
+    assert summary["prompt_version"] == SUMMARY_PROMPT_VERSION
+
+def test_failed_chunk_writes_are_not_checkpointed(ingestion, monkeypatch):
+    monkeypatch.setattr(ingestion.chunk_writer, "write", lambda operations: [{"errmsg": "duplicate key"}])
+    with pytest.raises(RuntimeError):
+        asyncio.run(ingestion.write(_item_batch("ITEM 1", ["a"])))
+    assert ingestion.catalog.items_done(FILING.accession_no) == set()
+
+def test_completed_filings_are_skipped_before_download(ingestion, monkeypatch):
+    newer = SimpleNamespace(accession_no="0001045810-26-000010", report_date="2026-01-25")
+    downloaded = []
+    monkeypatch.setattr(ingest_ar_filings, "get_latest_filings", lambda ticker, form, n, as_df: [newer, FILING])
+    monkeypatch.setattr(ingest_ar_filings, "get_filing_html", lambda filing: downloaded.append(filing.accession_no))
+    ingestion.catalog.collection.insert_one({"_id": FILING.accession_no, "status": "complete"})
+
+    jobs = asyncio.run(ingestion.fetch(FilingJob("NVDA", "10-K", None)))
+    assert [job.filing for job in jobs] == [newer]
+    assert downloaded == [newer.accession_no]
+    assert ingestion.filings_skipped == 1
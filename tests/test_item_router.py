@@ -0,0 +1,36 @@
+import agents.item_router as item_router
+from agents.item_router import ItemRouter
+
+ITEMS = {"ITEM 1": "Business", "ITEM 1A": "Risk Factors", "ITEM 7": "Management's Discussion and Analysis"}
+VECTORS = {"Business": [1.0, 0.0, 0.0], "Risk Factors": [0.0, 1.0, 0.0],
+           "Management's Discussion and Analysis": [0.0, 0.0, 1.0]}
+
+def _router(tmp_path, calls, **kwargs):
+    def embed_documents(texts):
+        calls.append(len(texts))
+        return [VECTORS[text] for text in texts]
+
+    return ItemRouter(ITEMS, embed_documents, embed_query=lambda query: [0.0, 1.0, 0.1],
+                      model="test-model", cache_path=str(tmp_path / "router.json"),
+                      min_similarity=0.6, margin=0.05, max_items=2, **kwargs)
+
+def test_confident_questions_are_routed_locally_and_memoized(tmp_path):
+    calls = []
+    router = _router(tmp_path, calls)
+    assert router.route("What are the  main RISKS?") == ["ITEM 1A"]
+    assert router.route("what are the main risks?") == ["ITEM 1A"]
+    assert router.stats == {"memo_hits": 1, "local_routes": 1, "llm_fallbacks": 0}
+    # Close runners-up within the margin are routed too
+    assert router.route("risks and results", [0.0, 1.0, 0.98]) == ["ITEM 1A", "ITEM 7"]
+
+def test_item_embeddings_are_persisted(tmp_path):
+    calls = []
+    _router(tmp_path, calls).route("risks")
+    _router(tmp_path, calls).route("risks")
+    assert calls == [3]
+
+def test_low_similarity_falls_back_to_the_llm(tmp_path, monkeypatch):
+    monkeypatch.setattr(item_router, "infer_relevant_items", lambda query, item_map: ["ITEM 1"])
+    router = _router(tmp_path, [])
+    assert router.route("unrelated", [1.0, 1.0, 1.0]) == ["ITEM 1"]
+    assert router.stats["llm_fallbacks"] == 1
@@ -0,0 +1,52 @@
+import asyncio, threading, time
+from langchain_core.messages import AIMessage
+import agents.core_utils as core_utils
+
+class LoopBoundModel:
+    """
+    Stands in for the shared ChatOpenAI: its async client is bound to the first event loop that
+    uses it, like httpx.AsyncClient, so `ainvoke` fails once that loop is closed.
+    """
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self._loop = None
+
+    def invoke(self, prompt):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return AIMessage(content=f"summary {len(prompt)}")
+
+    async def ainvoke(self, prompt):
+        loop = asyncio.get_running_loop()
+        if self._loop is not None and self._loop is not loop:
+            raise RuntimeError("Event loop is closed")
+        self._loop = loop
+        return self.invoke(prompt)
+
+def test_repeated_summaries_reuse_the_shared_model(monkeypatch):
+    llm = LoopBoundModel()
+    monkeypatch.setattr(core_utils, "get_chat_model", lambda *args, **kwargs: llm)
+    for _ in range(3):
+        assert core_utils.summarize_item_text("ITEM 1", "Business", "desc", "short text").startswith("summary")
+    assert llm.calls == 3
+
+def test_long_items_are_map_reduced_within_the_concurrency_cap(monkeypatch):
+    llm = LoopBoundModel(delay=0.05)
+    monkeypatch.setattr(core_utils, "get_chat_model", lambda *args, **kwargs: llm)
+    monkeypatch.setattr(core_utils, "summary_section_tokens", 50)
+    text = "\n".join("paragraph " * 40 for _ in range(8))
+    sections = core_utils.split_into_sections(text, 50)
+    assert len(sections) > 2
+
+    core_utils.summarize_item_text("ITEM 7", "MD&A", "desc", text, threading.Semaphore(2))
+    assert llm.calls == len(sections) + 1  # map calls, then one reduce call
+    assert llm.max_active <= 2
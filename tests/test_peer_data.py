@@ -0,0 +1,37 @@
+import time
+import agents.data_wrappers as data_wrappers
+
+def _patch_sources(monkeypatch, sources, timeouts, max_workers):
+    monkeypatch.setattr(data_wrappers, "PEER_DATA_SOURCES", sources)
+    monkeypatch.setattr(data_wrappers, "peer_data_source_timeouts", timeouts)
+    monkeypatch.setattr(data_wrappers, "peer_data_max_workers", max_workers)
+
+def test_fetches_run_concurrently(monkeypatch):
+    def fetch(ticker):
+        time.sleep(0.2)
+        return ticker.lower()
+
+    _patch_sources(monkeypatch, {"price": fetch, "rating": fetch}, {"price": 5, "rating": 5}, 8)
+    start = time.monotonic()
+    peer_data = data_wrappers.gather_peer_data(["NVDA", "AMD"])
+    assert time.monotonic() - start < 0.35
+    assert peer_data == {"NVDA": {"price": "nvda", "rating": "nvda"}, "AMD": {"price": "amd", "rating": "amd"}}
+
+def test_queued_fetches_do_not_extend_the_overall_timeout(monkeypatch):
+    def slow(ticker):
+        time.sleep(1.0)
+        return ticker
+
+    # One worker: most fetches are still queued when the 0.3s deadline passes
+    _patch_sources(monkeypatch, {"price": slow, "rating": slow}, {"price": 0.3, "rating": 0.3}, 1)
+    start = time.monotonic()
+    peer_data = data_wrappers.gather_peer_data(["NVDA", "AMD", "INTC"])
+    assert time.monotonic() - start < 0.6
+    assert all("Timed out fetching price" in data["error"] for data in peer_data.values())
+
+def test_first_failing_source_is_reported(monkeypatch):
+    def broken(ticker):
+        raise ValueError(f"no data for {ticker}")
+
+    _patch_sources(monkeypatch, {"price": broken, "rating": lambda ticker: ticker}, {"price": 5, "rating": 5}, 2)
+    assert data_wrappers.gather_peer_data(["NVDA"]) == {"NVDA": {"error": "no data for NVDA"}}
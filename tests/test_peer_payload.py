@@ -0,0 +1,57 @@
+import pandas as pd
+from agents.core_utils import encode_peer_financials, encode_peer_market_data, format_peer_comparison_prompt
+from agents.financial_concepts import fiscal_year_columns, select_line_items
+
+def _statement(rows, periods):
+    # rows: (concept, label, values by period)
+    return pd.DataFrame([{"concept": concept, "label": label, **dict(zip(periods, values))}
+                         for concept, label, values in rows])
+
+NVDA_INCOME = _statement([
+    ("us-gaap_Revenues", "Revenue", [130_497e6, 60_922e6]),
+    ("us-gaap_GrossProfit", "Gross Profit", [97_858e6, 44_301e6]),
+    ("us-gaap_EarningsPerShareDiluted", "Earnings Per Share (Diluted)", [2.94, 1.19]),
+], ["2025-01-26", "2024-01-28"])
+# A filer using another revenue concept, a label-only row and a fiscal year ending in August
+MU_INCOME = _statement([
+    ("us-gaap_RevenueFromContractWithCustomerExcludingAssessedTax", "Net Sales", [25_111e6, 15_540e6]),
+    ("custom_OperatingProfit", "Operating Income", [5_021e6, None]),
+], ["2024-08-29", "2023-08-31"])
+
+def test_fiscal_years_are_named_by_the_year_they_end_in():
+    df = pd.DataFrame(columns=["concept", "label", "2024-08-29", "2024-01-28", "2023-08-31"])
+    assert fiscal_year_columns(df) == {"2024-08-29": "FY2024", "2023-08-31": "FY2023"}
+
+def test_line_items_match_by_concept_then_label():
+    assert select_line_items(MU_INCOME, "income") == {
+        "Revenue": {"FY2024": 25_111e6, "FY2023": 15_540e6},
+        "Operating Income": {"FY2024": 5_021e6, "FY2023": None},
+    }
+
+def test_peer_financials_are_one_aligned_table():
+    peer_data = {"NVDA": {"income_statement": NVDA_INCOME}, "MU": {"income_statement": MU_INCOME},
+                 "AMD": {"error": "Timed out"}}
+    assert encode_peer_financials(peer_data, max_periods=2).splitlines() == [
+        "| Item | Ticker | FY2025 | FY2024 |",
+        "|---|---|---|---|",
+        "| Revenue | NVDA | 130497 | 60922 |",
+        "| Revenue | MU |  | 25111 |",
+        "| Gross Profit | NVDA | 97858 | 44301 |",
+        "| Operating Income | MU |  | 5021 |",
+        "| Diluted EPS | NVDA | 2.94 | 1.19 |",
+    ]
+
+def test_market_data_and_errors_are_in_the_prompt():
+    peer_data = {
+        "NVDA": {"income_statement": NVDA_INCOME, "stock_price": {"c": 181.2, "dp": -1.3},
+                 "analyst_rating": [{"strongBuy": 20, "buy": 40, "hold": 5, "sell": 1, "strongSell": 0,
+                                     "period": "2025-10-01"}],
+                 "earnings": [{"year": 2026, "quarter": 2, "actual": 1.05, "estimate": 1.01}]},
+        "AMD": {"error": "Timed out fetching income_statement for AMD after 60s"},
+    }
+    assert encode_peer_market_data(peer_data).splitlines()[-1] == \
+        "| NVDA | 181.2 | -1.3 | 20/40/5/1/0 (2025-10-01) | 2026Q2 1.05/1.01 |"
+    prompt = format_peer_comparison_prompt(peer_data)
+    assert "AMD: data unavailable (Timed out" in prompt
+    assert "| NVDA | FY2025 | 75.0% |" in prompt
+    assert "DataFrame" not in prompt and "us-gaap" not in prompt
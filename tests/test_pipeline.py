@@ -0,0 +1,40 @@
+import asyncio, time
+from pipeline import Pipeline, Stage, format_stage_report
+
+def test_items_flow_through_stages_with_parallel_workers():
+    results = []
+
+    async def fetch(n):
+        await asyncio.sleep(0.1)
+        return [n, n + 100]
+
+    async def parse(n):
+        if n == 3:
+            raise ValueError("unparseable filing")
+        return [n * 2]
+
+    async def write(n):
+        results.append(n)
+
+    pipeline = Pipeline([Stage("fetch", fetch, workers=5), Stage("parse", parse, workers=2), Stage("write", write)],
+                        queue_size=2)
+    start = time.monotonic()
+    stats = asyncio.run(pipeline.run(range(5)))
+    assert time.monotonic() - start < 0.3
+    assert sorted(results) == [0, 2, 4, 8, 200, 202, 204, 206, 208]
+    assert [(s.processed, s.emitted, s.errors) for s in stats] == [(5, 10, 0), (9, 9, 1), (9, 0, 0)]
+    assert "fetch" in format_stage_report(stats)
+
+def test_async_generator_stages_stream_their_outputs():
+    seen = []
+
+    async def split(n):
+        for i in range(n):
+            yield (n, i)
+
+    async def collect(item):
+        seen.append(item)
+
+    stats = asyncio.run(Pipeline([Stage("split", split), Stage("collect", collect)]).run([2, 3]))
+    assert seen == [(2, 0), (2, 1), (3, 0), (3, 1), (3, 2)]
+    assert (stats[0].processed, stats[0].emitted) == (2, 5)
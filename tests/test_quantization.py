@@ -0,0 +1,41 @@
+import bson
+import numpy as np
+import pytest
+from agents.quantization import STORAGE_DTYPES, decode_embedding, encode_embedding, quantize_int8
+from agents.schemas import FilingChunks
+
+@pytest.fixture
+def vector():
+    rng = np.random.default_rng(0)
+    vector = rng.standard_normal(1536).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+@pytest.mark.parametrize("storage, max_error", [("float32", 0.0), ("float16", 1e-3), ("int8", 2e-3)])
+def test_round_trip_through_bson(vector, storage, max_error):
+    fields = encode_embedding(vector.tolist(), storage)
+    doc = bson.decode(bson.encode({"_id": 1, **fields}))
+    decoded = decode_embedding(doc)
+    assert decoded.dtype == np.float32
+    assert np.abs(decoded - vector).max() <= max_error
+    assert float(decoded @ vector) == pytest.approx(1.0, abs=1e-3)
+
+def test_quantized_documents_are_smaller(vector):
+    sizes = {storage: len(bson.encode(encode_embedding(vector.tolist(), storage))) for storage in STORAGE_DTYPES}
+    assert sizes["float16"] < sizes["float32"] / 3
+    assert sizes["int8"] < sizes["float16"]
+
+def test_int8_quantization_is_per_row():
+    codes, scales = quantize_int8(np.array([[0.0, 0.0], [1.0, -0.5], [0.25, -1.0]]))
+    assert codes.dtype == np.int8 and codes[1].tolist() == [127, -64]
+    assert scales[0] == 1.0  # all-zero rows don't divide by zero
+    assert codes[2].tolist() == [32, -127]
+
+def test_chunk_schema_accepts_every_storage_mode(vector):
+    for storage in STORAGE_DTYPES:
+        chunk = FilingChunks(ticker="NVDA", filingdate="2025-01-26", form="10-K", item_code="ITEM 7",
+                             chunk="text", **encode_embedding(vector.tolist(), storage))
+        assert chunk.model_dump()["embedding_dtype"] == storage
+
+def test_unknown_storage_is_rejected(vector):
+    with pytest.raises(ValueError):
+        encode_embedding(vector.tolist(), "bfloat16")
@@ -0,0 +1,32 @@
+import asyncio, time
+import agents.query_ar_index as query_ar_index
+from agents.core_utils import StageTimer
+
+def test_embedding_and_latest_filing_lookup_run_concurrently(monkeypatch):
+    def embed(query_text):
+        time.sleep(0.2)
+        return [1.0, 0.0]
+
+    def latest(ticker):
+        time.sleep(0.2)
+        return "2025-01-26"
+
+    monkeypatch.setattr(query_ar_index, "_embed_query", embed)
+    monkeypatch.setattr(query_ar_index, "_find_latest_filingdate", latest)
+    monkeypatch.setattr(query_ar_index, "route_relevant_items", lambda query_text, embedding: ["ITEM 7"])
+    timer = StageTimer("test")
+    start = time.monotonic()
+    result = asyncio.run(query_ar_index._gather_retrieval_inputs("revenue drivers?", "NVDA", None, timer))
+    assert time.monotonic() - start < 0.35
+    assert result == ([1.0, 0.0], ["ITEM 7"], "2025-01-26")
+    assert set(timer.timings) == {"embed", "latest_filing", "route_items"}
+
+def test_given_filingdate_skips_the_lookup(monkeypatch):
+    def latest(ticker):
+        raise AssertionError("not needed")
+
+    monkeypatch.setattr(query_ar_index, "_embed_query", lambda query_text: [0.5])
+    monkeypatch.setattr(query_ar_index, "_find_latest_filingdate", latest)
+    monkeypatch.setattr(query_ar_index, "route_relevant_items", lambda query_text, embedding: ["ITEM 1A"])
+    result = asyncio.run(query_ar_index._gather_retrieval_inputs("risks?", "NVDA", "2024-01-28", StageTimer("test")))
+    assert result == ([0.5], ["ITEM 1A"], "2024-01-28")
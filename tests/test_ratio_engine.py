@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+from agents.ratio_engine import build_line_item_frame, compute_ratios, format_ratio_table
+
+def _statement(rows, periods):
+    return pd.DataFrame([{"concept": concept, "label": concept, **dict(zip(periods, values))}
+                         for concept, values in rows])
+
+PERIODS = ["2025-01-26", "2024-01-28"]
+PEERS = {
+    "NVDA": {
+        "income_statement": _statement([
+            ("us-gaap_Revenues", [130e9, 60e9]),
+            ("us-gaap_CostOfRevenue", [32e9, 16e9]),
+            ("us-gaap_OperatingIncomeLoss", [81e9, 33e9]),
+            ("us-gaap_InterestExpense", [-0.25e9, -0.25e9]),  # reported negative
+            ("us-gaap_NetIncomeLoss", [72e9, 30e9]),
+        ], PERIODS),
+        "balance_sheet": _statement([
+            ("us-gaap_AssetsCurrent", [80e9, 44e9]),
+            ("us-gaap_LiabilitiesCurrent", [18e9, 10e9]),
+            ("us-gaap_StockholdersEquity", [79e9, 0]),
+        ], PERIODS),
+    },
+    "INTC": {
+        "income_statement": _statement([
+            ("us-gaap_Revenues", [53e9, 54e9]),
+            ("us-gaap_GrossProfit", [17e9, 22e9]),
+            ("us-gaap_OperatingIncomeLoss", [-11e9, 0.1e9]),
+            ("us-gaap_InterestExpense", [1e9, 0.9e9]),
+        ], ["2024-12-28", "2023-12-30"]),
+    },
+    "AMD": {"error": "Timed out"},
+}
+
+@pytest.fixture
+def ratios():
+    return compute_ratios(build_line_item_frame(PEERS))
+
+def test_ratios_for_every_ticker_and_year(ratios):
+    nvda = ratios.loc[("NVDA", "FY2025")]
+    assert nvda["Gross Margin"] == pytest.approx(98 / 130)  # from revenue - cost of revenue
+    assert nvda["Operating Margin"] == pytest.approx(81 / 130)
+    assert nvda["Current Ratio"] == pytest.approx(80 / 18)
+    assert nvda["Revenue Growth"] == pytest.approx(70 / 60)
+    assert set(ratios.index.get_level_values("ticker")) == {"NVDA", "INTC"}
+
+def test_interest_coverage_keeps_the_sign_of_operating_income(ratios):
+    assert ratios.loc[("NVDA", "FY2025"), "Interest Coverage"] == pytest.approx(324)
+    assert ratios.loc[("INTC", "FY2024"), "Interest Coverage"] == pytest.approx(-11)
+
+def test_missing_inputs_and_zero_denominators_are_nan(ratios):
+    assert np.isnan(ratios.loc[("NVDA", "FY2024"), "Liabilities / Equity"])
+    assert np.isnan(ratios.loc[("INTC", "FY2024"), "Net Margin"])
+    assert np.isnan(ratios.loc[("NVDA", "FY2024"), "Revenue Growth"])  # no prior year
+    # Growth off a small base divides by its magnitude
+    assert ratios.loc[("INTC", "FY2024"), "Operating Income Growth"] == pytest.approx(-111)
+
+def test_ratio_table_is_newest_year_first(ratios):
+    lines = format_ratio_table(ratios).splitlines()
+    assert lines[2].startswith("| INTC | FY2024 |") and lines[3].startswith("| INTC | FY2023 |")
+    assert "75.4%" in lines[4] and "324.00x" in lines[4]
+    assert "Debt / Equity" not in lines[0]  # no company reports it
+    assert format_ratio_table(compute_ratios(build_line_item_frame({}))) == "No ratios could be computed."
@@ -0,0 +1,55 @@
+import mongomock
+import numpy as np
+import pytest
+import agents.retrieval as retrieval
+from agents.retrieval import AtlasRetriever, LocalVectorIndex
+
+@pytest.fixture
+def mongo(monkeypatch):
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(retrieval, "get_mongo_client", lambda uri_env="MONGO_URI": client)
+    return client["filingdb"]
+
+def test_latest_filingdate_prefers_the_catalog_and_falls_back_per_ticker(mongo):
+    mongo["filing_catalog"].insert_many([
+        {"_id": "a1", "ticker": "NVDA", "form": "10-K", "status": "complete", "filingdate": "2025-02-26"},
+        {"_id": "a2", "ticker": "NVDA", "form": "10-K", "status": "in_progress", "filingdate": "2026-02-25"},
+    ])
+    mongo["all_filing_chunks"].insert_many([
+        {"ticker": "NVDA", "form": "10-K", "filingdate": "2026-02-25"},
+        {"ticker": "AMD", "form": "10-K", "filingdate": "2024-01-31"},
+        {"ticker": "AMD", "form": "10-K", "filingdate": "2025-02-05"},
+    ])
+    retriever = AtlasRetriever()
+    assert retriever.latest_filingdate("NVDA") == "2025-02-26"
+    # AMD was ingested before the catalog existed: the catalog has other tickers, but not AMD
+    assert retriever.latest_filingdate("AMD") == "2025-02-05"
+    assert retriever.latest_filingdate("INTC") is None
+
+def _docs(n, dim, rng):
+    for i in range(n):
+        yield {"ticker": ["NVDA", "AMD"][i % 2], "form": "10-K", "item_code": "ITEM 7",
+               "filingdate": ["2024-02-21", "2025-02-26"][i % 3 % 2], "chunk": f"chunk {i}",
+               "embedding": rng.standard_normal(dim).tolist()}
+
+@pytest.mark.parametrize("storage", ["float32", "float16", "int8"])
+def test_local_index_finds_the_nearest_chunk(tmp_path, storage):
+    rng = np.random.default_rng(0)
+    docs = list(_docs(200, 16, rng))
+    index = LocalVectorIndex.build(docs, str(tmp_path / "index"), dim=16, storage=storage, ivf_lists=4)
+
+    target = docs[42]
+    results = index.search(target["embedding"], {"ticker": target["ticker"]}, num_candidates=200, limit=3)
+    assert results[0]["chunk"] == "chunk 42"
+    assert results[0]["score"] == pytest.approx(1.0, abs=0.02)
+    assert all(result["ticker"] == target["ticker"] for result in results)
+    assert index.latest_filingdate("NVDA") == "2025-02-26"
+    assert index.latest_filingdate("INTC") is None
+
+def test_ivf_search_scores_only_the_nearest_clusters(tmp_path):
+    rng = np.random.default_rng(1)
+    docs = list(_docs(400, 16, rng))
+    index = LocalVectorIndex.build(docs, str(tmp_path / "index"), dim=16, ivf_lists=8)
+    target = docs[7]
+    results = index.search(target["embedding"], {}, num_candidates=50, limit=1)
+    assert results[0]["chunk"] == "chunk 7"
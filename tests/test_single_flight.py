@@ -0,0 +1,77 @@
+import threading, time
+import pytest
+from agents.single_flight import SingleFlight, single_flight
+import agents.single_flight as single_flight_module
+
+def _run_concurrently(fn, n):
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(fn())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight, executions = SingleFlight(), []
+
+    def fetch():
+        executions.append(1)
+        time.sleep(0.2)
+        return {"rows": [1, 2]}
+
+    results, _ = _run_concurrently(lambda: flight.do("get_quote", "NVDA", fetch), 4)
+    assert len(executions) == 1
+    assert results == [{"rows": [1, 2]}] * 4
+    assert len({id(result) for result in results}) == 4  # every caller gets its own copy
+    assert flight.stats["get_quote"] == {"calls": 4, "executions": 1, "coalesced": 3}
+
+    # Nothing is cached once the call is done
+    flight.do("get_quote", "NVDA", fetch)
+    assert len(executions) == 2
+
+def test_waiters_get_the_leaders_exception():
+    flight = SingleFlight()
+
+    def fail():
+        time.sleep(0.1)
+        raise ConnectionError("EDGAR unavailable")
+
+    results, errors = _run_concurrently(lambda: flight.do("get_filings", "NVDA", fail), 3)
+    assert results == [] and len(errors) == 3
+    assert all(isinstance(error, ConnectionError) for error in errors)
+
+def test_waiters_call_separately_after_the_wait_limit():
+    flight = SingleFlight(wait_seconds=0.05)
+    results, _ = _run_concurrently(lambda: flight.do("slow", "key", lambda: time.sleep(0.2) or "done"), 2)
+    assert results == ["done", "done"]
+    assert flight.stats["slow"]["executions"] == 2
+
+def test_decorator_keys_on_normalized_arguments(monkeypatch):
+    monkeypatch.setattr(single_flight_module, "_single_flight", SingleFlight())
+    calls = []
+
+    @single_flight
+    def get_financial_statement(ticker: str, form_type: str = "10-K", statement_type: str = "income"):
+        """Fetches a statement."""
+        calls.append((ticker, form_type, statement_type))
+        time.sleep(0.2)
+        return ticker
+
+    assert get_financial_statement.__doc__ == "Fetches a statement."
+    threads = [threading.Thread(target=get_financial_statement, args=args)
+               for args in [("NVDA",), ("nvda", "10-k"), (" NVDA", "10-K", "income"), ("NVDA", "10-K", "balance_sheet")]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 2  # one per distinct key after normalizing and applying defaults
+    assert single_flight_module._single_flight.stats["get_financial_statement"]["coalesced"] == 2
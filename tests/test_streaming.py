@@ -0,0 +1,30 @@
+from typing import TypedDict
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.graph import END, START, StateGraph
+from agents.core_utils import emit_stream_event, stream_llm_text
+
+class State(TypedDict):
+    answer: str
+
+def _model():
+    return GenericFakeChatModel(messages=iter([AIMessage(content="Revenue grew strongly")]))
+
+def test_tokens_are_streamed_as_custom_events_inside_a_graph():
+    llm = _model()
+    builder = StateGraph(State)
+    builder.add_node("answer", lambda state: {"answer": stream_llm_text(llm, "question", "query_ar_index")})
+    builder.add_edge(START, "answer")
+    builder.add_edge("answer", END)
+
+    events = list(builder.compile().stream({"answer": ""}, stream_mode=["custom", "messages", "values"]))
+    deltas = [event["delta"] for mode, event in events if mode == "custom"]
+    assert "".join(deltas) == "Revenue grew strongly" and len(deltas) > 1
+    messages = [event for mode, event in events if mode == "messages"]
+    assert "".join(chunk.content for chunk, _metadata in messages) == "Revenue grew strongly"
+    assert all("query_ar_index" in metadata["tags"] for _chunk, metadata in messages)
+    assert events[-1] == ("values", {"answer": "Revenue grew strongly"})
+
+def test_streaming_outside_a_graph_just_returns_the_text():
+    emit_stream_event({"source": "script", "status": "ignored"})
+    assert stream_llm_text(_model(), "question", "script") == "Revenue grew strongly"
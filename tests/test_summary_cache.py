@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+import mongomock
+import pytest
+import agents.summary_cache as summary_cache
+from agents.summary_cache import SummaryCache
+
+FILING = SimpleNamespace(accession_no="0001045810-25-000023", report_date="2025-01-26")
+
+@pytest.fixture
+def mongo(monkeypatch):
+    client = mongomock.MongoClient()
+    monkeypatch.setenv("MONGO_URI", "mongodb://test")
+    monkeypatch.setattr(summary_cache, "get_mongo_client", lambda uri_env="MONGO_URI": client)
+    return client["filingdb"]
+
+def _ingested(prompt_version=None):
+    doc = {"ticker": "NVDA", "accession_no": FILING.accession_no, "filingdate": FILING.report_date,
+           "filingitemsummaries": [{"item_code": "ITEM 1", "summary": "GPUs.",
+                                    "key_values": [{"key": "Number of Employees", "value": "36,000"}]}]}
+    if prompt_version:
+        doc["prompt_version"] = prompt_version
+    return doc
+
+def test_ingested_summaries_are_reused_for_the_same_prompt_version(mongo):
+    mongo["all_filing_summaries"].insert_one(_ingested("v2"))
+    cache = SummaryCache()
+    assert cache.get_many("nvda", FILING, ["ITEM 1", "ITEM 7"], "v2") == {
+        "ITEM 1": "GPUs.\nKey values: Number of Employees: 36,000"}
+    assert cache.stats["ingested_hits"] == 1 and cache.stats["misses"] == 1
+
+@pytest.mark.parametrize("prompt_version", [None, "v1"])
+def test_ingested_summaries_of_other_prompt_versions_are_not_reused(mongo, prompt_version):
+    mongo["all_filing_summaries"].insert_one(_ingested(prompt_version))
+    assert SummaryCache().get_many("NVDA", FILING, ["ITEM 1"], "v2") == {}
+
+def test_put_is_read_back_from_memory_then_mongo(mongo):
+    SummaryCache().put("NVDA", FILING, "ITEM 7", "v2", "Revenue grew.")
+    cache = SummaryCache()
+    assert cache.get_many("NVDA", FILING, ["ITEM 7"], "v2") == {"ITEM 7": "Revenue grew."}
+    assert cache.get_many("NVDA", FILING, ["ITEM 7"], "v2") == {"ITEM 7": "Revenue grew."}
+    assert cache.stats["cache_hits"] == 1 and cache.stats["memory_hits"] == 1
+    assert cache.get_many("NVDA", FILING, ["ITEM 7"], "v3") == {}
+
+def test_memory_layer_is_an_lru(monkeypatch):
+    monkeypatch.delenv("MONGO_URI", raising=False)
+    cache = SummaryCache(max_entries=2)
+    for code in ["ITEM 1", "ITEM 1A", "ITEM 7"]:
+        cache.put("NVDA", FILING, code, "v2", code.lower())
+    assert cache.get_many("NVDA", FILING, ["ITEM 1", "ITEM 1A", "ITEM 7"], "v2") == {
+        "ITEM 1A": "item 1a", "ITEM 7": "item 7"}
@@ -0,0 +1,44 @@
+import json
+import pytest
+import agents.data_fetch_tools as data_fetch_tools
+from agents.ticker_index import TickerIndex, normalize_name
+
+COMPANIES = [
+    {"cik_str": 1045810, "ticker": "NVDA", "title": "NVIDIA CORP"},
+    {"cik_str": 723125, "ticker": "MU", "title": "MICRON TECHNOLOGY INC"},
+    {"cik_str": 1652044, "ticker": "GOOGL", "title": "Alphabet Inc."},
+    {"cik_str": 1652044, "ticker": "GOOG", "title": "Alphabet Inc."},
+    {"cik_str": 2488, "ticker": "AMD", "title": "ADVANCED MICRO DEVICES INC"},
+]
+
+@pytest.fixture
+def index(tmp_path):
+    path = tmp_path / "company_tickers.json"
+    path.write_text(json.dumps({str(i): company for i, company in enumerate(COMPANIES)}))
+    return TickerIndex(str(path), url=None)
+
+def test_normalize_name_drops_legal_suffixes():
+    assert normalize_name("Micron Technology, Inc.") == "micron technology"
+    assert normalize_name("Johnson & Johnson") == normalize_name("Johnson and Johnson") == "johnson johnson"
+
+def test_name_search_ranks_exact_and_prefix_matches_first(index):
+    assert [entry.ticker for entry in index.search_names("Micron")] == ["MU"]
+    # One result per company, its first listed share class
+    assert [entry.ticker for entry in index.search_names("alphabet")] == ["GOOGL"]
+
+def test_resolve_accepts_tickers_ciks_and_names(index):
+    assert index.resolve("nvda").ticker == "NVDA"
+    assert index.resolve("CIK0000723125").ticker == "MU"
+    assert index.resolve("Advanced Micro Devices").ticker == "AMD"
+
+def test_weak_name_matches_fall_back_to_yahoo(index, monkeypatch):
+    class Response:
+        def json(self):
+            return {"quotes": [{"shortname": "Micron Technology, Inc.", "symbol": "MU"}]}
+
+    monkeypatch.setattr(data_fetch_tools, "get_ticker_index", lambda: index)
+    monkeypatch.setattr(data_fetch_tools.requests, "get", lambda *args, **kwargs: Response())
+    assert data_fetch_tools.get_ticker_given_name("Micron") == [{"name": "MICRON TECHNOLOGY INC", "symbol": "MU"}]
+    # A misspelling only shares a few trigrams with the right name: Yahoo is asked instead
+    assert index.search_names("Micorn Tech", min_score=0.1)
+    assert data_fetch_tools.get_ticker_given_name("Micorn Tech") == [{"name": "Micron Technology, Inc.", "symbol": "MU"}]
@@ -0,0 +1,73 @@
+import threading, time
+from types import SimpleNamespace
+import pandas as pd
+import pytest
+import agents.xbrl_cache as xbrl_cache
+
+class FakeXBRLS:
+    def __init__(self, xbrl_list):
+        frame = pd.DataFrame({"label": ["Revenue"], **{xbrl: [1.0] for xbrl in xbrl_list}})
+        self.statements = SimpleNamespace(income_statement=lambda: SimpleNamespace(to_dataframe=lambda: frame.copy()))
+
+@pytest.fixture
+def parses(monkeypatch):
+    parsed, failing = [], set()
+
+    def from_filing(filing):
+        time.sleep(0.05)
+        parsed.append(filing.accession_no)
+        if filing.accession_no in failing:
+            raise ConnectionError("EDGAR unavailable")
+        return filing.accession_no
+
+    monkeypatch.setattr(xbrl_cache.XBRL, "from_filing", staticmethod(from_filing))
+    monkeypatch.setattr(xbrl_cache, "XBRLS", FakeXBRLS)
+    xbrl_cache.clear_xbrl_cache()
+    yield parsed, failing
+    xbrl_cache.clear_xbrl_cache()
+
+def _filing(accession_no, filing_date):
+    return SimpleNamespace(accession_no=accession_no, filing_date=filing_date)
+
+def test_lru_cache_evicts_the_least_recently_used():
+    cache = xbrl_cache._LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+
+def test_concurrent_callers_share_one_parse(parses):
+    parsed, _ = parses
+    filing = _filing("0001", "2025-02-26")
+    threads = [threading.Thread(target=xbrl_cache.get_filing_xbrl, args=(filing,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert parsed == ["0001"]
+    assert xbrl_cache._parse_locks == {}
+
+def test_stitches_are_cached_and_new_filings_parse_only_themselves(parses):
+    parsed, _ = parses
+    older, newer = _filing("0001", "2024-02-21"), _filing("0002", "2025-02-26")
+    df = xbrl_cache.get_stitched_statement([older], "income")
+    df.loc[0, "label"] = "changed by the caller"
+    assert xbrl_cache.get_stitched_statement([older], "income").loc[0, "label"] == "Revenue"
+
+    stitched = xbrl_cache.get_stitched_statement([older, newer], "income")
+    assert list(stitched.columns) == ["label", "0002", "0001"]  # newest first
+    assert parsed == ["0001", "0002"]
+
+def test_partial_stitches_are_not_cached(parses):
+    parsed, failing = parses
+    filing = _filing("0001", "2025-02-26")
+    failing.add("0001")
+    assert list(xbrl_cache.get_stitched_statement([filing], "income").columns) == ["label"]
+    failing.clear()
+    assert list(xbrl_cache.get_stitched_statement([filing], "income").columns) == ["label", "0001"]
+    assert parsed == ["0001", "0001"]
+
+def test_unknown_statement_type_is_rejected(parses):
+    with pytest.raises(ValueError):
+        xbrl_cache.get_stitched_statement([], "equity")